@@ -2,17 +2,46 @@ from flask import Flask
 from app.models import db
 from config import Config
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     db.init_app(app)
 
+    # orjson 이 설치돼 있으면 jsonify 도 orjson 으로 직렬화한다
+    from app.fastjson import OrjsonProvider, orjson
+    if app.config.get('JSON_PROVIDER') == 'orjson' and orjson is not None:
+        app.json = OrjsonProvider(app)
+
+    # 여러 워커 프로세스로 띄울 때 변경 알림을 다른 워커에도 전달한다
+    if app.config.get('FANOUT_URL'):
+        from app.fanout import start_fanout
+        start_fanout(app.config['FANOUT_URL'])
+
+    # 마감된 오래된 주문 보관, 오래된 변경 이벤트 정리 (flask archive-orders/prune-events)
+    from app.archive import init_archive
+    init_archive(app)
+
+    # 기존 메뉴 이미지 변환 (flask build-menu-images)
+    from app.images import init_images
+    init_images(app)
+
+    # 매출 집계 재생성 (flask rebuild-rollups)
+    from app.rollups import init_rollups
+    init_rollups(app)
+
+    if app.config.get('METRICS_ENABLED'):
+        from app.metrics import init_metrics
+        init_metrics(app)
+
     # 블루프린트 임포트
     from app.routes.menu import menu_bp
     from app.routes.order import order_bp
     from app.routes.cashier import cashier_bp
     from app.routes.kitchen import kitchen_bp
     from app.routes.serving import serving_bp
+    from app.routes.qr import qr_bp
+    from app.routes.report import report_bp
+    from app.routes.images import images_bp
 
     # 블루프린트 등록
     app.register_blueprint(menu_bp)
@@ -20,6 +49,9 @@ def create_app():
     app.register_blueprint(cashier_bp)
     app.register_blueprint(kitchen_bp)   # ✅ 누락되었던 부분 추가
     app.register_blueprint(serving_bp)
+    app.register_blueprint(qr_bp)
+    app.register_blueprint(report_bp)
+    app.register_blueprint(images_bp)
     
     # 등록된 라우트 출력
     print("\n=== 등록된 라우트 목록 ===")
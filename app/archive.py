@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import takewhile
+
+import click
+from sqlalchemy import delete, insert, select, text
+
+from app.models import (
+    db, ArchivedOrder, ArchivedOrderDetail, ArchivedPayment, ChangeEvent, Order, OrderDetail, Payment
+)
+
+logger = logging.getLogger(__name__)
+
+# 더 바뀌지 않는 주문만 옮긴다
+ARCHIVE_STATUSES = ('완료', '취소')
+
+# (원본, 보관 테이블) - 자식 테이블부터 지우고, 부모 테이블부터 복사한다
+ARCHIVE_TABLES = [(Order, ArchivedOrder), (OrderDetail, ArchivedOrderDetail), (Payment, ArchivedPayment)]
+
+# 보관/이벤트 정리 작업을 한 곳에서만 돌리기 위한 MySQL 잠금 이름
+ARCHIVE_LOCK = 'order-archive'
+PRUNE_LOCK = 'change-event-prune'
+
+
+@contextmanager
+def archive_lock(name=ARCHIVE_LOCK):
+    # 다른 워커/서버가 같은 작업 중이면 False (MySQL GET_LOCK, 다른 DB 는 잠그지 않는다)
+    # 잠금은 커넥션에 걸리므로 배치마다 커밋하는 세션과 별도 커넥션으로 끝까지 들고 있는다
+    if db.engine.dialect.name != 'mysql':
+        yield True
+        return
+    with db.engine.connect() as conn:
+        acquired = conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": name}).scalar() == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+
+def _move(order_ids):
+    for model, archive in ARCHIVE_TABLES:
+        columns = [column.name for column in model.__table__.columns]
+        db.session.execute(
+            insert(archive.__table__).from_select(
+                columns,
+                select(*model.__table__.columns).where(model.order_id.in_(order_ids))
+            )
+        )
+    for model, _ in reversed(ARCHIVE_TABLES):
+        db.session.execute(
+            delete(model).where(model.order_id.in_(order_ids)).execution_options(synchronize_session=False)
+        )
+
+
+def archive_closed_orders(older_than, batch_size=500):
+    """마감(완료/취소) 후 older_than 이 지난 주문을 보관 테이블로 옮긴다.
+
+    주문/상세/결제를 batch_size 건씩 한 트랜잭션으로 복사하고 지워서,
+    영업 중에 돌려도 잠금이 오래 걸리지 않는다. change_events 는
+    prune_change_events 가 따로 지운다.
+    옮긴 주문 수를 반환하고, 다른 곳에서 보관 작업 중이면 None.
+    """
+    with archive_lock() as acquired:
+        if not acquired:
+            return None
+        return _archive(datetime.now() - older_than, batch_size)
+
+
+def _archive(cutoff, batch_size):
+    moved = 0
+    while True:
+        order_ids = [
+            order_id for (order_id,) in db.session.query(Order.order_id).filter(
+                Order.order_status.in_(ARCHIVE_STATUSES),
+                Order.updated_at < cutoff
+            ).order_by(Order.order_id).limit(batch_size)
+        ]
+        if not order_ids:
+            break
+        _move(order_ids)
+        db.session.commit()
+        moved += len(order_ids)
+    return moved
+
+
+def prune_change_events(older_than, batch_size=5000):
+    """older_than 보다 오래된 change_events 를 batch_size 건씩 지운다.
+
+    그보다 오래된 SSE 재접속은 스냅샷부터 받는다. 지운 건수를 반환하고,
+    다른 곳에서 정리 중이면 None.
+    """
+    with archive_lock(PRUNE_LOCK) as acquired:
+        if not acquired:
+            return None
+        cutoff = datetime.now() - older_than
+        pruned = 0
+        while True:
+            # created_at 인덱스가 없으므로 기본 키 순서로 앞에서부터 읽다가 새 이벤트가 나오면 멈춘다
+            rows = db.session.query(ChangeEvent.event_id, ChangeEvent.created_at).order_by(
+                ChangeEvent.event_id
+            ).limit(batch_size).all()
+            event_ids = [event_id for event_id, _ in takewhile(lambda row: row[1] < cutoff, rows)]
+            if event_ids:
+                db.session.execute(
+                    delete(ChangeEvent).where(ChangeEvent.event_id.in_(event_ids))
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+                pruned += len(event_ids)
+            if len(event_ids) < batch_size:
+                db.session.commit()
+                return pruned
+
+
+def start_periodic(app, name, minutes, job):
+    # minutes 마다 백그라운드에서 job() (여러 워커여도 잠금을 잡은 한 곳만 돈다)
+    def run():
+        while True:
+            time.sleep(minutes * 60)
+            with app.app_context():
+                try:
+                    job()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("%s 작업 실패", name)
+                finally:
+                    db.session.remove()
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+
+
+def _archive_job(app):
+    moved = archive_closed_orders(timedelta(hours=app.config['ARCHIVE_AFTER_HOURS']))
+    if moved:
+        logger.info("주문 %d건을 보관 테이블로 옮겼습니다.", moved)
+
+
+def _prune_job(app):
+    pruned = prune_change_events(timedelta(hours=app.config['EVENT_RETENTION_HOURS']))
+    if pruned:
+        logger.info("변경 이벤트 %d건을 지웠습니다.", pruned)
+
+
+def init_archive(app):
+    @app.cli.command('archive-orders')
+    @click.option('--hours', type=float, default=None, help="마감 후 이 시간이 지난 주문을 옮긴다")
+    def archive_orders_command(hours):
+        """마감된 오래된 주문을 보관 테이블로 옮긴다."""
+        if hours is None:
+            hours = app.config['ARCHIVE_AFTER_HOURS']
+        moved = archive_closed_orders(timedelta(hours=hours))
+        if moved is None:
+            click.echo("다른 곳에서 보관 작업 중입니다.")
+            return
+        click.echo(f"주문 {moved}건을 보관 테이블로 옮겼습니다.")
+
+    @app.cli.command('prune-events')
+    @click.option('--hours', type=float, default=None, help="이 시간보다 오래된 변경 이벤트를 지운다")
+    def prune_events_command(hours):
+        """오래된 change_events 를 지운다."""
+        if hours is None:
+            hours = app.config['EVENT_RETENTION_HOURS']
+        pruned = prune_change_events(timedelta(hours=hours))
+        if pruned is None:
+            click.echo("다른 곳에서 이벤트 정리 중입니다.")
+            return
+        click.echo(f"변경 이벤트 {pruned}건을 지웠습니다.")
+
+    if app.config.get('ARCHIVE_INTERVAL_MINUTES'):
+        start_periodic(app, 'archiver', app.config['ARCHIVE_INTERVAL_MINUTES'], lambda: _archive_job(app))
+    # 보관을 꺼 둬도 이벤트 로그는 계속 쌓이므로 따로 정리한다
+    if app.config.get('EVENT_PRUNE_INTERVAL_MINUTES'):
+        start_periodic(app, 'event-pruner', app.config['EVENT_PRUNE_INTERVAL_MINUTES'], lambda: _prune_job(app))
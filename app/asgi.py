@@ -0,0 +1,173 @@
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from app.events import bus
+from app.routes.menu import MenuOrderStream
+from app.serving_queue import QueueStream
+
+# asyncio 로 직접 처리하는 SSE 경로 (나머지는 전부 Flask 로 넘긴다)
+SSE_ROUTES = [
+    (re.compile(r'^/menu/sse/(\d+)$'), lambda m, last_id: MenuOrderStream(int(m.group(1)), last_id)),
+    (re.compile(r'^/kitchen/sse$'), lambda m, last_id: QueueStream(last_id)),
+    (re.compile(r'^/serving/sse$'), lambda m, last_id: QueueStream(last_id)),
+]
+
+SSE_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+    (b'access-control-allow-origin', b'*'),
+]
+
+
+def last_event_id(scope):
+    # Last-Event-ID 헤더, 없으면 ?last_event_id= 쿼리
+    for name, value in scope['headers']:
+        if name == b'last-event-id':
+            return value.decode('latin-1')
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    return query.get('last_event_id', [None])[0]
+
+
+class PooledWsgiInstance(WsgiToAsgiInstance):
+    """WSGI 앱을 우리 스레드 풀에서 돌리는 WsgiToAsgiInstance.
+
+    asgiref 기본값(thread_sensitive=True)은 모든 요청을 스레드 하나에서 차례로
+    돌린다. 본문 수신/environ 만들기/start_response 는 부모 것을 쓰고, 앱 실행만
+    공개 API 인 sync_to_async(thread_sensitive=False, executor=...) 로 넘긴다.
+    """
+
+    def __init__(self, wsgi_application, executor, duplicate_header_limit=100):
+        super().__init__(wsgi_application, duplicate_header_limit)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(self.run_wsgi_app_sync, thread_sensitive=False, executor=self.executor)(body)
+
+    def run_wsgi_app_sync(self, body):
+        # 풀 스레드에서 실행된다 (start_response 도 같은 스레드에서 불린다)
+        try:
+            environ = self.build_environ(self.scope, body)
+        except ValueError:
+            # 같은 헤더가 너무 많다
+            self.sync_send({
+                "type": "http.response.start", "status": 400, "headers": [(b"content-type", b"text/plain")]
+            })
+            self.sync_send({"type": "http.response.body", "body": b"Bad Request: Too many duplicate headers"})
+            return
+
+        sent = 0
+        result = self.wsgi_application(environ, self.start_response)
+        try:
+            for output in result:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                # Content-Length 보다 많이 보내지 않는다
+                if self.response_content_length is not None:
+                    output = output[:self.response_content_length - sent]
+                self.sync_send({"type": "http.response.body", "body": output, "more_body": True})
+                sent += len(output)
+                if sent == self.response_content_length:
+                    break
+        finally:
+            # WSGI 규약: 응답 객체의 close() 를 불러야 스트리밍 응답의 정리 코드가 돈다
+            if hasattr(result, 'close'):
+                result.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({"type": "http.response.body"})
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        await PooledWsgiInstance(
+            self.wsgi_application, self.executor, self.duplicate_header_limit
+        )(scope, receive, send)
+
+
+def create_asgi_app(flask_app):
+    """Flask 앱을 감싼 ASGI 앱.
+
+    SSE 연결은 이벤트 루프에서 기다리므로 연결 하나가 워커 스레드 하나를
+    붙잡지 않는다. 일반 요청과 SSE 의 DB 조회는 WSGI_THREADS 개 스레드
+    풀에서 동시에 실행한다.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=flask_app.config.get('WSGI_THREADS', 20), thread_name_prefix='wsgi'
+    )
+    wsgi_app = PooledWsgiToAsgi(flask_app, executor)
+    heartbeat = flask_app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+
+    def poll(stream):
+        # 조회가 끝나면 앱 컨텍스트가 닫히면서 세션/커넥션도 반환된다
+        with flask_app.app_context():
+            return stream.poll()
+
+    async def serve_stream(stream, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': SSE_HEADERS})
+
+        while True:
+            seen = bus.version(stream.topics)
+            chunks = await asyncio.get_running_loop().run_in_executor(executor, poll, stream)
+            for chunk in chunks:
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+            if stream.closed:
+                break
+
+            while await bus.wait_async(stream.topics, seen, timeout=heartbeat) is None:
+                await send({'type': 'http.response.body', 'body': b': keep-alive\n\n', 'more_body': True})
+
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def wait_disconnect(receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+    async def handle_stream(stream, receive, send):
+        # 폰 화면이 꺼지는 등 연결이 끊기면 바로 스트림을 정리한다
+        streaming = asyncio.ensure_future(serve_stream(stream, receive, send))
+        disconnected = asyncio.ensure_future(wait_disconnect(receive))
+        try:
+            done, _ = await asyncio.wait({streaming, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if streaming in done:
+                streaming.result()
+        finally:
+            for task in (streaming, disconnected):
+                task.cancel()
+            await asyncio.gather(streaming, disconnected, return_exceptions=True)
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def asgi_app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, factory in SSE_ROUTES:
+                match = pattern.match(scope['path'])
+                if match:
+                    return await handle_stream(factory(match, last_event_id(scope)), receive, send)
+
+        return await wsgi_app(scope, receive, send)
+
+    return asgi_app
@@ -0,0 +1,77 @@
+import hashlib
+import threading
+
+from app.events import TOPIC_MENU, TOPIC_STOCK, bus
+from app.fastjson import dumps_bytes
+from app.images import image_variants, pick_variant
+from app.models import Category, Menu, on_primary
+
+
+def build_categories(available_only=False, image=None, with_stock=True):
+    # 카테고리 1번 + 메뉴 1번 조회로 전체 트리를 만든다
+    # image=(폭, 확장자) 면 image_url 을 그 기기에 맞는 변형으로 바꾼다
+    # with_stock=False 면 주문마다 바뀌는 stock_quantity 를 뺀다
+    categories = Category.query.order_by(Category.display_order).all()
+    menus = Menu.query
+    if available_only:
+        menus = menus.filter_by(is_available=True)
+
+    menus_by_category = {}
+    for menu in menus.order_by(Menu.menu_id).all():
+        item = {
+            "menu_id": menu.menu_id,
+            "menu_name": menu.menu_name,
+            "description": menu.description,
+            "price": int(menu.price),
+            "image_url": pick_variant(menu.image_url, *image) if image else menu.image_url,
+            "image_variants": image_variants(menu.image_url),
+            "stock_quantity": menu.stock_quantity,
+            "is_available": menu.is_available
+        }
+        if not with_stock:
+            del item["stock_quantity"]
+        menus_by_category.setdefault(menu.category_id, []).append(item)
+
+    return [
+        {
+            "category_id": category.category_id,
+            "category_name": category.category_name,
+            "menus": menus_by_category.get(category.category_id, [])
+        } for category in categories
+    ]
+
+
+class CatalogCache:
+    """메뉴 카탈로그를 JSON 바이트로 캐시한다.
+
+    캐시 버전은 메뉴 토픽(TOPIC_MENU)의 버전이라서, 메뉴 정보/판매 여부가
+    바뀌면 다음 조회에서 다시 만든다. 재고 수량(stock_quantity)은 주문마다
+    바뀌므로 with_stock=True 로 달라고 한 경우에만 싣고, 그때는 재고
+    토픽(TOPIC_STOCK) 버전도 본다. 재고가 빠진 카탈로그는 주문이 들어와도
+    ETag 가 그대로다. ETag 는 내용 해시라 프로세스가 달라도 같은 메뉴면
+    같은 값이 나온다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, available_only=False, image=None, with_stock=False):
+        # (etag, JSON 바이트) 반환, image 는 build_categories 와 같다 (기기 폭 버킷이라 몇 개뿐)
+        key = (available_only, image, with_stock)
+        version = bus.version((TOPIC_MENU, TOPIC_STOCK) if with_stock else (TOPIC_MENU,))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] == version:
+            return entry[1], entry[2]
+
+        with on_primary():
+            categories = build_categories(available_only, image, with_stock)
+        body = dumps_bytes(categories)
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            self._entries[key] = (version, etag, body)
+        return etag, body
+
+
+catalog = CatalogCache()
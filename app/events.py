@@ -0,0 +1,319 @@
+import asyncio
+import json
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, func, or_
+from sqlalchemy.orm import joinedload
+
+from app.models import db, ChangeEvent, OrderDetail
+
+# 커서가 빈 id 로 기억하는 최대 개수, 그중 SSE id 에 싣는 개수
+MAX_EVENT_GAPS = 1000
+MAX_TOKEN_GAPS = 50
+# 시작 지점 아래에서 아직 커밋 안 됐을 수 있다고 보는 id 범위
+IN_FLIGHT_EVENTS = 100
+
+# 변경 알림 토픽
+TOPIC_MENU = 'menu'        # 메뉴 정보/판매 여부 변경 (카탈로그 ETag 가 바뀐다)
+TOPIC_STOCK = 'stock'      # 재고 수량 변경 (주문마다 바뀐다)
+TOPIC_ORDERS = 'orders'    # 주문 생성/상태 변경 (주방, 서빙 화면)
+
+
+def table_topic(table_id):
+    # 특정 테이블 화면만 깨우기 위한 토픽
+    return f'table:{table_id}'
+
+
+class EventBus:
+    """프로세스 내 변경 알림 버스.
+
+    토픽마다 버전 번호만 관리한다. 구독자는 마지막으로 본 버전을 들고
+    있다가 버전이 바뀔 때까지 잠들어 있으므로, 변경이 없으면 DB를 전혀
+    조회하지 않는다. relay 가 있으면 (app.fanout) 발행한 토픽을 다른 워커
+    프로세스에도 전달한다.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._versions = {}
+        self._generation = 0    # publish_all() 마다 올라간다 (모든 토픽 버전에 붙는다)
+        self._async_waiters = set()
+        self.relay = None
+
+    def version(self, topics):
+        with self._cond:
+            return self._current(topics)
+
+    def _current(self, topics):
+        return (self._generation,) + tuple(self._versions.get(t, 0) for t in topics)
+
+    def publish(self, *topics, relay=True):
+        with self._cond:
+            for topic in topics:
+                self._versions[topic] = self._versions.get(topic, 0) + 1
+        self._wake()
+        if relay and self.relay is not None:
+            self.relay(topics)
+
+    def publish_all(self):
+        # 다른 워커의 알림을 놓쳤을 수 있을 때 (팬아웃 재연결) 모든 구독자와 캐시를 한 번씩 깨운다
+        with self._cond:
+            self._generation += 1
+        self._wake()
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify_all()
+            waiters = list(self._async_waiters)
+
+        # asyncio 구독자는 자기 이벤트 루프에서 깨운다
+        for loop, waker in waiters:
+            try:
+                loop.call_soon_threadsafe(waker.set)
+            except RuntimeError:
+                # 이미 닫힌 루프
+                pass
+
+    def wait(self, topics, since, timeout=None):
+        # 버전이 바뀌면 새 버전을, 타임아웃이면 None을 반환
+        with self._cond:
+            changed = self._cond.wait_for(lambda: self._current(topics) != since, timeout=timeout)
+            if not changed:
+                return None
+            return self._current(topics)
+
+    async def wait_async(self, topics, since, timeout=None):
+        # wait() 의 asyncio 버전: 스레드를 붙잡지 않고 기다린다
+        loop = asyncio.get_running_loop()
+        waiter = (loop, asyncio.Event())
+        deadline = None if timeout is None else loop.time() + timeout
+        with self._cond:
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                current = self.version(topics)
+                if current != since:
+                    return current
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    return None
+                waiter[1].clear()
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+
+
+bus = EventBus()
+
+
+def notify(*topics):
+    # 현재 트랜잭션이 커밋된 뒤에 발행된다 (롤백되면 버려짐)
+    db.session.info.setdefault('pending_topics', set()).update(topics)
+
+
+def notify_order(table_id):
+    notify(TOPIC_ORDERS, table_topic(table_id))
+
+
+def _publish_pending(session):
+    topics = session.info.pop('pending_topics', None)
+    if topics:
+        bus.publish(*topics)
+
+
+def _discard_pending(session, previous_transaction):
+    session.info.pop('pending_topics', None)
+
+
+event.listen(db.session, 'after_commit', _publish_pending)
+event.listen(db.session, 'after_soft_rollback', _discard_pending)
+
+
+# 증분 이벤트 로그 (change_events)
+# 쓰기와 같은 트랜잭션에 기록되고, event_id 가 SSE id 로 쓰인다
+def record_event(event_type, payload, table_id=None, topic=TOPIC_MENU):
+    # 테이블 이벤트는 테이블 토픽, 모든 테이블 대상 이벤트는 topic 으로 알린다
+    db.session.add(ChangeEvent(
+        event_type=event_type,
+        table_id=table_id,
+        payload=json.dumps(payload, ensure_ascii=False)
+    ))
+    if table_id is None:
+        notify(topic)
+    else:
+        notify_order(table_id)
+
+
+def order_payload(order, details=None):
+    # details 를 넘기면 (이미 불러온 주문) 다시 조회하지 않는다
+    if details is None:
+        details = OrderDetail.query.options(
+            joinedload(OrderDetail.menu)
+        ).filter_by(order_id=order.order_id).order_by(OrderDetail.order_detail_id).all()
+    return {
+        "order_id": order.order_id,
+        "table_id": order.table_id,
+        "depositor_name": order.depositor_name,
+        "status": order.order_status,
+        "total_amount": int(order.total_amount),
+        "order_time": order.order_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "details": [
+            {
+                "order_detail_id": d.order_detail_id,
+                "menu_id": d.menu_id,
+                "menu_name": d.menu.menu_name,
+                "quantity": d.quantity,
+                "unit_price": int(d.unit_price),
+                "subtotal": int(d.subtotal),
+                "is_served": d.is_served
+            } for d in details
+        ]
+    }
+
+
+def record_order_event(event_type, order):
+    # order_created / order_amended: 주문 전체를 싣는다
+    record_event(event_type, {"order": order_payload(order)}, order.table_id)
+
+
+def record_status_event(order, details=None):
+    # 결제확인으로 바뀐 주문은 주방/서빙 화면에 새로 올라가므로 주문 전체를 싣는다
+    payload = {"order_id": order.order_id, "table_id": order.table_id, "status": order.order_status}
+    if order.order_status == '결제확인':
+        payload["order"] = order_payload(order, details)
+    record_event('order_status', payload, order.table_id)
+
+
+def record_served_event(order_id, table_id, order_detail_ids):
+    record_event('item_served', {
+        "order_id": order_id,
+        "table_id": table_id,
+        "order_detail_ids": list(order_detail_ids)
+    }, table_id)
+
+
+def record_stock_event(menu, availability_changed=False):
+    # 재고 수량만 바뀌면 재고 토픽, 판매 여부(is_available)가 바뀌었으면 메뉴 토픽도 올린다
+    record_event('stock_changed', {
+        "menu_id": menu.menu_id,
+        "stock_quantity": menu.stock_quantity,
+        "is_available": menu.is_available
+    }, topic=TOPIC_STOCK)
+    if not menu.is_available:
+        record_event('menu_sold_out', {"menu_id": menu.menu_id}, topic=TOPIC_STOCK)
+    if availability_changed:
+        notify(TOPIC_MENU)
+
+
+def record_menu_image_event(menu, variants):
+    # variants: app.images.image_variants(menu.image_url) (부르는 쪽에서 만든다)
+    record_event('menu_image_changed', {
+        "menu_id": menu.menu_id,
+        "image_url": menu.image_url,
+        "image_variants": variants
+    })
+
+
+def latest_event_id():
+    return db.session.query(func.max(ChangeEvent.event_id)).scalar() or 0
+
+
+def oldest_event_id():
+    return db.session.query(func.min(ChangeEvent.event_id)).scalar()
+
+
+class EventCursor:
+    """change_events 를 빠뜨리지 않고 읽어 나가는 커서.
+
+    event_id 는 INSERT 할 때 정해지고 커밋 순서는 트랜잭션마다 달라서,
+    큰 id 가 먼저 보이고 작은 id 가 나중에 보일 수 있다. 그래서 읽은 가장 큰
+    id(last_id) 아래에서 아직 안 보인 id 를 빈 id 로 기억해 두고
+    EVENT_GAP_GRACE_SECONDS 동안 다시 조회한다 (그 뒤에는 롤백된 id 로 본다).
+    """
+
+    def __init__(self, last_id=0, gaps=()):
+        self.last_id = last_id
+        now = time.monotonic()
+        self.gaps = {gap: now for gap in gaps if gap < last_id}  # 빈 id -> 처음 본 시각
+
+    @classmethod
+    def at_latest(cls):
+        # 지금 보이는 마지막 id 에서 시작한다, 스냅샷을 만들기 전에 불러야
+        # 스냅샷에 빠진 (아직 커밋 안 된) 변경을 나중에 받는다
+        last_id = latest_event_id()
+        low = max(last_id - IN_FLIGHT_EVENTS, 0)
+        seen = {event_id for (event_id,) in db.session.query(ChangeEvent.event_id).filter(
+            ChangeEvent.event_id > low
+        )}
+        return cls(last_id, [gap for gap in range(low + 1, last_id) if gap not in seen])
+
+    @classmethod
+    def parse(cls, token):
+        # Last-Event-ID 로 돌아온 token(), 형식이 틀리면 None
+        last_id, _, gaps = (token or '').partition(':')
+        try:
+            return cls(int(last_id), [int(gap) for gap in gaps.split(',') if gap])
+        except ValueError:
+            return None
+
+    def token(self):
+        # SSE id: "마지막 id" 또는 "마지막 id:빈 id,빈 id,..."
+        if not self.gaps:
+            return str(self.last_id)
+        return f"{self.last_id}:{','.join(map(str, sorted(self.gaps)[-MAX_TOKEN_GAPS:]))}"
+
+    def read(self, table_id=None):
+        """새로 보인 이벤트를 id 순서로 [(이벤트, 그 이벤트까지 읽은 token())] 으로 반환한다.
+
+        table_id 를 주면 해당 테이블 + 전체 대상(메뉴) 이벤트만 돌려준다.
+        """
+        criteria = ChangeEvent.event_id > self.last_id
+        if self.gaps:
+            criteria = or_(criteria, ChangeEvent.event_id.in_(self.gaps))
+        rows = db.session.query(ChangeEvent.event_id, ChangeEvent.table_id).filter(
+            criteria
+        ).order_by(ChangeEvent.event_id).all()
+
+        wanted = [event_id for event_id, event_table in rows if table_id is None or event_table in (None, table_id)]
+        events = {}
+        if wanted:
+            events = {e.event_id: e for e in ChangeEvent.query.filter(ChangeEvent.event_id.in_(wanted))}
+
+        now = time.monotonic()
+        result = []
+        for event_id, _ in rows:
+            if event_id > self.last_id:
+                for gap in range(max(self.last_id + 1, event_id - MAX_EVENT_GAPS), event_id):
+                    self.gaps[gap] = now
+                self.last_id = event_id
+            self.gaps.pop(event_id, None)
+            if event_id in events:
+                result.append((events[event_id], self.token()))
+
+        # 조회한 뒤에 지워야 유예 시간 안에 커밋된 id 를 놓치지 않는다
+        grace = current_app.config.get('EVENT_GAP_GRACE_SECONDS', 30)
+        for gap, first_seen in list(self.gaps.items()):
+            if now - first_seen > grace:
+                del self.gaps[gap]
+        while len(self.gaps) > MAX_EVENT_GAPS:
+            del self.gaps[min(self.gaps)]
+        return result
+
+
+def can_resume(last_event_id):
+    # 보관 중인 로그로 이어서 보낼 수 있는지 (아니면 스냅샷부터 다시)
+    if last_event_id is None or last_event_id > latest_event_id():
+        return False
+    oldest = oldest_event_id()
+    return oldest is None or last_event_id >= oldest - 1
+
+
+def format_event(event, event_id):
+    # event_id: EventCursor.token() (늦게 커밋된 빈 id 까지 담은 재접속 위치)
+    return f"id: {event_id}\nevent: {event.event_type}\ndata: {event.payload}\n\n"
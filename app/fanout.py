@@ -0,0 +1,165 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from app.events import bus
+
+logger = logging.getLogger(__name__)
+
+# 수신이 끊기면 이 간격(초)부터 두 배씩, 최대 RECONNECT_MAX_SECONDS 까지 기다렸다가 다시 연결한다
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30
+
+
+class UnixSocketFanout:
+    """같은 머신의 워커끼리 유닉스 데이터그램 소켓으로 토픽을 주고받는다.
+
+    워커마다 공유 디렉터리에 worker-<pid>.sock 을 만들고, 발행할 때는
+    디렉터리의 다른 소켓 전부에 보낸다. 죽은 워커의 소켓은 보낼 때 지운다.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, f"worker-{os.getpid()}.sock")
+        self._sock = None
+        self.reconnect()
+        self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._send_sock.settimeout(0.5)
+        atexit.register(self.close)
+
+    def send(self, topics):
+        message = json.dumps(list(topics)).encode('utf-8')
+        for path in glob.glob(os.path.join(self.directory, "worker-*.sock")):
+            if path == self.path:
+                continue
+            try:
+                self._send_sock.sendto(message, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # 이미 끝난 워커
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.warning("팬아웃 전송 실패 %s: %s", path, e)
+
+    def reconnect(self):
+        # 받는 소켓을 (다시) 만든다, 소켓 파일이 지워졌어도 새로 생긴다
+        if self._sock is not None:
+            self._sock.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+
+    def listen(self):
+        while True:
+            message = self._sock.recv(65536)
+            yield json.loads(message)
+
+    def close(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class RedisFanout:
+    """Redis pub/sub 채널로 토픽을 주고받는다 (여러 머신용, redis 패키지 필요)."""
+
+    def __init__(self, url, channel='order-events'):
+        import redis
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self.reconnect()
+
+    def send(self, topics):
+        message = json.dumps({"origin": self.origin, "topics": list(topics)})
+        try:
+            self._client.publish(self.channel, message)
+        except Exception as e:
+            logger.warning("팬아웃 전송 실패: %s", e)
+
+    def reconnect(self):
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self.channel)
+
+    def listen(self):
+        for message in self._pubsub.listen():
+            data = json.loads(message['data'])
+            # 자기가 보낸 건 이미 로컬에서 발행했다
+            if data["origin"] != self.origin:
+                yield data["topics"]
+
+
+_fanout = None
+_lock = threading.Lock()
+
+
+def start_fanout(url):
+    """FANOUT_URL 에 맞는 채널을 열고, 로컬 발행을 다른 워커로 전달한다.
+
+    unix:///경로/디렉터리  같은 머신의 워커끼리 (외부 서비스 없음)
+    redis://host:port/0    여러 머신 (redis 패키지 필요)
+    다른 워커에서 받은 토픽은 로컬 버스에만 발행하고 다시 전달하지 않는다.
+    """
+    global _fanout
+    with _lock:
+        if _fanout is not None:
+            return _fanout
+
+        parsed = urlparse(url)
+        if parsed.scheme == 'unix':
+            fanout = UnixSocketFanout(parsed.path)
+        elif parsed.scheme in ('redis', 'rediss'):
+            fanout = RedisFanout(url)
+        else:
+            raise ValueError(f"지원하지 않는 FANOUT_URL 입니다: {url}")
+
+        threading.Thread(target=receive, args=(fanout,), name='fanout', daemon=True).start()
+        bus.relay = fanout.send
+        _fanout = fanout
+        return fanout
+
+
+def receive(fanout):
+    """다른 워커에서 받은 토픽을 로컬 버스에 발행한다.
+
+    연결이 끊기거나 예외가 나면 로그를 남기고 점점 길게 기다렸다가 다시
+    연결한다. 끊긴 사이 알림을 놓쳤을 수 있으므로 다시 붙으면 로컬 구독자와
+    캐시를 모두 한 번 깨운다.
+    """
+    delay = RECONNECT_MIN_SECONDS
+    while True:
+        try:
+            for topics in fanout.listen():
+                delay = RECONNECT_MIN_SECONDS
+                bus.publish(*topics, relay=False)
+            logger.warning("팬아웃 수신이 끝났습니다, %.1f초 뒤 다시 연결합니다", delay)
+        except Exception:
+            logger.exception("팬아웃 수신 실패, %.1f초 뒤 다시 연결합니다", delay)
+
+        time.sleep(delay)
+        delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+        try:
+            fanout.reconnect()
+        except Exception:
+            logger.exception("팬아웃 재연결 실패")
+            continue
+        logger.info("팬아웃에 다시 연결했습니다")
+        bus.publish_all()
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    # orjson 이 없으면 표준 json 으로 동작한다
+    orjson = None
+
+# dumps_bytes 와 OrjsonProvider 가 같이 쓰는 옵션: 날짜는 orjson 기본(ISO) 대신 default 로 넘겨
+# jsonify 와 같은 http_date 로 나간다
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+
+
+# 직렬화에 걸린 시간(초)을 받는 콜백, app.metrics 가 건다 (jsonify 와 같은 요청별 직렬화 시간에 더한다)
+serialize_hook = None
+
+
+def dumps_bytes(obj):
+    # 응답 조각용 UTF-8 JSON 바이트 (한글을 \uXXXX 로 바꾸지 않는다)
+    if serialize_hook is None:
+        return _dumps_bytes(obj)
+    started = time.perf_counter()
+    try:
+        return _dumps_bytes(obj)
+    finally:
+        serialize_hook(time.perf_counter() - started)
+
+
+def _dumps_bytes(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, ensure_ascii=False, default=DefaultJSONProvider.default).encode('utf-8')
+
+
+def join_array(fragments):
+    # 이미 인코딩된 JSON 조각들을 배열 하나로 잇는다
+    return b"[" + b",".join(fragments) + b"]"
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson 으로 직렬화하는 Flask JSON 공급자.
+
+    날짜/Decimal 처리와 키 정렬은 기본 공급자와 같고, 한글은 이스케이프하지
+    않은 UTF-8 로 나간다.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = ORJSON_OPTIONS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+class FragmentCache:
+    """바뀌지 않는 객체(메뉴 항목, 끝난 주문)의 JSON 바이트를 키별로 들고 있는 LRU 캐시.
+
+    키에는 내용이 바뀌면 함께 바뀌는 값(상태, 수정 시각 등)을 넣는다.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, build):
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                return fragment
+
+        fragment = dumps_bytes(build())
+        with self._lock:
+            self._entries[key] = fragment
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return fragment
@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class _Entry:
+    def __init__(self, fingerprint, created):
+        self.fingerprint = fingerprint
+        self.created = created
+        self.response = None            # (본문, 상태 코드), 성공한 경우에만 채운다
+        self.done = threading.Event()
+
+
+class IdempotencyStore:
+    """멱등 키 -> 처음 성공한 응답을 잠깐 기억하는 저장소.
+
+    같은 키로 다시 들어온 요청은 DB 를 건드리지 않고 처음 응답을 그대로
+    돌려준다. 첫 요청이 아직 처리 중이면 끝날 때까지 기다린다. 실패한
+    응답은 기억하지 않아서 재시도하면 다시 처리된다.
+    키는 IDEMPOTENCY_TTL_SECONDS 동안, 최대 IDEMPOTENCY_MAX_KEYS 개까지
+    프로세스 메모리에 남는다.
+
+    워커 프로세스마다 따로 있는 앞단 캐시일 뿐이고, 다른 워커로 간 재시도는
+    produce() 쪽에서 DB 유일 제약으로 걸러야 한다. produce() 는
+    (본문, 상태 코드, 재사용 여부) 를 돌려준다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> _Entry (오래된 순)
+
+    def run(self, key, fingerprint, produce):
+        # (본문, 상태 코드, 재사용 여부) 반환
+        ttl = current_app.config.get('IDEMPOTENCY_TTL_SECONDS', 600)
+        max_keys = current_app.config.get('IDEMPOTENCY_MAX_KEYS', 10000)
+
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now, ttl, max_keys)
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry(fingerprint, now)
+
+        if not owner:
+            if entry.fingerprint != fingerprint:
+                return {"error": "같은 요청 키로 다른 주문이 들어왔습니다."}, 422, False
+            entry.done.wait()
+            if entry.response is not None:
+                return entry.response + (True,)
+            # 첫 요청이 실패했으면 이번 요청이 다시 처리한다
+            return self.run(key, fingerprint, produce)
+
+        body, status = None, None
+        try:
+            body, status, replayed = produce()
+            return body, status, replayed
+        finally:
+            with self._lock:
+                if status is not None and status < 300:
+                    entry.response = (body, status)
+                elif self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry.done.set()
+
+    def _expire(self, now, ttl, max_keys):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.created < ttl and len(self._entries) <= max_keys:
+                break
+            del self._entries[key]
+
+
+order_submissions = IdempotencyStore()
@@ -0,0 +1,212 @@
+import hashlib
+import io
+import os
+import re
+import threading
+
+import click
+from flask import current_app
+
+from app.workers import WorkerPool, write_atomic
+
+# 변환 설정 (바꾸면 VERSION 을 올려서 새 파일 이름을 쓰게 한다)
+VERSION = 1
+FORMATS = {'webp': ('WEBP', 75), 'jpg': ('JPEG', 80)}  # 확장자: (Pillow 형식, 품질)
+ORIGINAL_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+# /images/<원본 해시>.<확장자> 인 메뉴 이미지만 변형을 만든다
+ORIGINAL_URL = re.compile(r'^/images/([0-9a-f]{20})\.(jpg|png|webp|gif)$')
+FILE_NAME = re.compile(r'^([0-9a-f]{20})(?:-(\d+)-v(\d+))?\.(jpg|png|webp|gif)$')
+
+
+def render_variants(data, digest, widths, directory):
+    # 워커 프로세스에서 실행된다 (Pillow 필요), 폭/형식별 파일을 직접 쓴다
+    from PIL import Image, ImageOps
+
+    source = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    if source.mode not in ('RGB', 'RGBA'):
+        source = source.convert('RGBA' if 'transparency' in source.info else 'RGB')
+
+    for width in widths:
+        image = source
+        if source.width > width:
+            # 원본보다 큰 폭은 키우지 않고 원본 크기로 다시 압축만 한다
+            image = source.resize((width, round(source.height * width / source.width)), Image.LANCZOS)
+        for ext, (fmt, quality) in FORMATS.items():
+            frame, options = image, {'quality': quality, 'optimize': True}
+            if fmt == 'JPEG':
+                # JPEG 는 투명도가 없다
+                frame, options['progressive'] = image.convert('RGB'), True
+            buffer = io.BytesIO()
+            frame.save(buffer, format=fmt, **options)
+            write_atomic(os.path.join(directory, variant_name(digest, width, ext)), buffer.getvalue())
+
+
+def inspect_original(data):
+    # 업로드한 파일이 이미지인지 확인하고 확장자를 정한다
+    # 헤더만 맞고 잘린 파일/픽셀이 너무 많은 파일은 변형을 못 만드므로 끝까지 디코딩해 본다
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.verify()
+        Image.open(io.BytesIO(data)).load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+        return None
+    return ORIGINAL_EXTENSIONS.get(image.format)
+
+
+def variant_name(digest, width, ext):
+    return f"{digest}-{width}-v{VERSION}.{ext}"
+
+
+def widths():
+    return current_app.config['IMAGE_WIDTHS']
+
+
+def image_variants(image_url):
+    # 카탈로그에 싣는 폭별 URL 목록, 내용 주소 이미지가 아니면 None
+    match = ORIGINAL_URL.match(image_url or '')
+    if not match:
+        return None
+    digest = match.group(1)
+    return [
+        dict({"width": width}, **{ext: f"/images/{variant_name(digest, width, ext)}" for ext in FORMATS})
+        for width in widths()
+    ]
+
+
+def width_bucket(width):
+    # 기기 폭(px) 이상인 가장 작은 변형 폭 (없으면 가장 큰 폭)
+    for bucket in widths():
+        if bucket >= width:
+            return bucket
+    return widths()[-1]
+
+
+def pick_variant(image_url, width, ext):
+    # width 는 width_bucket() 값, 내용 주소 이미지가 아니면 그대로
+    match = ORIGINAL_URL.match(image_url or '')
+    if not match:
+        return image_url
+    return f"/images/{variant_name(match.group(1), width, ext)}"
+
+
+class ImageService:
+    """메뉴 이미지 원본을 내용 해시 이름으로 보관하고 폭별 변형을 워커 프로세스 풀에서 만든다.
+
+    업로드하면 바로 백그라운드로 변형을 만들고, 아직 없는 변형을 요청받으면
+    그 자리에서 만든다. 같은 원본을 동시에 요청해도 한 번만 그린다.
+    """
+
+    def __init__(self):
+        self.pool = WorkerPool('IMAGE_WORKERS')
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def path_of(self, name):
+        return os.path.join(current_app.config['IMAGE_DIR'], name)
+
+    def original_of(self, digest):
+        for ext in ORIGINAL_EXTENSIONS.values():
+            if os.path.exists(self.path_of(f"{digest}.{ext}")):
+                return f"{digest}.{ext}"
+        return None
+
+    def store(self, data):
+        """원본을 저장하고 변형 생성을 백그라운드로 시작한다. 이미지 URL 을 반환한다.
+
+        이미지가 아니면 ValueError, Pillow 가 없으면 ImportError.
+        """
+        ext = inspect_original(data)
+        if ext is None:
+            raise ValueError("이미지 파일이 아닙니다.")
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        os.makedirs(current_app.config['IMAGE_DIR'], exist_ok=True)
+        if not os.path.exists(self.path_of(f"{digest}.{ext}")):
+            write_atomic(self.path_of(f"{digest}.{ext}"), data)
+        self.submit(digest)
+        return f"/images/{digest}.{ext}"
+
+    def submit(self, digest):
+        # 없는 변형을 그리는 작업 (이미 진행 중이면 그 작업), 다 있으면 None
+        with self._lock:
+            future = self._pending.get(digest)
+        if future is not None:
+            return future
+
+        original = self.original_of(digest)
+        if original is None:
+            return None
+        missing = [
+            width for width in widths()
+            if not all(os.path.exists(self.path_of(variant_name(digest, width, ext))) for ext in FORMATS)
+        ]
+        if not missing:
+            return None
+
+        with open(self.path_of(original), 'rb') as f:
+            data = f.read()
+        executor = self.pool.executor()
+        with self._lock:
+            future = self._pending.get(digest)
+            started = future is None
+            if started:
+                future = executor.submit(
+                    render_variants, data, digest, missing, current_app.config['IMAGE_DIR']
+                )
+                self._pending[digest] = future
+        # 이미 끝난 작업이면 콜백이 이 스레드에서 바로 불리므로 잠금 밖에서 건다
+        if started:
+            future.add_done_callback(lambda _: self._done(digest))
+        return future
+
+    def ensure(self, digest):
+        # 변형이 모두 디스크에 있을 때까지 기다린다, 원본을 디코딩할 수 없으면 ValueError
+        future = self.submit(digest)
+        if future is None:
+            return
+        try:
+            future.result()
+        except ImportError:
+            raise
+        except Exception as e:
+            raise ValueError("이미지를 변환할 수 없습니다.") from e
+
+    def _done(self, digest):
+        with self._lock:
+            self._pending.pop(digest, None)
+
+
+image_service = ImageService()
+
+
+def init_images(app):
+    @app.cli.command('build-menu-images')
+    def build_menu_images_command():
+        """static 아래 기존 메뉴 이미지를 내용 주소 이미지로 옮기고 변형을 만든다."""
+        from app.events import record_menu_image_event
+        from app.models import db, Menu
+
+        converted = 0
+        for menu in Menu.query.filter(Menu.image_url.isnot(None)):
+            match = ORIGINAL_URL.match(menu.image_url)
+            path = os.path.join(app.root_path, '..', menu.image_url.lstrip('/'))
+            if not match and (not menu.image_url.startswith('/static/') or not os.path.isfile(path)):
+                click.echo(f"{menu.menu_id}번 메뉴 이미지를 건너뜁니다: {menu.image_url}")
+                continue
+            try:
+                if match:
+                    image_service.ensure(match.group(1))
+                    continue
+                with open(path, 'rb') as f:
+                    image_url = image_service.store(f.read())
+                image_service.ensure(ORIGINAL_URL.match(image_url).group(1))
+            except ValueError as e:
+                click.echo(f"{menu.menu_id}번 메뉴 이미지를 건너뜁니다 ({e}): {menu.image_url}")
+                continue
+            menu.image_url = image_url
+            record_menu_image_event(menu, image_variants(menu.image_url))
+            converted += 1
+        db.session.commit()
+        click.echo(f"메뉴 이미지 {converted}개를 변환했습니다.")
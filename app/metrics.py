@@ -0,0 +1,163 @@
+import bisect
+import heapq
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import fastjson
+
+# 요청 하나의 시간(초) 구간
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+# 느린 요청 로그에 싣는 SQL 한 문장의 최대 길이 (IN 목록이 긴 문장)
+MAX_STATEMENT_CHARS = 1000
+
+
+class Histogram:
+    """엔드포인트별 Prometheus 히스토그램."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}   # endpoint -> [버킷별 개수..., 합계, 전체 개수]
+
+    def observe(self, endpoint, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(endpoint, [0] * (len(self.buckets) + 2))
+            for i in range(index, len(self.buckets)):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            for endpoint, series in items:
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {series[-1]}')
+                lines.append(f'{self.name}_sum{{endpoint="{endpoint}"}} {series[-2]}')
+                lines.append(f'{self.name}_count{{endpoint="{endpoint}"}} {series[-1]}')
+        return lines
+
+
+REQUEST_TIME = Histogram('http_request_duration_seconds', '요청 처리 시간', TIME_BUCKETS)
+DB_QUERIES = Histogram('db_queries_per_request', '요청당 DB 쿼리 수', QUERY_BUCKETS)
+DB_TIME = Histogram('db_time_seconds', '요청당 DB 쿼리 시간 합계', TIME_BUCKETS)
+SERIALIZE_TIME = Histogram('json_serialization_seconds', '요청당 JSON 직렬화 시간', TIME_BUCKETS)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', '응답 크기 (스트리밍 응답 제외)', SIZE_BUCKETS)
+
+HISTOGRAMS = (REQUEST_TIME, DB_QUERIES, DB_TIME, SERIALIZE_TIME, RESPONSE_SIZE)
+
+
+def _request_stats():
+    if has_request_context():
+        return g.get('request_stats')
+    return None
+
+
+def _add_serialize_time(elapsed):
+    stats = _request_stats()
+    if stats is not None:
+        stats['serialize_time'] += elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 실행마다 새로 생기는 context 에 둔다 (실패한 문장이 커넥션에 값을 남기지 않는다)
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = _request_stats()
+    if stats is not None:
+        stats['queries'] += 1
+        stats['db_time'] += elapsed
+        # 가장 느린 몇 개만 남긴다 (쿼리가 많은 요청도 메모리/로그가 늘지 않게)
+        statements = stats['statements']
+        if len(statements) < stats['max_statements']:
+            heapq.heappush(statements, (elapsed, statement))
+        elif statements and elapsed > statements[0][0]:
+            heapq.heapreplace(statements, (elapsed, statement))
+
+
+def init_metrics(app):
+    """요청별 쿼리 수/DB 시간/직렬화 시간/응답 크기를 모으고 /metrics 로 내보낸다.
+
+    SLOW_REQUEST_MS 보다 오래 걸린 요청은 가장 느린 SQL (SLOW_REQUEST_MAX_STATEMENTS 개)
+    과 함께 경고 로그를 남긴다. 값은 프로세스별로 모인다.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    # jsonify 가 쓰는 JSON 공급자의 dumps 와 미리 인코딩하는 dumps_bytes 시간을 잰다
+    dumps = app.json.dumps
+
+    def timed_dumps(obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return dumps(obj, **kwargs)
+        finally:
+            _add_serialize_time(time.perf_counter() - started)
+
+    app.json.dumps = timed_dumps
+    fastjson.serialize_hook = _add_serialize_time
+
+    @app.before_request
+    def start_request_stats():
+        g.request_stats = {
+            'started': time.perf_counter(),
+            'queries': 0,
+            'db_time': 0.0,
+            'serialize_time': 0.0,
+            'statements': [],       # (걸린 시간, SQL) 힙
+            'max_statements': app.config.get('SLOW_REQUEST_MAX_STATEMENTS', 10)
+        }
+
+    @app.after_request
+    def record_request_stats(response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+
+        endpoint = request.endpoint or 'unknown'
+        elapsed = time.perf_counter() - stats['started']
+        REQUEST_TIME.observe(endpoint, elapsed)
+        DB_QUERIES.observe(endpoint, stats['queries'])
+        DB_TIME.observe(endpoint, stats['db_time'])
+        SERIALIZE_TIME.observe(endpoint, stats['serialize_time'])
+        if not response.is_streamed:
+            RESPONSE_SIZE.observe(endpoint, response.calculate_content_length() or 0)
+
+        threshold = app.config.get('SLOW_REQUEST_MS')
+        if threshold is not None and elapsed * 1000 >= threshold:
+            statements = "\n".join(
+                f"  [{took * 1000:.1f}ms] {statement[:MAX_STATEMENT_CHARS]}"
+                for took, statement in sorted(stats['statements'], reverse=True)
+            )
+            app.logger.warning(
+                "느린 요청 %s %s: %.1fms, 쿼리 %d개 (DB %.1fms), 느린 SQL:\n%s",
+                request.method, request.path, elapsed * 1000,
+                stats['queries'], stats['db_time'] * 1000, statements
+            )
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        lines = []
+        for histogram in HISTOGRAMS:
+            lines.extend(histogram.render())
+        return Response("\n".join(lines) + "\n", mimetype='text/plain; version=0.0.4')
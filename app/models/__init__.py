@@ -1,6 +1,45 @@
+from contextlib import contextmanager
+from functools import wraps
+
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    """use_replica 가 켜진 세션의 조회만 읽기 복제본(binds 'replica')으로 보낸다.
+
+    flush 로 나가는 쓰기와, 복제본이 설정되지 않은 경우는 항상 기본 DB 를 쓴다.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('use_replica') and not self._flushing:
+            replica = self._db.engines.get('replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def read_replica(view):
+    # 조회 전용 엔드포인트에만 붙인다 (쓰기 직후 같은 요청에서 다시 읽는 곳에는 쓰지 말 것)
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        db.session.info['use_replica'] = True
+        return view(*args, **kwargs)
+    return wrapper
 
-db = SQLAlchemy()
+
+@contextmanager
+def on_primary():
+    # 버전 번호로 캐시하는 곳은 복제 지연 때문에 옛 데이터를 새 버전으로 저장하지 않도록 기본 DB 에서 읽는다
+    previous = db.session.info.pop('use_replica', None)
+    try:
+        yield
+    finally:
+        if previous is not None:
+            db.session.info['use_replica'] = previous
 
 class Category(db.Model):
     __tablename__ = 'categories'
@@ -32,14 +71,39 @@ class StoreTable(db.Model):
     __tablename__ = 'store_tables'
     table_id = db.Column(db.Integer, primary_key=True)
     is_occupied = db.Column(db.Boolean, default=False)
+    # 지금 앉아 있는 손님의 세션 (첫 주문에 열고 테이블 정리에서 닫는다, 비어 있으면 NULL)
+    current_session_id = db.Column(
+        db.Integer,
+        db.ForeignKey('table_sessions.session_id', use_alter=True, name='fk_store_tables_current_session')
+    )
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
 
+class TableSession(db.Model):
+    __tablename__ = 'table_sessions'
+    __table_args__ = (
+        db.Index('ix_table_sessions_table_opened', 'table_id', 'opened_at'),
+    )
+    session_id = db.Column(db.Integer, primary_key=True)
+    table_id = db.Column(db.Integer, db.ForeignKey('store_tables.table_id'), nullable=False)
+    opened_at = db.Column(db.DateTime, server_default=db.func.now())
+    closed_at = db.Column(db.DateTime)
+
+
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_table_created', 'table_id', 'created_at'),
+        db.Index('ix_orders_status_order', 'order_status', 'order_id'),
+        db.Index('ix_orders_status_created', 'order_status', 'created_at'),
+        db.Index('ix_orders_created_order', 'created_at', 'order_id'),
+        db.Index('ix_orders_session_created', 'session_id', 'created_at'),
+        db.UniqueConstraint('table_id', 'idempotency_key', name='uq_orders_table_idempotency'),
+    )
     order_id = db.Column(db.Integer, primary_key=True)
     table_id = db.Column(db.Integer, db.ForeignKey('store_tables.table_id'))
+    session_id = db.Column(db.Integer, db.ForeignKey('table_sessions.session_id'))
     depositor_name = db.Column(db.String(50), nullable=False)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False, default=0)
     order_status = db.Column(db.Enum('결제대기', '결제확인', '완료', '취소'), default='결제대기')
@@ -47,12 +111,16 @@ class Order(db.Model):
     order_number = db.Column(db.String(10))
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+    idempotency_key = db.Column(db.String(128))  # 주문 제출 요청 키 (테이블마다 유일)
 
     table = db.relationship('StoreTable', backref='orders')
 
 
 class OrderDetail(db.Model):
     __tablename__ = 'order_details'
+    __table_args__ = (
+        db.Index('ix_order_details_order_served', 'order_id', 'is_served'),
+    )
     order_detail_id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.order_id'), nullable=False)
     menu_id = db.Column(db.Integer, db.ForeignKey('menus.menu_id'), nullable=False)
@@ -62,7 +130,7 @@ class OrderDetail(db.Model):
     is_served = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
-    order = db.relationship('Order', backref='order_details')
+    order = db.relationship('Order', backref=db.backref('order_details', order_by='OrderDetail.order_detail_id'))
     menu = db.relationship('Menu', backref='order_details')
 
 
@@ -90,4 +158,93 @@ class QRCode(db.Model):
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
-    table = db.relationship('StoreTable', backref='qr_code')
\ No newline at end of file
+    table = db.relationship('StoreTable', backref='qr_code')
+
+class ChangeEvent(db.Model):
+    __tablename__ = 'change_events'
+    __table_args__ = (
+        db.Index('ix_change_events_table_event', 'table_id', 'event_id'),
+    )
+    event_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    event_type = db.Column(db.String(30), nullable=False)
+    table_id = db.Column(db.Integer)  # NULL 이면 모든 테이블 대상 (메뉴 변경 등)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+
+# 보관 테이블: 마감(완료/취소)된 지 오래된 주문을 옮겨 둔다 (app/archive.py)
+# 컬럼은 원본과 같고, 옮긴 시각(archived_at)만 더 있다
+class ArchivedOrder(db.Model):
+    __tablename__ = 'orders_archive'
+    __table_args__ = (
+        db.Index('ix_orders_archive_created_order', 'created_at', 'order_id'),
+        db.Index('ix_orders_archive_table_created', 'table_id', 'created_at'),
+    )
+    order_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    table_id = db.Column(db.Integer)
+    session_id = db.Column(db.Integer)
+    depositor_name = db.Column(db.String(50), nullable=False)
+    total_amount = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+    order_status = db.Column(db.Enum('결제대기', '결제확인', '완료', '취소'))
+    order_time = db.Column(db.DateTime)
+    order_number = db.Column(db.String(10))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    idempotency_key = db.Column(db.String(128))
+    archived_at = db.Column(db.DateTime, server_default=db.func.now())
+
+
+class ArchivedOrderDetail(db.Model):
+    __tablename__ = 'order_details_archive'
+    __table_args__ = (
+        db.Index('ix_order_details_archive_order', 'order_id'),
+    )
+    order_detail_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, nullable=False)
+    menu_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, default=1)
+    unit_price = db.Column(db.Numeric(10, 2), nullable=False)
+    subtotal = db.Column(db.Numeric(10, 2), nullable=False)
+    is_served = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+
+
+class ArchivedPayment(db.Model):
+    __tablename__ = 'payments_archive'
+    __table_args__ = (
+        db.Index('ix_payments_archive_order', 'order_id'),
+    )
+    payment_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    payment_status = db.Column(db.Enum('대기중', '완료', '환불', '취소'))
+    is_verified = db.Column(db.Boolean, default=False)
+    payment_method = db.Column(db.Enum('계좌이체', '기타'))
+    check_time = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+
+
+# 매출 집계 테이블: 주문을 쓰는 트랜잭션 안에서 같이 더한다 (app/rollups.py)
+class MenuSalesHourly(db.Model):
+    __tablename__ = 'menu_sales_hourly'
+    menu_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    hour = db.Column(db.DateTime, primary_key=True)     # 주문 시각을 시 단위로 자른 값
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+
+class TableSessionSales(db.Model):
+    __tablename__ = 'table_session_sales'
+    session_id = db.Column(db.Integer, primary_key=True, autoincrement=False)   # table_sessions
+    table_id = db.Column(db.Integer, nullable=False)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+
+class OrderStatusDaily(db.Model):
+    __tablename__ = 'order_status_daily'
+    day = db.Column(db.Date, primary_key=True)
+    order_status = db.Column(db.Enum('결제대기', '결제확인', '완료', '취소'), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
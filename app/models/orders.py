@@ -0,0 +1,376 @@
+from collections import Counter
+
+from sqlalchemy import and_, case, insert, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.events import record_order_event, record_served_event, record_status_event, record_stock_event
+from app.models import db, Menu, Order, OrderDetail, StoreTable, TableSession
+from app.rollups import (
+    order_lines, rollup_order_amended, rollup_order_created, rollup_status_changed, rollup_statuses_changed
+)
+
+
+class OrderError(Exception):
+    # 라우트에서 잡아서 {"error": message}, status_code 로 응답한다
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def parse_items(items):
+    # [{"menu_id", "quantity"}] -> [(menu_id, quantity)]
+    lines = []
+    try:
+        for item in items:
+            lines.append((int(item['menu_id']), int(item['quantity'])))
+    except (KeyError, TypeError, ValueError):
+        raise OrderError("주문 항목 형식이 올바르지 않습니다.")
+    for menu_id, quantity in lines:
+        if quantity < 1:
+            raise OrderError(f"{menu_id}번 메뉴의 수량이 올바르지 않습니다.")
+    return lines
+
+
+def quantities_of(lines):
+    counter = Counter()
+    for menu_id, quantity in lines:
+        counter[menu_id] += quantity
+    return counter
+
+
+def load_menus(menu_ids):
+    # 주문에 들어간 메뉴를 쿼리 한 번으로
+    menu_ids = set(menu_ids)
+    if not menu_ids:
+        return {}
+    return {m.menu_id: m for m in Menu.query.filter(Menu.menu_id.in_(menu_ids)).all()}
+
+
+def add_details(order_id, lines, menus):
+    # 상세 행을 INSERT 한 번(executemany)으로 넣고 합계를 반환
+    rows = []
+    total = 0
+    for menu_id, quantity in lines:
+        menu = menus[menu_id]
+        unit_price = int(menu.price)
+        subtotal = quantity * unit_price
+        rows.append({
+            "order_id": order_id,
+            "menu_id": menu.menu_id,
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "subtotal": subtotal
+        })
+        total += subtotal
+    if rows:
+        db.session.execute(insert(OrderDetail), rows)
+    return total
+
+
+def open_session(table):
+    # 테이블의 현재 세션 (손님이 처음 주문할 때 연다), session_id 를 반환
+    if table.current_session_id is None:
+        session = TableSession(table_id=table.table_id)
+        db.session.add(session)
+        db.session.flush()
+        # 같은 테이블 첫 주문이 동시에 들어와도 세션은 하나만 걸리도록 비어 있을 때만 건다
+        claimed = db.session.execute(
+            update(StoreTable)
+            .where(StoreTable.table_id == table.table_id, StoreTable.current_session_id.is_(None))
+            .values(current_session_id=session.session_id, is_occupied=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            set_committed_value(table, 'current_session_id', session.session_id)
+            set_committed_value(table, 'is_occupied', True)
+            return session.session_id
+
+        # 다른 주문이 먼저 열었다, 만든 세션은 버리고 그 세션을 쓴다 (잠금 읽기라야 커밋된 값이 보인다)
+        db.session.delete(session)
+        db.session.refresh(table, with_for_update=True)
+        return open_session(table)
+    if not table.is_occupied:
+        table.is_occupied = True
+    return table.current_session_id
+
+
+def close_session(table):
+    # 테이블 정리: 현재 세션을 닫는다 (이후 주문은 새 세션으로 들어간다)
+    if table.current_session_id is not None:
+        TableSession.query.filter_by(session_id=table.current_session_id).update(
+            {TableSession.closed_at: db.func.now()}, synchronize_session=False
+        )
+        table.current_session_id = None
+    table.is_occupied = False
+
+
+def place_order(table, depositor, lines, menus, status, idempotency_key=None):
+    """주문과 상세를 만들고 order_created 이벤트를 남긴다. 재고는 건드리지 않는다.
+
+    주문할 수 없는 메뉴가 있으면 OrderError (호출한 쪽에서 롤백).
+    같은 테이블에 같은 idempotency_key 주문이 있으면 flush 에서 IntegrityError.
+    """
+    for menu_id, _ in lines:
+        menu = menus.get(menu_id)
+        if not menu or not menu.is_available:
+            raise OrderError(f"{menu_id}번 메뉴는 주문할 수 없습니다.")
+
+    order = Order(
+        table_id=table.table_id,
+        session_id=open_session(table),
+        depositor_name=depositor,
+        total_amount=0,
+        order_status=status,
+        idempotency_key=idempotency_key
+    )
+    db.session.add(order)
+    db.session.flush()
+
+    order.total_amount = add_details(order.order_id, lines, menus)
+    rollup_order_created(order)
+    record_order_event('order_created', order)
+    return order
+
+
+def submitted_order(table_id, idempotency_key, depositor, lines):
+    """같은 테이블/요청 키로 이미 들어간 주문 (없으면 None).
+
+    내용이 다른 주문이면 OrderError(422).
+    """
+    order = Order.query.filter_by(table_id=table_id, idempotency_key=idempotency_key).first()
+    if order is None:
+        return None
+    details = OrderDetail.query.filter_by(order_id=order.order_id)
+    if order.depositor_name != depositor or \
+            quantities_of((d.menu_id, d.quantity) for d in details) != quantities_of(lines):
+        raise OrderError("같은 요청 키로 다른 주문이 들어왔습니다.", 422)
+    return order
+
+
+def amend_order(order, lines, menus):
+    """주문 상세를 통째로 바꾸고 order_amended 이벤트를 남긴다.
+
+    재고에 반영할 (추가로 차감할 수량, 돌려줄 수량) 을 반환한다.
+    이미 취소된 주문은 재고를 돌려받은 상태라 둘 다 비어 있다.
+    """
+    for menu_id, _ in lines:
+        if menu_id not in menus:
+            raise OrderError(f"{menu_id}번 메뉴가 없습니다.")
+
+    before = order_lines(order.order_id)
+    before_total = order.total_amount
+    previous = Counter({menu_id: quantity for menu_id, (quantity, _) in before.items()})
+
+    # 기존 상세 삭제 후 다시 추가
+    OrderDetail.query.filter_by(order_id=order.order_id).delete(synchronize_session=False)
+    order.total_amount = add_details(order.order_id, lines, menus)
+    rollup_order_amended(order, before, before_total)
+    record_order_event('order_amended', order)
+
+    if order.order_status == "취소":
+        return Counter(), Counter()
+    current = quantities_of(lines)
+    return current - previous, previous - current
+
+
+def change_status(order, status):
+    # 상태를 바꾸고 매출 집계와 order_status 이벤트를 같은 트랜잭션에 남긴다
+    previous = order.order_status
+    order.order_status = status
+    rollup_status_changed(order, previous)
+    record_status_event(order)
+
+
+def change_status_and_stock(order, status):
+    """change_status() 에 더해 취소면 재고를 돌려주고, 취소에서 되살리면 다시 차감한다.
+
+    되살릴 재고가 모자라면 OrderError(409) (호출한 쪽에서 롤백).
+    """
+    cancelling = status == '취소' and order.order_status != '취소'
+    restoring = order.order_status == '취소' and status != '취소'
+    if cancelling or restoring:
+        quantities = quantities_of(
+            (d.menu_id, d.quantity) for d in OrderDetail.query.filter_by(order_id=order.order_id)
+        )
+        if cancelling:
+            settle_stock(Counter(), quantities, {})
+        else:
+            settle_stock(quantities, Counter(), load_menus(quantities))
+    change_status(order, status)
+
+
+def confirm_orders(orders):
+    """결제대기 주문들을 UPDATE 한 번으로 결제확인 처리한다 (상세를 미리 불러온 주문).
+
+    그 사이 다른 곳에서 상태가 바뀐 주문이 있으면 OrderError(409) (호출한 쪽에서 롤백).
+    """
+    order_ids = [order.order_id for order in orders]
+    result = db.session.execute(
+        update(Order)
+        .where(Order.order_id.in_(order_ids), Order.order_status == '결제대기')
+        .values(order_status='결제확인')
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(order_ids):
+        raise OrderError("처리하는 사이 상태가 바뀐 주문이 있습니다. 다시 시도해 주세요.", 409)
+
+    for order in orders:
+        set_committed_value(order, 'order_status', '결제확인')
+        record_status_event(order, sorted(order.order_details, key=lambda d: d.order_detail_id))
+    rollup_statuses_changed(orders, '결제대기')
+
+
+def serve_details(order_detail_ids):
+    """주문 상세들을 서빙 완료로 바꾸고, 모두 서빙된 주문은 같은 트랜잭션에서 완료 처리한다.
+
+    문장 하나가 아니라 트랜잭션 하나다: 항목 조회(주문 행 잠금) 1번, 항목 UPDATE 1번,
+    주문 조건부 UPDATE 1번 (일부만 완료되면 확인 조회 1번), 그리고 이벤트/집계 기록.
+    MySQL 은 UPDATE 하는 테이블을 같은 문장의 서브쿼리에서 읽을 수 없어서 "이번에 서빙해서
+    남은 항목이 없어진 주문" 을 항목 UPDATE 와 한 문장으로 판정할 수 없고, 이벤트와 집계도
+    같은 커밋에 남아야 한다. 커밋은 호출한 쪽에서 한 번만 한다.
+    (찾은 상세 id -> 주문, 이번에 완료된 주문 목록) 을 반환한다.
+    """
+    # 주문 행을 먼저 잠가서 같은 주문의 마지막 항목을 동시에 눌러도 완료 판정이 엇갈리지 않는다
+    rows = db.session.query(OrderDetail.order_detail_id, OrderDetail.is_served, Order).join(
+        Order, Order.order_id == OrderDetail.order_id
+    ).filter(
+        OrderDetail.order_detail_id.in_(order_detail_ids)
+    ).order_by(Order.order_id).with_for_update().populate_existing().all()
+
+    found = {detail_id: order for detail_id, _, order in rows}
+    served = {}
+    for detail_id, is_served, order in rows:
+        if not is_served:
+            served.setdefault(order, []).append(detail_id)
+    if not served:
+        return found, []
+
+    db.session.execute(
+        update(OrderDetail)
+        .where(OrderDetail.order_detail_id.in_([i for ids in served.values() for i in ids]))
+        .values(is_served=True)
+        .execution_options(synchronize_session=False)
+    )
+    for order, detail_ids in served.items():
+        record_served_event(order.order_id, order.table_id, detail_ids)
+
+    # 남은 항목이 없는 주문만 완료 (취소된 주문은 그대로 둔다)
+    candidates = {order.order_id: order for order in served if order.order_status not in ('완료', '취소')}
+    if not candidates:
+        return found, []
+    unserved = select(OrderDetail.order_detail_id).where(
+        OrderDetail.order_id == Order.order_id, OrderDetail.is_served.is_(False)
+    )
+    result = db.session.execute(
+        update(Order)
+        .where(
+            Order.order_id.in_(list(candidates)),
+            Order.order_status.notin_(('완료', '취소')),
+            ~unserved.exists()
+        )
+        .values(order_status='완료')
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        return found, []
+
+    completed_ids = [
+        order_id for (order_id,) in db.session.query(Order.order_id).filter(
+            Order.order_id.in_(list(candidates)), Order.order_status == '완료'
+        )
+    ] if result.rowcount < len(candidates) else list(candidates)
+
+    completed = []
+    previous = {}
+    for order_id in completed_ids:
+        order = candidates[order_id]
+        previous.setdefault(order.order_status, []).append(order)
+        set_committed_value(order, 'order_status', '완료')
+        record_status_event(order)
+        completed.append(order)
+    for status, orders in previous.items():
+        rollup_statuses_changed(orders, status)
+    return found, completed
+
+
+def settle_stock(reserve, release, menus):
+    # 차감/반환을 각각 UPDATE 한 번으로 처리하고 stock_changed 이벤트를 남긴다
+    # 차감해서 0 이 되면 내려가고, 0 이하에서 돌려받아 0 을 넘으면 다시 올라간다
+    for menu in reserve_stock(reserve, menus):
+        record_stock_event(menu, availability_changed=menu.stock_quantity <= 0)
+    for menu in release_stock(release):
+        record_stock_event(menu, availability_changed=menu.stock_quantity - release[menu.menu_id] <= 0)
+
+
+def _reload(menu_ids):
+    return Menu.query.filter(Menu.menu_id.in_(menu_ids)).populate_existing().all()
+
+
+def reserve_stock(quantities, menus):
+    """재고를 관리하는 메뉴(stock_quantity 가 NULL 이 아님)의 재고를 차감한다.
+
+    조건부 UPDATE 한 번으로 모든 메뉴를 차감하고, 하나라도 재고가 모자라면
+    OrderError(409) 를 던진다. 호출한 쪽에서 롤백해야 한다. 차감된 행은
+    커밋까지 잠겨 있으므로 동시에 들어온 주문이 같은 재고를 두 번 쓰지 않는다.
+    재고가 0 이 되면 is_available 도 함께 내린다. 변경된 메뉴 목록을 반환한다.
+    """
+    need = {
+        menu_id: quantity for menu_id, quantity in quantities.items()
+        if quantity > 0 and menus[menu_id].stock_quantity is not None
+    }
+    if not need:
+        return []
+
+    required = case(need, value=Menu.menu_id)
+    stmt = (
+        update(Menu)
+        .where(
+            Menu.menu_id.in_(list(need)),
+            Menu.is_available.is_(True),
+            Menu.stock_quantity >= required
+        )
+        # MySQL 은 SET 을 왼쪽부터 적용하므로 is_available 을 먼저 계산한다
+        .ordered_values(
+            (Menu.is_available, case((Menu.stock_quantity - required <= 0, False), else_=Menu.is_available)),
+            (Menu.stock_quantity, Menu.stock_quantity - required)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = db.session.execute(stmt)
+
+    if result.rowcount != len(need):
+        short = [
+            m.menu_id for m in _reload(list(need))
+            if not m.is_available or m.stock_quantity < need[m.menu_id]
+        ]
+        if short:
+            raise OrderError(f"{short[0]}번 메뉴의 재고가 부족합니다.", 409)
+        raise OrderError("재고가 부족합니다.", 409)
+
+    return _reload(list(need))
+
+
+def release_stock(quantities):
+    # 취소/수정으로 돌려받는 재고 (재고를 관리하는 메뉴만)
+    # 재고가 0 이라 내려간 메뉴는 재고가 다시 생기면 is_available 도 되살린다 (수동 품절은 재고가 남아 있어 그대로)
+    give_back = {menu_id: quantity for menu_id, quantity in quantities.items() if quantity > 0}
+    if not give_back:
+        return []
+
+    returned = case(give_back, value=Menu.menu_id)
+    stmt = (
+        update(Menu)
+        .where(Menu.menu_id.in_(list(give_back)), Menu.stock_quantity.isnot(None))
+        # MySQL 은 SET 을 왼쪽부터 적용하므로 is_available 을 먼저 계산한다
+        .ordered_values(
+            (Menu.is_available, case(
+                (and_(Menu.stock_quantity <= 0, Menu.stock_quantity + returned > 0), True),
+                else_=Menu.is_available
+            )),
+            (Menu.stock_quantity, Menu.stock_quantity + returned)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(stmt)
+    return [m for m in _reload(list(give_back)) if m.stock_quantity is not None]
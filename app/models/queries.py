@@ -0,0 +1,162 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, case, func, literal, or_, select, union_all
+from sqlalchemy.orm import aliased, selectinload
+
+from app.models import db, ArchivedOrder, ArchivedOrderDetail, Order, OrderDetail, StoreTable
+
+
+# 주문 목록 + 상세 + 메뉴 이름을 주문 수와 상관없이 쿼리 2번으로 불러온다
+def with_details(query):
+    return query.options(
+        selectinload(Order.order_details).joinedload(OrderDetail.menu)
+    )
+
+
+def session_orders(table, *criteria, order_by=None):
+    # 테이블의 현재 세션 주문 (session_id 같음 조회), 세션이 없으면 빈 목록
+    if table.current_session_id is None:
+        return []
+    return load_orders(Order.session_id == table.current_session_id, *criteria, order_by=order_by)
+
+
+def load_orders(*criteria, order_by=None):
+    query = with_details(Order.query.filter(*criteria))
+    if order_by is not None:
+        query = query.order_by(order_by)
+    return query.all()
+
+
+def load_order(order_id):
+    return with_details(Order.query.filter(Order.order_id == order_id)).first()
+
+
+# 테이블별 상태 합계 (집계 쿼리 1번)
+SUMMARY_STATUSES = ['결제대기', '결제확인', '완료']
+
+
+def table_summaries(table_ids=None):
+    # 테이블의 현재 세션 주문만 집계한다 (세션이 없으면 NULL 이라 아무 주문과도 맞지 않는다)
+    in_session = Order.session_id == StoreTable.current_session_id
+    latest = aliased(Order)
+    latest_status = (
+        select(latest.order_status)
+        .where(latest.session_id == StoreTable.current_session_id)
+        .order_by(latest.created_at.desc(), latest.order_id.desc())
+        .limit(1)
+        .correlate(StoreTable)
+        .scalar_subquery()
+    )
+
+    query = db.session.query(
+        StoreTable.table_id,
+        StoreTable.is_occupied,
+        func.coalesce(func.sum(case(
+            (Order.order_status.in_(SUMMARY_STATUSES), Order.total_amount), else_=0
+        )), 0).label('total_amount_sum'),
+        func.max(Order.created_at).label('latest_order_time'),
+        latest_status.label('latest_order_status')
+    ).outerjoin(Order, in_session).group_by(
+        StoreTable.table_id, StoreTable.is_occupied, StoreTable.current_session_id
+    ).order_by(StoreTable.table_id)
+
+    if table_ids is not None:
+        query = query.filter(StoreTable.table_id.in_(table_ids))
+
+    result = []
+    for row in query.all():
+        summary = {
+            "table_id": row.table_id,
+            "is_occupied": row.is_occupied,
+            "total_amount_sum": int(row.total_amount_sum)
+        }
+        # 점유 중이고 주문이 있으면 최신 주문 정보도 포함
+        if row.is_occupied and row.latest_order_time is not None:
+            summary["latest_order_status"] = row.latest_order_status
+            summary["latest_order_time"] = row.latest_order_time.strftime("%Y-%m-%d %H:%M")
+        result.append(summary)
+    return result
+
+
+# 주문 관리 화면 커서 페이지네이션 ((created_at, order_id) 내림차순)
+def encode_cursor(order):
+    raw = f"{order.created_at.isoformat()}|{order.order_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    # 잘못된 커서면 ValueError (base64/디코딩 오류도 ValueError 하위 클래스)
+    raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+    created_at, order_id = raw.rsplit('|', 1)
+    return datetime.fromisoformat(created_at), int(order_id)
+
+
+def page_orders(criteria, cursor=None, limit=50):
+    query = with_details(Order.query.filter(*criteria))
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Order.created_at < created_at,
+            and_(Order.created_at == created_at, Order.order_id < order_id)
+        ))
+
+    # 한 건 더 읽어서 다음 페이지가 있는지 확인한다
+    orders = query.order_by(Order.created_at.desc(), Order.order_id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return orders[:limit], next_cursor
+
+
+# 현재 주문 + 보관 주문을 합친 읽기 경로 (보고/정산용, 영업 화면은 현재 주문만 본다)
+def _history_columns(model, archived):
+    return select(
+        model.order_id,
+        model.table_id,
+        model.session_id,
+        model.depositor_name,
+        model.total_amount,
+        model.order_status,
+        model.order_time,
+        model.created_at,
+        literal(archived).label('archived')
+    )
+
+
+def order_history():
+    return union_all(
+        _history_columns(Order, False),
+        _history_columns(ArchivedOrder, True)
+    ).subquery('order_history')
+
+
+def order_detail_history():
+    return union_all(
+        select(OrderDetail.order_id, OrderDetail.menu_id, OrderDetail.quantity, OrderDetail.subtotal),
+        select(ArchivedOrderDetail.order_id, ArchivedOrderDetail.menu_id,
+               ArchivedOrderDetail.quantity, ArchivedOrderDetail.subtotal)
+    ).subquery('order_detail_history')
+
+
+def page_order_history(statuses=None, table_id=None, start=None, end=None, cursor=None, limit=50):
+    history = order_history()
+    query = select(history)
+    if statuses:
+        query = query.where(history.c.order_status.in_(statuses))
+    if table_id is not None:
+        query = query.where(history.c.table_id == table_id)
+    if start is not None:
+        query = query.where(history.c.created_at >= start)
+    if end is not None:
+        query = query.where(history.c.created_at < end)
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.where(or_(
+            history.c.created_at < created_at,
+            and_(history.c.created_at == created_at, history.c.order_id < order_id)
+        ))
+
+    rows = db.session.execute(
+        query.order_by(history.c.created_at.desc(), history.c.order_id.desc()).limit(limit + 1)
+    ).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
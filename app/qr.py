@@ -0,0 +1,90 @@
+import hashlib
+import io
+import os
+
+from flask import current_app
+
+from app.models import db, QRCode
+from app.workers import WorkerPool, write_atomic
+
+# QR 이미지 모양 (바뀌면 파일 이름도 바뀐다)
+BOX_SIZE = 10
+BORDER = 4
+
+
+def render_png(url):
+    # 워커 프로세스에서 실행된다 (qrcode, Pillow 필요)
+    import qrcode
+
+    qr = qrcode.QRCode(box_size=BOX_SIZE, border=BORDER)
+    qr.add_data(url)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image().save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def digest_of(url):
+    # 내용 주소: 같은 URL/모양이면 같은 파일 이름
+    return hashlib.sha256(f"{url}|{BOX_SIZE}|{BORDER}".encode('utf-8')).hexdigest()[:20]
+
+
+def table_url(table_id):
+    return current_app.config['QR_TABLE_URL'].format(table_id=table_id)
+
+
+class QRService:
+    """테이블 QR 이미지를 워커 프로세스 풀에서 만들고 내용 주소 파일로 보관한다.
+
+    파일 이름이 URL 의 해시라서 이미 있으면 다시 그리지 않고, 주소(QR_TABLE_URL)
+    가 바뀌면 새 파일이 생긴다. 여러 장은 풀에서 나눠 그린다.
+    """
+
+    def __init__(self):
+        self.pool = WorkerPool('QR_WORKERS')
+
+    def path_of(self, digest):
+        return os.path.join(current_app.config['QR_DIR'], f"{digest}.png")
+
+    def ensure(self, table_ids):
+        # 테이블별 (table_id, url, digest), 없는 이미지만 풀에서 그린다
+        entries = [(table_id, table_url(table_id)) for table_id in table_ids]
+        entries = [(table_id, url, digest_of(url)) for table_id, url in entries]
+
+        missing = {}
+        for _, url, digest in entries:
+            if not os.path.exists(self.path_of(digest)):
+                missing[digest] = url
+        if missing:
+            os.makedirs(current_app.config['QR_DIR'], exist_ok=True)
+            images = self.pool.executor().map(render_png, missing.values())
+            for digest, png in zip(missing, images):
+                write_atomic(self.path_of(digest), png)
+        return entries
+
+
+def save_qr_codes(entries):
+    # qr_codes 테이블을 현재 이미지/주소로 맞춘다 (테이블당 한 줄)
+    table_ids = [table_id for table_id, _, _ in entries]
+    rows = {row.table_id: row for row in QRCode.query.filter(QRCode.table_id.in_(table_ids))}
+    for table_id, url, digest in entries:
+        row = rows.get(table_id)
+        if row is None:
+            row = QRCode(table_id=table_id)
+            db.session.add(row)
+        # 바뀐 경우에만 써서 반복 조회가 UPDATE 를 만들지 않게 한다
+        if row.qr_code_url != f"/qr/{digest}.png" or row.redirect_url != url:
+            row.qr_code_url = f"/qr/{digest}.png"
+            row.redirect_url = url
+
+
+qr_service = QRService()
+
+
+def saved_qr_codes(table_ids):
+    # 이미 만든 QR 만 (table_id, url, digest) 로, 조회만 한다 (없는 테이블은 빠진다)
+    rows = QRCode.query.filter(QRCode.table_id.in_(table_ids)).order_by(QRCode.table_id)
+    return [
+        (row.table_id, row.redirect_url, row.qr_code_url.rsplit('/', 1)[-1][:-len('.png')])
+        for row in rows
+    ]
@@ -0,0 +1,128 @@
+import csv
+from collections import defaultdict, deque
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import insert
+
+from app.models import db, Order, Payment
+from app.models.orders import confirm_orders
+from app.models.queries import load_orders
+
+# 은행마다 다른 입금 내역 CSV 머리글 (앞에 있는 이름을 먼저 찾는다)
+NAME_COLUMNS = ('입금자명', '입금자', '보낸분', '적요', '내용', 'depositor')
+AMOUNT_COLUMNS = ('입금액', '입금금액', '맡기신금액', '입금', 'amount')
+TIME_COLUMNS = ('거래일시', '거래일자', '입금일시', '일시', 'time')
+
+# 머리글 앞에 계좌 정보 같은 줄이 붙는 은행이 있어서 몇 줄까지 머리글을 찾는다
+HEADER_SEARCH_ROWS = 20
+
+
+class StatementError(Exception):
+    pass
+
+
+def _find(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def normalize_name(name):
+    # 은행 표기는 공백이 섞이거나 빠지므로 공백을 빼고 비교한다
+    return ''.join((name or '').split())
+
+
+def _amount(value):
+    value = value.replace(',', '').replace('원', '').strip()
+    if not value:
+        return 0
+    try:
+        return int(Decimal(value))
+    except InvalidOperation:
+        raise StatementError(f"금액 형식이 올바르지 않습니다: {value}")
+
+
+def _time(value):
+    try:
+        return datetime.fromisoformat(value.strip().replace('.', '-').replace('/', '-'))
+    except ValueError:
+        return None
+
+
+def read_deposits(lines):
+    """은행 입금 내역 CSV 를 한 줄씩 읽어 (줄 번호, 입금자, 금액, 입금 시각) 을 낸다.
+
+    출금(입금액 0) 줄은 건너뛴다. 파일 전체를 메모리에 올리지 않는다.
+    """
+    rows = csv.reader(lines)
+    columns = None
+    for row in rows:
+        header = [cell.strip() for cell in row]
+        name, amount = _find(header, NAME_COLUMNS), _find(header, AMOUNT_COLUMNS)
+        if name is not None and amount is not None:
+            columns = (name, amount, _find(header, TIME_COLUMNS))
+            break
+        if rows.line_num >= HEADER_SEARCH_ROWS:
+            break
+    if columns is None:
+        raise StatementError("입금자명/입금액 머리글을 찾을 수 없습니다.")
+
+    name, amount, time = columns
+    for row in rows:
+        if len(row) <= max(name, amount):
+            continue
+        value = _amount(row[amount])
+        if value <= 0:
+            continue
+        deposited_at = _time(row[time]) if time is not None and len(row) > time else None
+        yield rows.line_num, row[name].strip(), value, deposited_at
+
+
+def reconcile(deposits, dry_run=False):
+    """입금을 결제대기 주문과 (입금자명, 금액) 으로 맞추고 결제확인 처리한다.
+
+    결제대기 주문은 쿼리 한 번으로 불러와 (입금자명, 금액) 별 목록으로 묶고,
+    같은 입금자/금액 주문이 여러 건이면 먼저 들어온 주문부터 맞춘다.
+    맞춘 주문은 Payment 를 남기고 한 트랜잭션으로 결제확인한다 (커밋은 호출한 쪽).
+    """
+    pending = defaultdict(deque)
+    for order in load_orders(Order.order_status == '결제대기', order_by=Order.created_at):
+        pending[(normalize_name(order.depositor_name), int(order.total_amount))].append(order)
+
+    matched, unmatched = [], []
+    for line, name, amount, deposited_at in deposits:
+        orders = pending.get((normalize_name(name), amount))
+        if orders:
+            matched.append((orders.popleft(), line, deposited_at))
+        else:
+            unmatched.append({"line": line, "depositor_name": name, "amount": amount})
+
+    if matched and not dry_run:
+        now = datetime.now()
+        db.session.execute(insert(Payment), [
+            {
+                "order_id": order.order_id,
+                "amount": order.total_amount,
+                "payment_status": '완료',
+                "is_verified": True,
+                "payment_method": '계좌이체',
+                "check_time": deposited_at or now
+            } for order, _, deposited_at in matched
+        ])
+        confirm_orders([order for order, _, _ in matched])
+
+    return {
+        "matched": [
+            {
+                "line": line,
+                "order_id": order.order_id,
+                "table_id": order.table_id,
+                "depositor_name": order.depositor_name,
+                "amount": int(order.total_amount)
+            } for order, line, _ in matched
+        ],
+        "unmatched": unmatched,
+        "dry_run": dry_run
+    }
@@ -0,0 +1,175 @@
+from collections import defaultdict
+from datetime import datetime
+
+import click
+from sqlalchemy import delete, func, insert, select
+
+from app.models import (
+    db, MenuSalesHourly, OrderDetail, OrderStatusDaily, TableSessionSales
+)
+from app.models.queries import order_detail_history, order_history
+
+# 매출로 치는 상태 (취소만 뺀다, 테이블 현황 합계와 같다)
+SALES_STATUSES = ('결제대기', '결제확인', '완료')
+
+
+def _upsert(model, keys, deltas, fixed=None):
+    # 키가 있으면 deltas 를 더하고 없으면 새로 넣는다 (동시에 들어와도 한 문장이라 안전)
+    # fixed 는 처음 넣을 때만 쓰는 값
+    table = model.__table__
+    values = dict(keys, **deltas, **(fixed or {}))
+    if db.session.get_bind().dialect.name == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as upsert
+        stmt = upsert(table).values(values)
+        stmt = stmt.on_duplicate_key_update({name: table.c[name] + stmt.inserted[name] for name in deltas})
+    else:
+        # SQLite / PostgreSQL
+        from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + stmt.excluded[name] for name in deltas}
+        )
+    db.session.execute(stmt)
+
+
+def order_lines(order_id):
+    # 메뉴별 (수량, 금액)
+    rows = db.session.query(
+        OrderDetail.menu_id, func.sum(OrderDetail.quantity), func.sum(OrderDetail.subtotal)
+    ).filter_by(order_id=order_id).group_by(OrderDetail.menu_id)
+    return {menu_id: (int(quantity), int(amount)) for menu_id, quantity, amount in rows}
+
+
+def _hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _status(order, status, count, amount):
+    _upsert(OrderStatusDaily, {"day": order.order_time.date(), "order_status": status}, {
+        "order_count": count, "total_amount": amount
+    })
+
+
+def _sales(order, count, lines, revenue):
+    hour = _hour(order.order_time)
+    for menu_id, (quantity, amount) in lines.items():
+        if quantity or amount:
+            _upsert(MenuSalesHourly, {"menu_id": menu_id, "hour": hour}, {
+                "quantity": quantity, "revenue": amount
+            })
+    # 세션 없이 남아 있는 옛 주문은 세션 집계에서 빠진다
+    if (count or revenue) and order.session_id is not None:
+        _upsert(TableSessionSales, {"session_id": order.session_id}, {
+            "order_count": count, "revenue": revenue
+        }, fixed={"table_id": order.table_id})
+
+
+def rollup_order_created(order):
+    total = int(order.total_amount)
+    _status(order, order.order_status, 1, total)
+    if order.order_status in SALES_STATUSES:
+        _sales(order, 1, order_lines(order.order_id), total)
+
+
+def rollup_order_amended(order, before, before_total):
+    # before: 수정 전 order_lines(), before_total: 수정 전 합계
+    after = order_lines(order.order_id)
+    change = int(order.total_amount) - int(before_total)
+    _status(order, order.order_status, 0, change)
+    if order.order_status in SALES_STATUSES:
+        lines = {}
+        for menu_id in set(before) | set(after):
+            quantity, amount = after.get(menu_id, (0, 0))
+            old_quantity, old_amount = before.get(menu_id, (0, 0))
+            lines[menu_id] = (quantity - old_quantity, amount - old_amount)
+        _sales(order, 0, lines, change)
+
+
+def rollup_status_changed(order, previous):
+    if previous == order.order_status:
+        return
+    total = int(order.total_amount)
+    _status(order, previous, -1, -total)
+    _status(order, order.order_status, 1, total)
+
+    # 취소되거나 취소에서 되살아난 주문만 매출에서 빼고 더한다
+    was_sale, is_sale = previous in SALES_STATUSES, order.order_status in SALES_STATUSES
+    if was_sale != is_sale:
+        sign = 1 if is_sale else -1
+        lines = {m: (sign * q, sign * a) for m, (q, a) in order_lines(order.order_id).items()}
+        _sales(order, sign, lines, sign * total)
+
+
+def rollup_statuses_changed(orders, previous):
+    # 매출 상태끼리 한꺼번에 바뀐 주문들 (결제대기 -> 결제확인, 결제확인 -> 완료), 날짜별로 모아서 더한다
+    days = {}
+    for order in orders:
+        count, amount, _ = days.get(order.order_time.date(), (0, 0, None))
+        days[order.order_time.date()] = (count + 1, amount + int(order.total_amount), order)
+    for count, amount, order in days.values():
+        _status(order, previous, -count, -amount)
+        _status(order, order.order_status, count, amount)
+
+
+def rebuild_rollups():
+    """집계 테이블을 현재 주문 + 보관 주문에서 다시 만든다.
+
+    세션이 없는 옛 주문(session_id 가 NULL)은 테이블 세션 집계에서 빠진다.
+    """
+    for model in (MenuSalesHourly, TableSessionSales, OrderStatusDaily):
+        db.session.execute(delete(model))
+
+    statuses = defaultdict(lambda: [0, 0])
+    sessions = defaultdict(lambda: [0, 0])
+    orders = order_history()
+    for row in db.session.execute(select(orders)):
+        total = int(row.total_amount)
+        entry = statuses[(row.order_time.date(), row.order_status)]
+        entry[0] += 1
+        entry[1] += total
+        if row.order_status not in SALES_STATUSES or row.session_id is None:
+            continue
+        entry = sessions[(row.session_id, row.table_id)]
+        entry[0] += 1
+        entry[1] += total
+
+    menus = defaultdict(lambda: [0, 0])
+    details = order_detail_history()
+    query = select(orders.c.order_time, details.c.menu_id, details.c.quantity, details.c.subtotal).join(
+        details, details.c.order_id == orders.c.order_id
+    ).where(orders.c.order_status.in_(SALES_STATUSES))
+    for row in db.session.execute(query):
+        entry = menus[(row.menu_id, _hour(row.order_time))]
+        entry[0] += row.quantity
+        entry[1] += int(row.subtotal)
+
+    if statuses:
+        db.session.execute(insert(OrderStatusDaily), [
+            {"day": day, "order_status": status, "order_count": count, "total_amount": amount}
+            for (day, status), (count, amount) in statuses.items()
+        ])
+    if sessions:
+        db.session.execute(insert(TableSessionSales), [
+            {"session_id": session_id, "table_id": table_id, "order_count": count, "revenue": amount}
+            for (session_id, table_id), (count, amount) in sessions.items()
+        ])
+    if menus:
+        db.session.execute(insert(MenuSalesHourly), [
+            {"menu_id": menu_id, "hour": hour, "quantity": quantity, "revenue": amount}
+            for (menu_id, hour), (quantity, amount) in menus.items()
+        ])
+    db.session.commit()
+    return len(statuses), len(sessions), len(menus)
+
+
+def init_rollups(app):
+    @app.cli.command('rebuild-rollups')
+    def rebuild_rollups_command():
+        """매출 집계 테이블을 주문 기록에서 다시 만든다."""
+        started = datetime.now()
+        days, sessions, menu_hours = rebuild_rollups()
+        click.echo(
+            f"집계 재생성 완료: 일별 상태 {days}줄, 테이블 세션 {sessions}줄, "
+            f"메뉴-시간 {menu_hours}줄 ({(datetime.now() - started).total_seconds():.1f}초)"
+        )
@@ -1,70 +1,43 @@
-from flask import Blueprint, request, jsonify, abort
-from app.models import db, StoreTable, Order, OrderDetail, Menu
+import io
+from collections import Counter
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, abort, current_app
+from app.models import db, StoreTable, Order, read_replica
+from app.models.orders import (
+    OrderError, amend_order, change_status, change_status_and_stock, close_session, load_menus, parse_items,
+    place_order, quantities_of, settle_stock
+)
+from app.models.queries import page_order_history, page_orders, session_orders, table_summaries
+from app.fastjson import FragmentCache, dumps_bytes, join_array
+from app.events import TOPIC_MENU, bus, record_event, table_topic
+from app.reconcile import StatementError, read_deposits, reconcile
+from app.table_summary import table_summary_cache
 
 cashier_bp = Blueprint('cashier', __name__, url_prefix='/cashier')
 
 
 # 전체 테이블 상태 조회
 @cashier_bp.route('/tables', methods=['GET'])
+@read_replica
 def get_table_statuses():
-    tables = StoreTable.query.order_by(StoreTable.table_id).all()
-    result = []
-
-    for table in tables:
-        # 1. 비어 있으면 주문은 빈 리스트 (매출 0)
-        if not table.is_occupied:
-            orders = []
-        else:
-            # 2. 점유 중이면 최근 점유(갱신) 시점 이후의 주문만 집계
-            orders = Order.query.filter(
-                Order.table_id == table.table_id,
-                Order.created_at >= table.updated_at
-            ).all()
-        # 3. 상태별 금액 합계 계산
-        total_amount_by_status = {
-            "결제대기": 0,
-            "결제확인": 0,
-            "완료": 0
-        }
-        for order in orders:
-            if order.order_status in total_amount_by_status:
-                total_amount_by_status[order.order_status] += int(order.total_amount)        
-        total_sum = sum(total_amount_by_status.values())
-
-        # 4. 점유 중이고 주문이 있으면 최신 주문 정보도 포함
-        if table.is_occupied and orders:
-            latest_order = max(orders, key=lambda o: o.created_at)
-            result.append({
-                "table_id": table.table_id,
-                "is_occupied": table.is_occupied,
-                "latest_order_status": latest_order.order_status,
-                "latest_order_time": latest_order.created_at.strftime("%Y-%m-%d %H:%M"),
-                "total_amount_sum": total_sum
-            })
-        else:
-            # (비어있거나 주문 없는 경우)
-            result.append({
-                "table_id": table.table_id,
-                "is_occupied": table.is_occupied,
-                "total_amount_sum": total_sum
-            })
-
-    return jsonify(result)
+    # 테이블별 합계/최신 주문을 집계 쿼리 한 번으로 계산한다
+    if current_app.config.get('TABLE_SUMMARY_CACHE'):
+        # 주문 알림이 온 테이블만 다시 집계
+        return jsonify(table_summary_cache.get())
+    return jsonify(table_summaries())
 
 # 특정 테이블 주문 내역 조회
 @cashier_bp.route('/table/<int:table_id>', methods=['GET'])
+@read_replica
 def get_table_orders(table_id):
     table = StoreTable.query.get(table_id)
     if not table:
         return abort(404, description="해당 테이블이 존재하지 않습니다.")
 
-    orders = Order.query.filter(
-        Order.table_id == table.table_id,
-        Order.created_at >= table.updated_at
-    ).order_by(Order.created_at.desc()).all()
+    orders = session_orders(table, order_by=Order.created_at.desc())
     result = []
     for order in orders:
-        details = OrderDetail.query.filter_by(order_id=order.order_id).all()
+        details = order.order_details
         detail_data = [
             {
                 "menu_name": d.menu.menu_name,
@@ -101,7 +74,7 @@ def confirm_order():
     if order.order_status != "결제대기":
         return jsonify({"error": "이미 처리된 주문입니다."}), 400
 
-    order.order_status = "결제확인"
+    change_status(order, "결제확인")
     db.session.commit()
 
     return jsonify({
@@ -110,6 +83,33 @@ def confirm_order():
     })
 
 
+# 은행 입금 내역 CSV 로 결제대기 주문을 한꺼번에 결제확인 (multipart file, ?dry_run=1 이면 맞춰 보기만)
+@cashier_bp.route('/payments/reconcile', methods=['POST'])
+def reconcile_payments():
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({"error": "입금 내역 파일(file)이 없습니다."}), 400
+
+    encoding = request.form.get('encoding') or current_app.config['STATEMENT_ENCODING']
+    dry_run = request.args.get('dry_run') == '1'
+    try:
+        lines = io.TextIOWrapper(upload.stream, encoding=encoding, newline='')
+        result = reconcile(read_deposits(lines), dry_run=dry_run)
+    except LookupError:
+        return jsonify({"error": f"알 수 없는 인코딩입니다: {encoding}"}), 400
+    except UnicodeDecodeError:
+        return jsonify({"error": "파일 인코딩이 맞지 않습니다. (예: encoding=cp949)"}), 400
+    except StatementError as e:
+        return jsonify({"error": str(e)}), 400
+    except OrderError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
+
+    if not dry_run:
+        db.session.commit()
+    return jsonify(result)
+
+
 # 수동 주문 등록 (캐셔용)
 @cashier_bp.route('/manual_order', methods=['POST'])
 def create_manual_order():
@@ -125,38 +125,16 @@ def create_manual_order():
     if not table:
         return jsonify({"error": "존재하지 않는 테이블입니다."}), 404
 
-    table.is_occupied = True
-
-    order = Order(
-        table_id=table_id,
-        depositor_name=depositor,
-        total_amount=0,
-        order_status='결제확인'  # 수동 주문은 바로 결제확인 처리
-    )
-    db.session.add(order)
-    db.session.flush()
-
-    total = 0
-    for item in items:
-        menu = Menu.query.get(item['menu_id'])
-        if not menu or not menu.is_available:
-            return jsonify({"error": f"{item['menu_id']}번 메뉴가 유효하지 않음"}), 400
-
-        quantity = int(item['quantity'])
-        unit_price = int(menu.price)
-        subtotal = quantity * unit_price
-
-        detail = OrderDetail(
-            order_id=order.order_id,
-            menu_id=menu.menu_id,
-            quantity=quantity,
-            unit_price=unit_price,
-            subtotal=subtotal
-        )
-        db.session.add(detail)
-        total += subtotal
+    # 메뉴는 한 번에 불러오고, 재고 차감까지 한 트랜잭션 (실패하면 주문 전체 롤백)
+    try:
+        lines = parse_items(items)
+        menus = load_menus(menu_id for menu_id, _ in lines)
+        order = place_order(table, depositor, lines, menus, '결제확인')  # 수동 주문은 바로 결제확인 처리
+        settle_stock(quantities_of(lines), Counter(), menus)
+    except OrderError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
 
-    order.total_amount = total
     db.session.commit()
 
     return jsonify({
@@ -176,30 +154,16 @@ def update_order():
     if not order:
         return jsonify({"error": "주문이 존재하지 않습니다."}), 404
 
-    # 기존 상세 삭제 후 다시 추가
-    OrderDetail.query.filter_by(order_id=order_id).delete()
-
-    total = 0
-    for item in updated_items:
-        menu = Menu.query.get(item['menu_id'])
-        if not menu:
-            return jsonify({"error": f"{item['menu_id']}번 메뉴가 없습니다."}), 400
-
-        quantity = int(item['quantity'])
-        unit_price = int(menu.price)
-        subtotal = quantity * unit_price
-
-        new_detail = OrderDetail(
-            order_id=order_id,
-            menu_id=menu.menu_id,
-            quantity=quantity,
-            unit_price=unit_price,
-            subtotal=subtotal
-        )
-        db.session.add(new_detail)
-        total += subtotal
+    # 메뉴는 한 번에 불러오고, 늘어난 수량만 차감/줄어든 수량은 반환
+    try:
+        lines = parse_items(updated_items)
+        menus = load_menus(menu_id for menu_id, _ in lines)
+        reserve, release = amend_order(order, lines, menus)
+        settle_stock(reserve, release, menus)
+    except OrderError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
 
-    order.total_amount = total
     db.session.commit()
 
     return jsonify({
@@ -207,6 +171,67 @@ def update_order():
         "order_id": order_id
     })
 
+
+# 여러 테이블 주문 일괄 등록/수정 (캐셔용)
+# {"orders": [{"table_id", "depositor_name", "items"}, {"order_id", "items"}, ...]}
+# order_id 가 있으면 수정, 없으면 새 주문(결제확인). 전부 성공하거나 전부 취소된다.
+@cashier_bp.route('/orders/batch', methods=['POST'])
+def submit_order_batch():
+    data = request.get_json(silent=True)
+    entries = data.get('orders') if isinstance(data, dict) else None
+    if not entries:
+        return jsonify({"error": "필수 정보 누락"}), 400
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        return jsonify({"error": "orders 는 주문 객체 목록이어야 합니다."}), 400
+
+    index = None
+    try:
+        parsed = []
+        for index, entry in enumerate(entries):
+            parsed.append((entry, parse_items(entry.get('items'))))
+        index = None
+
+        # 메뉴/테이블/수정할 주문을 각각 한 번에 불러온다
+        menus = load_menus(menu_id for _, lines in parsed for menu_id, _ in lines)
+        table_ids = {entry.get('table_id') for entry, _ in parsed if not entry.get('order_id')}
+        amend_ids = {entry.get('order_id') for entry, _ in parsed if entry.get('order_id')}
+        tables = {t.table_id: t for t in StoreTable.query.filter(StoreTable.table_id.in_(table_ids))}
+        orders = {o.order_id: o for o in Order.query.filter(Order.order_id.in_(amend_ids))}
+
+        reserve, release = Counter(), Counter()
+        order_ids = []
+        for index, (entry, lines) in enumerate(parsed):
+            if entry.get('order_id'):
+                order = orders.get(entry['order_id'])
+                if not order:
+                    raise OrderError("주문이 존재하지 않습니다.", 404)
+                more, less = amend_order(order, lines, menus)
+                reserve += more
+                release += less
+            else:
+                table = tables.get(entry.get('table_id'))
+                if not table:
+                    raise OrderError("존재하지 않는 테이블입니다.", 404)
+                if not entry.get('depositor_name'):
+                    raise OrderError("필수 정보 누락")
+                order = place_order(table, entry['depositor_name'], lines, menus, '결제확인')
+                reserve += quantities_of(lines)
+            order_ids.append(order.order_id)
+        index = None
+
+        # 배치 전체의 재고 증감을 메뉴별로 합쳐 한 번에 반영
+        settle_stock(reserve - release, release - reserve, menus)
+    except OrderError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message, "index": index}), e.status_code
+
+    db.session.commit()
+
+    return jsonify({
+        "message": "일괄 주문 처리 완료",
+        "order_ids": order_ids
+    }), 201
+
 @cashier_bp.route('/order/delete', methods=['DELETE'])
 def cancel_order():
     data = request.get_json()
@@ -221,18 +246,8 @@ def cancel_order():
     if order.order_status == "취소":
         return jsonify({"message": "이미 취소된 주문입니다."}), 400
 
-    # 주문 상세 항목 불러오기
-    order_details = OrderDetail.query.filter_by(order_id=order_id).all()
-
-    # stock 복구 부분
-    for detail in order_details:
-        menu = Menu.query.get(detail.menu_id)
-        if menu:
-            # 취소된 메뉴의 수량만큼 재고 증가
-            menu.stock_quantity += detail.quantity  
-
-    # 주문 상태 변경
-    order.order_status = "취소"
+    # 주문 상태 변경 + 취소된 메뉴의 수량만큼 재고 증가 (UPDATE 한 번)
+    change_status_and_stock(order, "취소")
     db.session.commit()
 
     return jsonify({
@@ -240,29 +255,114 @@ def cancel_order():
         "order_id": order_id
     }), 200
 
+
+# 주문 관리 목록의 한 줄
+def order_row(order):
+    items = order.order_details
+    summary = []
+    for item in items[:2]:
+        summary.append(f"{item.menu.menu_name}({item.quantity}개)")
+    if len(items) > 2:
+        summary.append(f"외 {len(items) - 2}개")
+    return {
+        "order_id": order.order_id,
+        "table_id": order.table_id,
+        "depositor_name": order.depositor_name,
+        "total_amount": int(order.total_amount),
+        "order_status": order.order_status,
+        "order_time": order.order_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "menu_summary": " ".join(summary)
+    }
+
+
+CLOSED_STATUSES = ('완료', '취소')
+closed_orders = FragmentCache()
+
+
 @cashier_bp.route('/ordermanagement', methods=['GET'])
+@read_replica
 def get_all_orders():
-    orders = Order.query.order_by(Order.created_at.desc()).all()
-    result = []
-
+    # 필터: status(여러 개 가능), table_id, from/to(주문 생성 시각)
+    criteria = []
+    statuses = request.args.getlist('status')
+    if statuses:
+        criteria.append(Order.order_status.in_(statuses))
+    table_id = request.args.get('table_id', type=int)
+    if table_id is not None:
+        criteria.append(Order.table_id == table_id)
+    try:
+        if request.args.get('from'):
+            criteria.append(Order.created_at >= datetime.fromisoformat(request.args['from']))
+        if request.args.get('to'):
+            criteria.append(Order.created_at < datetime.fromisoformat(request.args['to']))
+    except ValueError:
+        return jsonify({"error": "시간 형식이 올바르지 않습니다."}), 400
+
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    if limit < 1:
+        return jsonify({"error": "limit은 1 이상이어야 합니다."}), 400
+
+    try:
+        orders, next_cursor = page_orders(criteria, request.args.get('cursor'), limit)
+    except ValueError:
+        return jsonify({"error": "잘못된 커서입니다."}), 400
+    # 끝난 주문(완료/취소)은 거의 바뀌지 않으므로 인코딩해 둔 조각을 그대로 쓴다
+    # 수정/상태 변경은 테이블 토픽, 메뉴 이름 변경은 메뉴 토픽 버전이 올라가서 다시 만든다
+    fragments = []
     for order in orders:
-        items = order.order_details
-        summary = []
-        for item in items[:2]:
-            summary.append(f"{item.menu.menu_name}({item.quantity}개)")
-        if len(items) > 2:
-            summary.append(f"외 {len(items) - 2}개")
-        result.append({
-            "order_id": order.order_id,
-            "table_id": order.table_id,
-            "depositor_name": order.depositor_name,
-            "total_amount": int(order.total_amount),
-            "order_status": order.order_status,
-            "order_time": order.order_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "menu_summary": " ".join(summary)
-        })
+        if order.order_status in CLOSED_STATUSES:
+            version = bus.version((table_topic(order.table_id), TOPIC_MENU))
+            key = (order.order_id, order.order_status, order.updated_at, version)
+            fragments.append(closed_orders.get(key, lambda: order_row(order)))
+        else:
+            fragments.append(dumps_bytes(order_row(order)))
+
+    body = b'{"orders":%s,"next_cursor":%s}' % (join_array(fragments), dumps_bytes(next_cursor))
+    return Response(body, mimetype='application/json')
+
+
+# 지난 주문 내역 (보관된 주문 포함, 주문 관리와 같은 필터/커서)
+@cashier_bp.route('/orders/history', methods=['GET'])
+@read_replica
+def get_order_history():
+    try:
+        start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({"error": "시간 형식이 올바르지 않습니다."}), 400
+
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    if limit < 1:
+        return jsonify({"error": "limit은 1 이상이어야 합니다."}), 400
+
+    try:
+        rows, next_cursor = page_order_history(
+            statuses=request.args.getlist('status'),
+            table_id=request.args.get('table_id', type=int),
+            start=start,
+            end=end,
+            cursor=request.args.get('cursor'),
+            limit=limit
+        )
+    except ValueError:
+        return jsonify({"error": "잘못된 커서입니다."}), 400
+
+    return jsonify({
+        "orders": [
+            {
+                "order_id": row.order_id,
+                "table_id": row.table_id,
+                "depositor_name": row.depositor_name,
+                "total_amount": int(row.total_amount),
+                "order_status": row.order_status,
+                "order_time": row.order_time.strftime("%Y-%m-%d %H:%M:%S"),
+                "archived": bool(row.archived)
+            } for row in rows
+        ],
+        "next_cursor": next_cursor
+    })
+
 
-    return jsonify({"orders": result})
 #테이블 주문에 대한 상태를 수정하는 부분인데 어떻게 작동하는겨?
 #
 @cashier_bp.route('/orders/<int:order_id>/status', methods=['PATCH'])
@@ -277,7 +377,12 @@ def update_order_status(order_id):
     if not order:
         return jsonify({"error": "주문이 존재하지 않습니다."}), 404
 
-    order.order_status = new_status
+    # 취소하면 재고를 돌려주고, 취소에서 되살리면 다시 차감한다 (주문 취소와 같은 경로)
+    try:
+        change_status_and_stock(order, new_status)
+    except OrderError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
     db.session.commit()
 
     return jsonify({
@@ -297,7 +402,8 @@ def reset_table():
     if not table:
         return jsonify({"error": "테이블을 찾을 수 없습니다."}), 404
 
-    table.is_occupied = False
+    close_session(table)
+    record_event('table_reset', {"table_id": table.table_id}, table.table_id)
     db.session.commit()
 
     return jsonify({
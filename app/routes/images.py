@@ -0,0 +1,63 @@
+import os
+from flask import Blueprint, request, jsonify, send_from_directory, current_app, abort
+from werkzeug.exceptions import RequestEntityTooLarge
+from app.models import db, Menu
+from app.events import record_menu_image_event
+from app.images import FILE_NAME, VERSION, image_service, image_variants
+
+images_bp = Blueprint('images', __name__, url_prefix='/images')
+
+
+# 메뉴 이미지 업로드 (multipart file), 변형은 백그라운드에서 만든다
+@images_bp.route('/menu/<int:menu_id>', methods=['POST'])
+def upload_menu_image(menu_id):
+    menu = Menu.query.get(menu_id)
+    if not menu:
+        return jsonify({"error": "해당 메뉴가 존재하지 않습니다."}), 404
+    # 본문을 읽기 전에 크기를 제한한다 (넘으면 여기서 RequestEntityTooLarge)
+    request.max_content_length = current_app.config['IMAGE_MAX_BYTES']
+    try:
+        upload = request.files.get('file')
+    except RequestEntityTooLarge:
+        return jsonify({"error": "이미지 파일이 너무 큽니다."}), 413
+    if upload is None:
+        return jsonify({"error": "이미지 파일(file)이 없습니다."}), 400
+
+    try:
+        menu.image_url = image_service.store(upload.read())
+    except ImportError:
+        return jsonify({"error": "이미지 처리 모듈(Pillow)이 설치되어 있지 않습니다."}), 503
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # 카탈로그 캐시가 메뉴 토픽 버전으로 갱신된다
+    variants = image_variants(menu.image_url)
+    record_menu_image_event(menu, variants)
+    db.session.commit()
+
+    return jsonify({
+        "menu_id": menu.menu_id,
+        "image_url": menu.image_url,
+        "image_variants": variants
+    })
+
+
+# 원본/변형 이미지, 이름이 내용 해시라서 오래 캐시해도 된다 (없는 변형은 처음 요청할 때 만든다)
+@images_bp.route('/<name>', methods=['GET'])
+def get_image(name):
+    match = FILE_NAME.match(name)
+    if not match:
+        abort(404)
+    digest, width, version, _ = match.groups()
+    if width and int(version) == VERSION and int(width) in current_app.config['IMAGE_WIDTHS']:
+        if not os.path.exists(image_service.path_of(name)):
+            try:
+                image_service.ensure(digest)
+            except ImportError:
+                return jsonify({"error": "이미지 처리 모듈(Pillow)이 설치되어 있지 않습니다."}), 503
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+    response = send_from_directory(current_app.config['IMAGE_DIR'], name, max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
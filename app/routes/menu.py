@@ -1,50 +1,43 @@
-from flask import Blueprint, jsonify, request, stream_with_context, Response
-from app.models import db, Menu, Category, Order, OrderDetail, StoreTable
+from flask import Blueprint, jsonify, request, Response
+from app.models import db, Menu, Order, StoreTable, read_replica
+from app.models.queries import session_orders
+from app.events import (
+    TOPIC_MENU, TOPIC_STOCK, table_topic, record_stock_event,
+    EventCursor, can_resume, format_event
+)
+from app.catalog import catalog
+from app.fastjson import dumps_bytes
+from app.images import width_bucket
+from app.sse import sse_response
 import json
-import time
 
 menu_bp = Blueprint('menu', __name__, url_prefix='/menu')
 
+
+def image_choice():
+    # ?image_width=기기 폭(px, 화면 배율 포함) 이면 그 폭에 맞는 변형, WebP 를 받는 브라우저면 WebP
+    width = request.args.get('image_width', type=int)
+    if not width or width < 1:
+        return None
+    ext = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpg'
+    return width_bucket(width), ext
+
 @menu_bp.route('/<int:table_id>', methods=['GET'])
+@read_replica
 def get_menu_and_orders(table_id):
     table = StoreTable.query.get(table_id)
     if not table:
         return jsonify({"error": "해당 테이블이 존재하지 않습니다."}), 404
 
-    # 메뉴 불러오기
-    categories = Category.query.order_by(Category.display_order).all()
-    category_data = []
-    for category in categories:
-        menus = Menu.query.filter_by(category_id=category.category_id).all()
-        menu_list = [
-            {
-                "menu_id": menu.menu_id,
-                "menu_name": menu.menu_name,
-                "description": menu.description,
-                "price": int(menu.price),
-                "image_url": menu.image_url,
-                "stock_quantity": menu.stock_quantity,
-                "is_available": menu.is_available
-            } for menu in menus
-        ]
-        category_data.append({
-            "category_id": category.category_id,
-            "category_name": category.category_name,
-            "menus": menu_list
-        })
+    # 메뉴는 캐시된 JSON 바이트를 그대로 쓴다 (재고 수량 포함)
+    _, categories_json = catalog.get(image=image_choice(), with_stock=True)
 
-    # 초기화 이후 주문만 필터링
-    active_orders = Order.query.filter(
-        Order.table_id == table_id,
-        Order.order_status.in_(['결제대기', '결제확인']),
-        # 초기화 이후 주문만
-        # 테이블 상태가 업데이트 되기 전 까지만 가져올것임
-        Order.created_at >= table.updated_at  
-    ).all()
+    # 지금 앉은 손님(현재 세션)의 주문만
+    active_orders = session_orders(table, Order.order_status.in_(['결제대기', '결제확인']))
 
     order_list = []
     for order in active_orders:
-        details = OrderDetail.query.filter_by(order_id=order.order_id).all()
+        details = order.order_details
         detail_data = [
             {
                 "order_detail_id": d.order_detail_id,
@@ -60,78 +53,103 @@ def get_menu_and_orders(table_id):
             "details": detail_data
         })
 
-    return jsonify({
-        "table_id": table_id,
-        "categories": category_data,
-        "active_orders": order_list
-    })
-
+    body = b'{"table_id": %d, "categories": %s, "active_orders": %s}' % (
+        table_id, categories_json, dumps_bytes(order_list)
+    )
+    response = Response(body, mimetype='application/json')
+    response.vary.add('Accept')
+    return response
+
+
+# 메뉴 카탈로그만 조회 (If-None-Match 가 같으면 304)
+# 재고 수량은 빠져 있다 (GET /menu/stocks 나 SSE stock_changed 로 받는다)
+@menu_bp.route('/catalog', methods=['GET'])
+@read_replica
+def get_menu_catalog():
+    available_only = request.args.get('available') == '1'
+    etag, body = catalog.get(available_only, image_choice())
+
+    response = Response(body, mimetype='application/json')
+    response.vary.add('Accept')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+class MenuOrderStream:
+    """처음에 스냅샷 한 번, 이후에는 change_events 증분 이벤트만 보낸다.
+
+    재접속 시 Last-Event-ID 가 보관 중인 로그 범위 안이면 그 다음 이벤트부터
+    (늦게 커밋될 수 있는 빈 id 도 함께) 이어서 보내고, 아니면 스냅샷부터 다시 보낸다.
+    """
+
+    def __init__(self, table_id, last_event_id=None):
+        self.table_id = table_id
+        self.topics = (TOPIC_MENU, TOPIC_STOCK, table_topic(table_id))
+        self.closed = False
+        self.last_event_id = last_event_id
+        self.cursor = None
+        self.started = False
+
+    def poll(self):
+        if not self.started:
+            self.started = True
+            self.cursor = EventCursor.parse(self.last_event_id)
+            if self.cursor is None or not can_resume(self.cursor.last_id):
+                return self.snapshot()
+
+        # 늦게 커밋된 이벤트는 id 가 더 작아도 보내고, SSE id 에 빈 id 를 실어 재접속 때도 이어 찾는다
+        chunks = [format_event(event, token) for event, token in self.cursor.read(self.table_id)]
+        self.last_event_id = self.cursor.token()
+        return chunks
+
+    def snapshot(self):
+        table = StoreTable.query.get(self.table_id)
+        if not table:
+            self.closed = True
+            return [f"data: {json.dumps({'error': '해당 테이블이 존재하지 않습니다.'})}\n\n"]
+
+        # 스냅샷보다 먼저 읽어야 스냅샷 도중 생긴 (또는 아직 커밋 안 된) 이벤트를 놓치지 않는다
+        self.cursor = EventCursor.at_latest()
+        self.last_event_id = self.cursor.token()
+        _, categories_json = catalog.get(available_only=True, with_stock=True)
+
+        active_orders = session_orders(table, Order.order_status.in_(['결제대기', '결제확인']))
+
+        order_list = []
+        for order in active_orders:
+            details = order.order_details
+            detail_data = [
+                {
+                    "order_detail_id": d.order_detail_id,
+                    "menu_name": d.menu.menu_name,
+                    "quantity": d.quantity,
+                    "is_served": d.is_served
+                } for d in details
+            ]
+            order_list.append({
+                "order_id": order.order_id,
+                "depositor_name": order.depositor_name,
+                "status": order.order_status,
+                "details": detail_data
+            })
+
+        payload = '{"table_id": %d, "categories": %s, "active_orders": %s}' % (
+            self.table_id, categories_json.decode('utf-8'), dumps_bytes(order_list).decode('utf-8')
+        )
+        # 스냅샷은 이벤트 이름 없이 보낸다 (기존 onmessage 클라이언트 호환)
+        return [f"id: {self.last_event_id}\ndata: {payload}\n\n"]
+
+
+# 스냅샷 이후에는 메뉴/해당 테이블의 증분 이벤트만 보낸다
+# (stock_changed, menu_sold_out, order_created, order_amended, order_status, item_served, table_reset)
 @menu_bp.route('/sse/<int:table_id>', methods=['GET'])
 def stream_menu_and_orders(table_id):
-    def event_stream():
-        while True:
-            table = StoreTable.query.get(table_id)
-            if not table:
-                yield f"data: {json.dumps({'error': '해당 테이블이 존재하지 않습니다.'})}\n\n"
-                break
-
-            categories = Category.query.order_by(Category.display_order).all()
-            category_data = []
-            for category in categories:
-                menus = Menu.query.filter_by(category_id=category.category_id, is_available=True).all()
-                menu_list = [
-                    {
-                        "menu_id": menu.menu_id,
-                        "menu_name": menu.menu_name,
-                        "description": menu.description,
-                        "price": int(menu.price),
-                        "image_url": menu.image_url,
-                        "stock_quantity": menu.stock_quantity,
-                        "is_available": menu.is_available
-                    } for menu in menus
-                ]
-                category_data.append({
-                    "category_id": category.category_id,
-                    "category_name": category.category_name,
-                    "menus": menu_list
-                })
-
-            active_orders = Order.query.filter(
-                Order.table_id == table_id,
-                Order.order_status.in_(['결제대기', '결제확인']),
-                Order.created_at > table.updated_at
-            ).all()
-
-            order_list = []
-            for order in active_orders:
-                details = OrderDetail.query.filter_by(order_id=order.order_id).all()
-                detail_data = [
-                    {
-                        "order_detail_id": d.order_detail_id,
-                        "menu_name": d.menu.menu_name,
-                        "quantity": d.quantity,
-                        "is_served": d.is_served
-                    } for d in details
-                ]
-                order_list.append({
-                    "order_id": order.order_id,
-                    "depositor_name": order.depositor_name,
-                    "status": order.order_status,
-                    "details": detail_data
-                })
-
-            payload = {
-                "table_id": table_id,
-                "categories": category_data,
-                "active_orders": order_list
-            }
-
-            yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
-            time.sleep(3)  # 클라이언트에 주기적으로 업데이트 (3초 간격)
-
-    return Response(stream_with_context(event_stream()), content_type='text/event-stream')
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    return sse_response(MenuOrderStream(table_id, last_event_id))
 
 @menu_bp.route('/stocks', methods=['GET'])
+@read_replica
 def get_all_menu_stock():
     menus = Menu.query.all()
     result = [
@@ -159,7 +177,14 @@ def update_menu_stock():
     if not menu:
         return jsonify({"error": "해당 메뉴가 존재하지 않습니다."}), 404
 
-    menu.stock_quantity = int(new_stock)
+    previous, menu.stock_quantity = menu.stock_quantity, int(new_stock)
+    was_available = menu.is_available
+    # 주문 차감과 같이 재고가 0 이면 내리고, 재고 소진으로 내려갔던 메뉴는 채우면 다시 올린다
+    if menu.stock_quantity <= 0:
+        menu.is_available = False
+    elif previous is not None and previous <= 0:
+        menu.is_available = True
+    record_stock_event(menu, availability_changed=menu.is_available != was_available)
     db.session.commit()
 
     return jsonify({"message": "재고가 수정되었습니다.", "menu_id": menu_id})
@@ -177,7 +202,8 @@ def disable_menu():
     if not menu:
         return jsonify({"error": "해당 메뉴가 존재하지 않습니다."}), 404
 
-    menu.is_available = False
+    was_available, menu.is_available = menu.is_available, False
+    record_stock_event(menu, availability_changed=was_available)
     db.session.commit()
 
     return jsonify({"message": "메뉴가 품절 처리되었습니다.", "menu_id": menu_id})
\ No newline at end of file
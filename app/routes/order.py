@@ -1,5 +1,13 @@
+import json
+from collections import Counter
 from flask import Blueprint, request, jsonify
-from app.models import db, Order, OrderDetail, StoreTable, Menu
+from sqlalchemy.exc import IntegrityError
+from app.idempotency import order_submissions
+from app.models import db, StoreTable
+from app.models.orders import (
+    OrderError, load_menus, parse_items, place_order, quantities_of, settle_stock, submitted_order
+)
+from app.models.queries import load_order
 
 order_bp = Blueprint('order', __name__, url_prefix='/order')
 
@@ -13,60 +21,83 @@ def submit_order():
 
     if not table_id or not depositor or not items:
         return jsonify({"error": "필수 정보가 누락되었습니다."}), 400
+    # "1" 과 1 이 같은 멱등 키가 되도록 정수로 맞춘다
+    try:
+        table_id = int(table_id)
+    except (TypeError, ValueError):
+        return jsonify({"error": "테이블 번호가 올바르지 않습니다."}), 400
+
+    # 재시도/중복 클릭은 같은 키로 들어오므로 처음 응답을 그대로 돌려준다
+    key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    if not key:
+        body, status, _ = _submit(table_id, depositor, items)
+        return jsonify(body), status
+    if not isinstance(key, str):
+        return jsonify({"error": "요청 키는 문자열이어야 합니다."}), 400
+    if len(key) > 128:
+        return jsonify({"error": "요청 키가 너무 깁니다."}), 400
+
+    fingerprint = json.dumps([depositor, items], sort_keys=True, ensure_ascii=False)
+    body, status, replayed = order_submissions.run(
+        f"{table_id}:{key}", fingerprint, lambda: _submit(table_id, depositor, items, key)
+    )
+    response = jsonify(body)
+    response.status_code = status
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
 
+def _submit(table_id, depositor, items, key=None):
+    # (본문, 상태 코드, 재사용 여부) 반환
     table = StoreTable.query.get(table_id)
     if not table:
-        return jsonify({"error": "존재하지 않는 테이블입니다."}), 404
-
-    if not table.is_occupied:
-        table.is_occupied = True
-        db.session.add(table)
-
-    order = Order(
-        table_id=table_id,
-        depositor_name=depositor,
-        total_amount=0,
-        order_status='결제대기'
-    )
-    db.session.add(order)
-    db.session.flush()
-
-    total = 0
-    for item in items:
-        menu = Menu.query.get(item['menu_id'])
-        if not menu or not menu.is_available:
-            return jsonify({"error": f"{item['menu_id']}번 메뉴는 주문할 수 없습니다."}), 400
-
-        quantity = int(item['quantity'])
-        unit_price = int(menu.price)
-        subtotal = quantity * unit_price
-
-        detail = OrderDetail(
-            order_id=order.order_id,
-            menu_id=menu.menu_id,
-            quantity=quantity,
-            unit_price=unit_price,
-            subtotal=subtotal
-        )
-        db.session.add(detail)
-        total += subtotal
-
-    order.total_amount = total
-    db.session.commit()
-
-    return jsonify({
+        return {"error": "존재하지 않는 테이블입니다."}, 404, False
+
+    # 메뉴는 한 번에 불러오고, 재고 차감까지 한 트랜잭션 (실패하면 주문 전체 롤백)
+    try:
+        lines = parse_items(items)
+        # 다른 워커가 이미 처리한 재시도
+        existing = key and submitted_order(table_id, key, depositor, lines)
+        if existing:
+            return _accepted(existing.order_id), 201, True
+        menus = load_menus(menu_id for menu_id, _ in lines)
+        order = place_order(table, depositor, lines, menus, '결제대기', key)
+        settle_stock(quantities_of(lines), Counter(), menus)
+        db.session.commit()
+    except OrderError as e:
+        db.session.rollback()
+        return {"error": e.message}, e.status_code, False
+    except IntegrityError:
+        # 같은 키가 다른 워커에서 방금 먼저 들어갔다
+        db.session.rollback()
+        if not key:
+            raise
+        try:
+            existing = submitted_order(table_id, key, depositor, lines)
+        except OrderError as e:
+            return {"error": e.message}, e.status_code, False
+        if existing is None:
+            raise
+        return _accepted(existing.order_id), 201, True
+
+    return _accepted(order.order_id), 201, False
+
+
+def _accepted(order_id):
+    return {
         "message": "주문이 접수되었습니다.",
-        "order_id": order.order_id
-    }), 201
+        "order_id": order_id
+    }
 
 
 @order_bp.route('/payment_info/<int:order_id>', methods=['GET'])
 def get_payment_info(order_id):
-    order = Order.query.get(order_id)
+    order = load_order(order_id)
     if not order:
         return jsonify({"error": "주문이 존재하지 않습니다."}), 404
 
-    details = OrderDetail.query.filter_by(order_id=order_id).all()
+    details = order.order_details
     detail_data = [
         {
             "menu_name": d.menu.menu_name,
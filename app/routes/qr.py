@@ -0,0 +1,76 @@
+import re
+from flask import Blueprint, request, jsonify, redirect, render_template, send_from_directory, current_app, abort
+from app.models import db, StoreTable
+from app.qr import qr_service, save_qr_codes, saved_qr_codes
+
+qr_bp = Blueprint('qr', __name__, url_prefix='/qr', template_folder='../../templates')
+
+DIGEST = re.compile(r'^[0-9a-f]{20}$')
+
+
+def _table_ids(requested):
+    # 요청한 테이블 중 실제 있는 것만 (없으면 전체)
+    query = StoreTable.query
+    if requested:
+        query = query.filter(StoreTable.table_id.in_(requested))
+    return [table.table_id for table in query.order_by(StoreTable.table_id)]
+
+
+def _generate(table_ids):
+    # 없는 이미지만 그리고 qr_codes 를 맞춘다
+    entries = qr_service.ensure(table_ids)
+    save_qr_codes(entries)
+    db.session.commit()
+    return entries
+
+
+# 테이블 QR 이미지 (내용 주소 이미지로 보낸다)
+# GET 은 조회만 한다, QR 은 POST /qr/generate 로 미리 만든다
+@qr_bp.route('/table/<int:table_id>', methods=['GET'])
+def get_table_qr(table_id):
+    if not StoreTable.query.get(table_id):
+        return jsonify({"error": "해당 테이블이 존재하지 않습니다."}), 404
+    entries = saved_qr_codes([table_id])
+    if not entries:
+        return jsonify({"error": "QR 코드가 아직 생성되지 않았습니다. POST /qr/generate 로 만들어 주세요."}), 404
+    [(_, _, digest)] = entries
+    return redirect(f"/qr/{digest}.png")
+
+
+# 내용이 바뀌면 이름도 바뀌므로 오래 캐시해도 된다
+@qr_bp.route('/<digest>.png', methods=['GET'])
+def get_qr_image(digest):
+    if not DIGEST.match(digest):
+        abort(404)
+    response = send_from_directory(current_app.config['QR_DIR'], f"{digest}.png", max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+# 여러 테이블 QR 한 번에 생성 {"table_ids": [1, 2, ...]} (생략하면 전체)
+@qr_bp.route('/generate', methods=['POST'])
+def generate_qr_codes():
+    data = request.get_json(silent=True) or {}
+    table_ids = _table_ids(data.get('table_ids'))
+    try:
+        entries = _generate(table_ids)
+    except ImportError:
+        return jsonify({"error": "QR 생성 모듈(qrcode)이 설치되어 있지 않습니다."}), 503
+
+    return jsonify([
+        {
+            "table_id": table_id,
+            "qr_code_url": f"/qr/{digest}.png",
+            "redirect_url": url
+        } for table_id, url, digest in entries
+    ])
+
+
+# 인쇄용 QR 시트 (?table_ids=1,2,3, 생략하면 전체), 생성된 QR 만 싣는다
+@qr_bp.route('/sheet', methods=['GET'])
+def get_qr_sheet():
+    requested = [int(v) for v in request.args.get('table_ids', '').split(',') if v.strip().isdigit()]
+    entries = saved_qr_codes(_table_ids(requested))
+    if not entries:
+        return jsonify({"error": "QR 코드가 아직 생성되지 않았습니다. POST /qr/generate 로 만들어 주세요."}), 404
+    return render_template('qr_sheet.html', entries=entries)
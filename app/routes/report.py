@@ -0,0 +1,109 @@
+from datetime import date, datetime, timedelta
+from flask import Blueprint, request, jsonify
+from sqlalchemy import func
+from app.models import db, Menu, MenuSalesHourly, OrderStatusDaily, TableSession, TableSessionSales, read_replica
+
+report_bp = Blueprint('report', __name__, url_prefix='/report')
+
+
+def _period():
+    # ?from=&to= (ISO 시각), 생략하면 오늘 하루
+    today = datetime.combine(date.today(), datetime.min.time())
+    start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else today
+    end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else start + timedelta(days=1)
+    return start, end
+
+
+# 메뉴별 판매 수량/매출 (?hourly=1 이면 시간대별로 나눈다)
+@report_bp.route('/menus', methods=['GET'])
+@read_replica
+def get_menu_sales():
+    try:
+        start, end = _period()
+    except ValueError:
+        return jsonify({"error": "시간 형식이 올바르지 않습니다."}), 400
+
+    hourly = request.args.get('hourly') == '1'
+    columns = [MenuSalesHourly.menu_id, Menu.menu_name]
+    if hourly:
+        columns.append(MenuSalesHourly.hour)
+    rows = db.session.query(
+        *columns,
+        func.sum(MenuSalesHourly.quantity).label('quantity'),
+        func.sum(MenuSalesHourly.revenue).label('revenue')
+    ).outerjoin(Menu, Menu.menu_id == MenuSalesHourly.menu_id).filter(
+        MenuSalesHourly.hour >= start,
+        MenuSalesHourly.hour < end
+    ).group_by(*columns).having(
+        # 주문했다가 모두 취소된 메뉴는 0 으로 남으므로 뺀다
+        (func.sum(MenuSalesHourly.quantity) != 0) | (func.sum(MenuSalesHourly.revenue) != 0)
+    ).order_by(*columns[2:], func.sum(MenuSalesHourly.revenue).desc())
+
+    result = []
+    for row in rows:
+        item = {
+            "menu_id": row.menu_id,
+            "menu_name": row.menu_name,
+            "quantity": int(row.quantity),
+            "revenue": int(row.revenue)
+        }
+        if hourly:
+            item["hour"] = row.hour.isoformat()
+        result.append(item)
+    return jsonify(result)
+
+
+# 테이블 세션별 주문 수/매출 (세션을 연 시각 기준)
+@report_bp.route('/tables', methods=['GET'])
+@read_replica
+def get_table_sales():
+    try:
+        start, end = _period()
+    except ValueError:
+        return jsonify({"error": "시간 형식이 올바르지 않습니다."}), 400
+
+    query = db.session.query(TableSessionSales, TableSession).join(
+        TableSession, TableSession.session_id == TableSessionSales.session_id
+    ).filter(
+        TableSession.opened_at >= start,
+        TableSession.opened_at < end,
+        TableSessionSales.order_count != 0
+    )
+    table_id = request.args.get('table_id', type=int)
+    if table_id is not None:
+        query = query.filter(TableSessionSales.table_id == table_id)
+
+    return jsonify([
+        {
+            "session_id": sales.session_id,
+            "table_id": sales.table_id,
+            "opened_at": session.opened_at.isoformat(),
+            "closed_at": session.closed_at.isoformat() if session.closed_at else None,
+            "order_count": sales.order_count,
+            "revenue": int(sales.revenue)
+        } for sales, session in query.order_by(TableSession.opened_at, TableSession.session_id)
+    ])
+
+
+# 날짜별 주문 상태 건수/금액 (?from=&to= 는 날짜)
+@report_bp.route('/status', methods=['GET'])
+@read_replica
+def get_status_summary():
+    try:
+        start, end = _period()
+    except ValueError:
+        return jsonify({"error": "시간 형식이 올바르지 않습니다."}), 400
+
+    rows = OrderStatusDaily.query.filter(
+        OrderStatusDaily.day >= start.date(),
+        OrderStatusDaily.day < end.date(),
+        OrderStatusDaily.order_count != 0     # 다른 상태로 모두 옮겨간 줄
+    ).order_by(OrderStatusDaily.day, OrderStatusDaily.order_status)
+
+    result = {}
+    for row in rows:
+        result.setdefault(row.day.isoformat(), {})[row.order_status] = {
+            "order_count": row.order_count,
+            "total_amount": int(row.total_amount)
+        }
+    return jsonify(result)
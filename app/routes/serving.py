@@ -1,37 +1,17 @@
-from flask import Blueprint, request, jsonify, Response, stream_with_context
-from app.models import db, Order, OrderDetail
-import json
-import time
+from flask import Blueprint, request, jsonify
+from app.models import db, Order
+from app.events import record_served_event
+from app.models.orders import change_status, serve_details
+from app.serving_queue import QueueStream, serving_queue
+from app.sse import sse_response
 serving_bp = Blueprint('serving', __name__, url_prefix='/serving')
 
 
 # ✅ GET /serving - 서빙할 항목 목록 불러오기
 @serving_bp.route('', methods=['GET'])
 def get_serving_orders():
-    orders = Order.query.filter_by(order_status="결제확인").order_by(Order.created_at.asc()).all()
-    result = []
-
-    for order in orders:
-        details = OrderDetail.query.filter_by(order_id=order.order_id, is_served=False).all()
-        item_list = []
-
-        for d in details:
-            item_list.append({
-                "order_detail_id": d.order_detail_id,
-                "table_id": order.table_id,
-                "menu_name": d.menu.menu_name,
-                "quantity": d.quantity,
-                "is_served": d.is_served
-            })
-
-        if item_list:
-            result.append({
-                "order_id": order.order_id,
-                "order_time": order.order_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "items": item_list
-            })
-
-    return jsonify(result)
+    # 메모리 대기열에서 바로 만든다 (주문 이벤트가 있을 때만 DB 를 읽는다)
+    return jsonify(serving_queue.pending_items())
 
 
 # ✅ POST /serving/complete - 개별 항목 서빙 완료 처리
@@ -42,27 +22,48 @@ def complete_serving_item():
 
     if not order_detail_id:
         return jsonify({"error": "order_detail_id 누락"}), 400
-
-    detail = OrderDetail.query.get(order_detail_id)
-    if not detail:
+    try:
+        order_detail_id = int(order_detail_id)
+    except (TypeError, ValueError):
+        return jsonify({"error": "order_detail_id 형식이 올바르지 않습니다."}), 400
+
+    # 항목 UPDATE 와 주문 완료 조건부 UPDATE 를 한 트랜잭션으로
+    found, _ = serve_details([order_detail_id])
+    order = found.get(order_detail_id)
+    if order is None:
         return jsonify({"error": "해당 항목이 존재하지 않습니다."}), 404
-
-    detail.is_served = True
+    # 커밋하면 만료되므로 응답 값은 먼저 읽어 둔다
+    order_id, fully_served = order.order_id, order.order_status == "완료"
     db.session.commit()
 
-    # 주문 전체 항목 서빙 완료 여부 확인
-    order_id = detail.order_id
-    remaining = OrderDetail.query.filter_by(order_id=order_id, is_served=False).count()
+    return jsonify({
+        "message": "항목 서빙 완료",
+        "order_id": order_id,
+        "fully_served": fully_served
+    })
 
-    if remaining == 0:
-        order = Order.query.get(order_id)
-        order.order_status = "완료"
-        db.session.commit()
+
+# 여러 항목 한 번에 서빙 완료 {"order_detail_ids": [1, 2, ...]}, 다 서빙된 주문은 완료 처리
+@serving_bp.route('/complete/batch', methods=['POST'])
+def complete_serving_items():
+    data = request.get_json(silent=True) or {}
+    order_detail_ids = data.get('order_detail_ids')
+    if not isinstance(order_detail_ids, list) or not order_detail_ids:
+        return jsonify({"error": "order_detail_ids 누락"}), 400
+    try:
+        order_detail_ids = list(dict.fromkeys(int(i) for i in order_detail_ids))
+    except (TypeError, ValueError):
+        return jsonify({"error": "order_detail_ids 형식이 올바르지 않습니다."}), 400
+
+    found, completed = serve_details(order_detail_ids)
+    completed_ids = [order.order_id for order in completed]
+    db.session.commit()
 
     return jsonify({
         "message": "항목 서빙 완료",
-        "order_id": order_id,
-        "fully_served": (remaining == 0)
+        "order_detail_ids": [i for i in order_detail_ids if i in found],
+        "missing": [i for i in order_detail_ids if i not in found],
+        "completed_order_ids": completed_ids
     })
 
 @serving_bp.route('/completeall', methods=['POST'])
@@ -77,10 +78,15 @@ def complete_entire_order():
     if not order:
         return jsonify({"error": "주문이 존재하지 않습니다."}), 404
 
+    served_ids = []
     for item in order.order_details:
-        item.is_served = True
+        if not item.is_served:
+            item.is_served = True
+            served_ids.append(item.order_detail_id)
 
-    order.order_status = '완료'
+    if served_ids:
+        record_served_event(order.order_id, order.table_id, served_ids)
+    change_status(order, '완료')
     db.session.commit()
 
     return jsonify({
@@ -89,41 +95,9 @@ def complete_entire_order():
         "message": "주문 전체가 서빙 완료 처리되었습니다."
     })
     
+# 처음에 대기열 스냅샷, 이후에는 대기열 이벤트만 보낸다 (Last-Event-ID 로 이어 받기)
+# (order_confirmed, order_amended, item_served, order_cancelled, order_completed, order_removed)
 @serving_bp.route('/sse', methods=['GET'])
 def order_stream():
-    def event_stream():
-        last_sent_id = 0
-        while True:
-            new_orders = Order.query.filter(
-                Order.order_status == "결제확인",
-                Order.order_id > last_sent_id  
-            ).order_by(Order.order_id).all()
-
-            for order in new_orders:
-                details = OrderDetail.query.filter_by(order_id=order.order_id).all()
-                order_dict = {
-                    "order_id": order.order_id,
-                    "table_id": order.table_id,
-                    "depositor_name": order.depositor_name,
-                    "total_amount": float(order.total_amount),
-                    "order_status": order.order_status,
-                    "order_time": str(order.order_time),
-                    "created_at": str(order.created_at),
-                    "details": [
-                        {
-                            "order_detail_id": d.order_detail_id,
-                            "menu_id": d.menu_id,
-                            "menu_name": d.menu.menu_name,
-                            "quantity": d.quantity,
-                            "unit_price": float(d.unit_price),
-                            "subtotal": float(d.subtotal),
-                            "is_served": d.is_served
-                        } for d in details
-                    ]
-                }
-                yield f"data: {json.dumps(order_dict, ensure_ascii=False)}\n\n"
-                last_sent_id = order.order_id
-
-            time.sleep(3)  # 클라이언트에 주기적으로 업데이트 (3초 간격)
-
-    return Response(stream_with_context(event_stream()), content_type='text/event-stream')
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    return sse_response(QueueStream(last_event_id))
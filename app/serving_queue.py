@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+from collections import deque
+
+from app.events import TOPIC_ORDERS, EventCursor, bus, order_payload
+from app.fastjson import dumps_bytes, join_array
+from app.models import Order, on_primary
+from app.models.queries import load_orders
+
+# SSE 재접속 시 이어서 보낼 수 있도록 메모리에 남겨 두는 최근 대기열 이벤트 수
+RECENT_EVENTS = 2000
+
+
+def stream_order(order):
+    # 주방/서빙 SSE 로 보내는 주문 형태
+    return {
+        "order_id": order["order_id"],
+        "table_id": order["table_id"],
+        "depositor_name": order["depositor_name"],
+        "total_amount": order["total_amount"],
+        "order_status": order["status"],
+        "order_time": order["order_time"],
+        "created_at": order["order_time"],
+        "details": [
+            {
+                "order_detail_id": d["order_detail_id"],
+                "menu_id": d["menu_id"],
+                "menu_name": d["menu_name"],
+                "quantity": d["quantity"],
+                "unit_price": d["unit_price"],
+                "subtotal": d["subtotal"],
+                "is_served": d["is_served"]
+            } for d in order["details"]
+        ]
+    }
+
+
+class ServingQueue:
+    """주방/서빙 대기열(결제확인 주문)을 메모리에 들고 있는 프로젝션.
+
+    처음 쓸 때 DB 에서 한 번 만들고, 이후에는 주문 토픽 버전이 바뀔 때만
+    change_events 에서 새 이벤트를 읽어 반영한다 (id 순서와 다르게 늦게 커밋된
+    이벤트도 EventCursor 가 다시 찾아 반영한다). 결제확인/수동 주문/서빙
+    완료/취소는 모두 이벤트를 남기므로 목록 조회는 DB 없이 O(대기 주문 수)
+    로 끝난다.
+
+    반영한 이벤트는 SSE 용 대기열 이벤트(order_confirmed, order_amended,
+    item_served, order_cancelled, order_completed, order_removed)로 바꿔
+    최근 RECENT_EVENTS 개까지 남겨 두고, 스트림은 여기서 이어 받는다.
+    SSE id 는 event_id 가 아니라 반영한 순서("<세대>.<순번>")라서 늦게 커밋된
+    이벤트도 앞선 id 뒤에 붙는다 (세대가 다른 프로세스/재구성이면 스냅샷부터).
+    SSE 조각은 한 번만 인코딩해서 모든 스트림이 같이 쓴다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._orders = None         # order_id -> 주문 (order_payload 형식)
+        self._cursor = None         # change_events 를 어디까지 반영했는지 (늦게 커밋된 id 포함)
+        self._version = None
+        self._epoch = None          # 다시 만들 때마다 바뀌는 세대 (SSE id 앞부분)
+        self._seq = 0               # 대기열 이벤트 순번
+        self._recent = deque()      # (순번, SSE 조각)
+        self._fragments = {}        # order_id -> 스냅샷용 주문 JSON 바이트
+        self._floor = 0             # 이 순번 이후부터 _recent 로 이어 보낼 수 있다
+
+    def pending_items(self):
+        # GET /kitchen, /serving 응답: 서빙 안 된 항목이 남은 주문만, 주문 순서대로
+        with self._lock:
+            self._sync()
+            result = []
+            for order_id in sorted(self._orders):
+                order = self._orders[order_id]
+                items = [
+                    {
+                        "order_detail_id": d["order_detail_id"],
+                        "table_id": order["table_id"],
+                        "menu_name": d["menu_name"],
+                        "quantity": d["quantity"],
+                        "is_served": d["is_served"]
+                    } for d in order["details"] if not d["is_served"]
+                ]
+                if items:
+                    result.append({
+                        "order_id": order_id,
+                        "order_time": order["order_time"],
+                        "items": items
+                    })
+            return result
+
+    def snapshot(self):
+        # (지금 위치 SSE id, 결제확인 주문 목록 JSON 바이트)
+        with self._lock:
+            self._sync()
+            fragments = []
+            for order_id in sorted(self._orders):
+                fragment = self._fragments.get(order_id)
+                if fragment is None:
+                    fragment = self._fragments[order_id] = dumps_bytes(stream_order(self._orders[order_id]))
+                fragments.append(fragment)
+            return self._position(), join_array(fragments)
+
+    def changes_after(self, position):
+        # position(SSE id) 이후 (지금 위치, 대기열 이벤트 목록), 이어 보낼 수 없으면 None (스냅샷부터 다시)
+        with self._lock:
+            self._sync()
+            epoch, _, seq = (position or '').partition('.')
+            if epoch != self._epoch or not seq.isdigit() or not self._floor <= int(seq) <= self._seq:
+                return None
+            return self._position(), [chunk for number, chunk in self._recent if number > int(seq)]
+
+    def _position(self):
+        return f"{self._epoch}.{self._seq}"
+
+    def _sync(self):
+        # 조회 전에 버전을 먼저 읽어야 조회 중에 들어온 변경을 놓치지 않는다
+        version = bus.version((TOPIC_ORDERS,))
+        if self._orders is not None and version == self._version:
+            return
+        with on_primary():
+            if self._orders is None:
+                self._rebuild()
+            else:
+                for event, _ in self._cursor.read():
+                    change = self._apply(event.event_type, json.loads(event.payload))
+                    if change:
+                        name, data = change
+                        self._seq += 1
+                        self._recent.append((
+                            self._seq,
+                            f"id: {self._position()}\nevent: {name}\ndata: {dumps_bytes(data).decode('utf-8')}\n\n"
+                        ))
+                while len(self._recent) > RECENT_EVENTS:
+                    self._floor = self._recent.popleft()[0]
+        self._version = version
+
+    def _rebuild(self):
+        self._cursor = EventCursor.at_latest()
+        self._epoch = os.urandom(4).hex()
+        self._seq = self._floor = 0
+        self._recent.clear()
+        self._fragments.clear()
+        orders = load_orders(Order.order_status == "결제확인", order_by=Order.order_id)
+        self._orders = {
+            order.order_id: order_payload(order, order.order_details) for order in orders
+        }
+
+    def _apply(self, event_type, payload):
+        # 대기열에 생긴 변화를 (이벤트 이름, 데이터) 로 반환, 상관없는 이벤트면 None
+        if event_type in ('order_created', 'order_amended', 'order_status'):
+            order = payload.get("order")
+            if order and order["status"] == "결제확인":
+                known = order["order_id"] in self._orders
+                self._orders[order["order_id"]] = order
+                self._fragments.pop(order["order_id"], None)
+                name = 'order_amended' if event_type == 'order_amended' and known else 'order_confirmed'
+                return name, stream_order(order)
+
+            order_id = order["order_id"] if order else payload["order_id"]
+            self._fragments.pop(order_id, None)
+            if self._orders.pop(order_id, None) is None:
+                return None
+            status = order["status"] if order else payload["status"]
+            name = {'취소': 'order_cancelled', '완료': 'order_completed'}.get(status, 'order_removed')
+            return name, {"order_id": order_id, "status": status}
+
+        if event_type == 'item_served':
+            order = self._orders.get(payload["order_id"])
+            if not order:
+                return None
+            served = set(payload["order_detail_ids"])
+            # 다른 스레드가 들고 있는 이전 목록은 건드리지 않도록 새로 만든다
+            self._orders[order["order_id"]] = dict(order, details=[
+                dict(d, is_served=True) if d["order_detail_id"] in served else d
+                for d in order["details"]
+            ])
+            self._fragments.pop(order["order_id"], None)
+            return 'item_served', payload
+        return None
+
+
+class QueueStream:
+    """주방/서빙 SSE: 처음에 대기열 스냅샷, 이후에는 대기열 이벤트만 보낸다.
+
+    재접속 시 Last-Event-ID 가 이 프로세스 메모리에 남은 범위 안이면 그 다음
+    이벤트부터 이어서 보내고, 아니면 스냅샷부터 다시 보낸다.
+    """
+
+    topics = (TOPIC_ORDERS,)
+
+    def __init__(self, last_event_id=None):
+        self.closed = False
+        self.last_event_id = last_event_id
+
+    def poll(self):
+        changes = serving_queue.changes_after(self.last_event_id)
+        if changes is None:
+            self.last_event_id, orders = serving_queue.snapshot()
+            payload = b'{"orders":%s}' % orders
+            # 스냅샷은 이벤트 이름 없이 보낸다 (onmessage 로 받아 목록을 통째로 바꾼다)
+            return [f"id: {self.last_event_id}\ndata: {payload.decode('utf-8')}\n\n"]
+
+        self.last_event_id, chunks = changes
+        return chunks
+
+
+serving_queue = ServingQueue()
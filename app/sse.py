@@ -0,0 +1,31 @@
+from flask import Response, current_app, stream_with_context
+from app.events import bus
+from app.models import db
+
+
+def sse_response(stream):
+    """stream.topics 가 바뀔 때만 stream.poll() 을 다시 실행하는 SSE 응답.
+
+    변경이 없는 동안에는 하트비트 주석만 보내 연결이 끊기지 않게 한다.
+    """
+    heartbeat = current_app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+
+    def event_stream():
+        while True:
+            # 조회 전에 버전을 먼저 읽어야 조회 중에 들어온 변경을 놓치지 않는다
+            seen = bus.version(stream.topics)
+            try:
+                chunks = stream.poll()
+            finally:
+                # 트랜잭션을 끝내고 커넥션을 풀에 돌려준다 (다음 조회에서 새 데이터가 보인다)
+                db.session.close()
+
+            for chunk in chunks:
+                yield chunk
+            if stream.closed:
+                break
+
+            while bus.wait(stream.topics, seen, timeout=heartbeat) is None:
+                yield ": keep-alive\n\n"
+
+    return Response(stream_with_context(event_stream()), content_type='text/event-stream')
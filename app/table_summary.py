@@ -0,0 +1,44 @@
+import threading
+
+from app.events import bus, table_topic
+from app.models import db, StoreTable, on_primary
+from app.models.queries import table_summaries
+
+
+class TableSummaryCache:
+    """테이블별 집계 결과를 테이블 토픽 버전과 함께 들고 있는 캐시.
+
+    주문/정리 알림이 온 테이블만 다시 집계하므로, 변경이 없으면 DB 조회
+    없이 O(테이블 수) 로 대시보드를 만든다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = None       # table_id -> 집계 결과
+        self._versions = {}     # table_id -> 집계 당시 토픽 버전
+
+    def get(self):
+        with self._lock, on_primary():
+            if self._rows is None:
+                self._refresh(None)
+            else:
+                stale = [
+                    table_id for table_id in self._rows
+                    if bus.version((table_topic(table_id),)) != self._versions[table_id]
+                ]
+                if stale:
+                    self._refresh(stale)
+            return [self._rows[table_id] for table_id in sorted(self._rows)]
+
+    def _refresh(self, table_ids):
+        if table_ids is None:
+            table_ids = [table_id for (table_id,) in db.session.query(StoreTable.table_id)]
+            self._rows = {}
+        # 조회 전에 버전을 먼저 읽어야 조회 중에 들어온 변경을 놓치지 않는다
+        versions = {table_id: bus.version((table_topic(table_id),)) for table_id in table_ids}
+        for row in table_summaries(table_ids):
+            self._rows[row["table_id"]] = row
+            self._versions[row["table_id"]] = versions[row["table_id"]]
+
+
+table_summary_cache = TableSummaryCache()
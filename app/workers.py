@@ -0,0 +1,37 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+
+
+class WorkerPool:
+    """이미지를 그리는 프로세스 풀 (QR, 메뉴 이미지), 처음 쓸 때 띄운다.
+
+    크기는 설정 config_key 값이다. 스레드가 도는 서버 안이라 fork 대신
+    spawn 으로 띄운다.
+    """
+
+    def __init__(self, config_key, default=2):
+        self.config_key = config_key
+        self.default = default
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=current_app.config.get(self.config_key, self.default),
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+
+def write_atomic(path, data):
+    # 다른 요청이 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓰고 바꿔 끼운다
+    temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp, 'wb') as f:
+        f.write(data)
+    os.replace(temp, path)
@@ -0,0 +1,14 @@
+# asgi.py - SSE 연결을 asyncio 로 처리하는 서버 모드
+# 실행: python asgi.py  또는  uvicorn asgi:asgi_app --host 0.0.0.0 --port 3000
+from app import create_app
+from app.asgi import create_asgi_app
+from flask_cors import CORS
+
+
+app = create_app()
+CORS(app)
+asgi_app = create_asgi_app(app)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(asgi_app, host="0.0.0.0", port=3000)
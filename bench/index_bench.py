@@ -0,0 +1,133 @@
+# bench/index_bench.py - 복합 인덱스 적용 전/후 조회 시간 비교
+# 실행: python bench/index_bench.py [--uri mysql+pymysql://...] [--orders 100000]
+# --uri 를 생략하면 임시 SQLite 파일에서 측정한다. (지정한 DB 의 테이블은 지우고 다시 만든다)
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from app.models import db, Order, OrderDetail  # noqa: E402
+
+TABLES = 40
+MENUS = 20
+
+QUERIES = {
+    # 주방/서빙 목록
+    "kitchen_list": (
+        "SELECT order_id, table_id, order_time FROM orders "
+        "WHERE order_status = '결제확인' ORDER BY created_at"
+    ),
+    # 주방/서빙 SSE 새 주문
+    "sse_new_orders": (
+        "SELECT order_id FROM orders "
+        "WHERE order_status = '결제확인' AND order_id > :last_id ORDER BY order_id"
+    ),
+    # 테이블 주문 내역
+    "table_orders": (
+        "SELECT order_id, order_status, total_amount FROM orders "
+        "WHERE table_id = :table_id AND created_at >= :since"
+    ),
+    # 서빙 완료 후 남은 항목 수
+    "unserved_count": (
+        "SELECT count(*) FROM order_details WHERE order_id = :order_id AND is_served = 0"
+    ),
+}
+
+
+def seed(engine, order_count):
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO categories (category_id, category_name) VALUES (1, 'bench')"))
+        conn.execute(text("INSERT INTO menus (menu_id, category_id, menu_name, price) VALUES (:id, 1, :name, 5000)"),
+                     [{"id": i, "name": f"menu{i}"} for i in range(1, MENUS + 1)])
+        conn.execute(text("INSERT INTO store_tables (table_id, is_occupied) VALUES (:id, 1)"),
+                     [{"id": i} for i in range(1, TABLES + 1)])
+
+    start = datetime.now() - timedelta(days=30)
+    batch = 5000
+    detail_id = 1
+    for offset in range(0, order_count, batch):
+        orders, details = [], []
+        for order_id in range(offset + 1, min(offset + batch, order_count) + 1):
+            created = start + timedelta(seconds=order_id * 20)
+            # 최근 200건만 진행 중, 나머지는 지난 주문
+            recent = order_id > order_count - 200
+            status = random.choice(['결제대기', '결제확인']) if recent else random.choice(['완료', '완료', '완료', '취소'])
+            orders.append({
+                "order_id": order_id, "table_id": random.randint(1, TABLES), "depositor_name": "bench",
+                "total_amount": 10000, "order_status": status, "created_at": created, "order_time": created,
+            })
+            for _ in range(2):
+                details.append({
+                    "order_detail_id": detail_id, "order_id": order_id, "menu_id": random.randint(1, MENUS),
+                    "quantity": 1, "unit_price": 5000, "subtotal": 5000, "is_served": not recent,
+                })
+                detail_id += 1
+        with engine.begin() as conn:
+            conn.execute(Order.__table__.insert(), orders)
+            conn.execute(OrderDetail.__table__.insert(), details)
+
+
+def hot_indexes():
+    return list(Order.__table__.indexes) + list(OrderDetail.__table__.indexes)
+
+
+def measure(engine, order_count, repeat):
+    params = {
+        "kitchen_list": lambda: {},
+        "sse_new_orders": lambda: {"last_id": order_count - 100},
+        "table_orders": lambda: {
+            "table_id": random.randint(1, TABLES),
+            "since": datetime.now() - timedelta(hours=6),
+        },
+        "unserved_count": lambda: {"order_id": random.randint(1, order_count)},
+    }
+    result = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                conn.execute(text(sql), params[name]()).fetchall()
+                samples.append((time.perf_counter() - t0) * 1000)
+            result[name] = statistics.median(samples)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri")
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    uri = args.uri or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.sqlite')}"
+    engine = create_engine(uri)
+
+    print(f"seeding {args.orders} orders ...")
+    seed(engine, args.orders)
+
+    for index in hot_indexes():
+        index.drop(engine, checkfirst=True)
+    before = measure(engine, args.orders, args.repeat)
+
+    for index in hot_indexes():
+        index.create(engine, checkfirst=True)
+    after = measure(engine, args.orders, args.repeat)
+
+    print(f"\n{'query':20} {'before(ms)':>12} {'after(ms)':>12} {'speedup':>9}")
+    for name in QUERIES:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:20} {before[name]:12.3f} {after[name]:12.3f} {speedup:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# bench/json_bench.py - JSON 직렬화 경로 비교 (DB 없이 합성 데이터로)
+# 실행: python bench/json_bench.py [--orders 200] [--menus 60] [--queue 40] [--streams 50] [--rounds 300]
+#
+# 같은 응답을 여러 방법으로 만들어 초당 처리 횟수를 비교한다.
+#   json       : json.dumps(..., ensure_ascii=False)   (지금까지 SSE/메뉴 경로)
+#   flask      : Flask 기본 JSON 공급자                  (지금까지 jsonify 경로)
+#   orjson     : OrjsonProvider                          (JSON_PROVIDER=orjson)
+#   fragments  : 캐시된 조각 바이트를 잇기만 함             (끝난 주문, 대기열 스냅샷)
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app.fastjson import FragmentCache, OrjsonProvider, dumps_bytes, join_array, orjson  # noqa: E402
+from app.routes.cashier import order_row  # noqa: E402
+
+
+def closed_orders(n):
+    # page_orders 가 돌려주는 Order 객체 흉내 (완료 주문)
+    return [
+        SimpleNamespace(
+            order_id=i,
+            table_id=i % 30 + 1,
+            depositor_name=f"손님{i}",
+            total_amount=Decimal(3000 * (i % 7 + 1)),
+            order_status="완료",
+            order_time=datetime(2025, 5, 20, 19, i % 60, i % 60),
+            updated_at=datetime(2025, 5, 20, 20, 0, 0),
+            order_details=[
+                SimpleNamespace(menu=SimpleNamespace(menu_name=f"메뉴{j}"), quantity=j) for j in range(1, 4)
+            ]
+        ) for i in range(1, n + 1)
+    ]
+
+
+def menu_items(n):
+    return [
+        {
+            "menu_id": i,
+            "menu_name": f"메뉴{i}",
+            "description": "축제 한정 메뉴입니다. 맵기 조절이 가능합니다.",
+            "price": 3000 + i * 500,
+            "image_url": f"/static/menu/{i}.jpg",
+            "stock_quantity": random.randint(0, 100),
+            "is_available": True
+        } for i in range(1, n + 1)
+    ]
+
+
+def queue_orders(n):
+    return [
+        {
+            "order_id": i,
+            "table_id": i % 30 + 1,
+            "depositor_name": f"손님{i}",
+            "total_amount": 12000,
+            "order_status": "결제확인",
+            "order_time": "2025-05-20 19:30:00",
+            "created_at": "2025-05-20 19:30:00",
+            "details": [
+                {
+                    "order_detail_id": i * 10 + j,
+                    "menu_id": j,
+                    "menu_name": f"메뉴{j}",
+                    "quantity": 2,
+                    "unit_price": 3000,
+                    "subtotal": 6000,
+                    "is_served": False
+                } for j in range(1, 4)
+            ]
+        } for i in range(1, n + 1)
+    ]
+
+
+def measure(label, fn, rounds):
+    result = fn()
+    size = len(result[0] if isinstance(result, list) else result)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:10} {rounds / elapsed:10.1f} ops/s {elapsed / rounds * 1000:8.3f} ms/op {size:8d} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200, help="주문 관리 한 페이지 주문 수")
+    parser.add_argument("--menus", type=int, default=60)
+    parser.add_argument("--queue", type=int, default=40, help="주방/서빙 대기 주문 수")
+    parser.add_argument("--streams", type=int, default=50, help="스냅샷을 받는 SSE 연결 수")
+    parser.add_argument("--rounds", type=int, default=300)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = [("flask", DefaultJSONProvider(app))]
+    if orjson is not None:
+        providers.append(("orjson", OrjsonProvider(app)))
+    else:
+        print("orjson 이 설치돼 있지 않아 orjson 항목은 건너뛴다")
+
+    orders = closed_orders(args.orders)
+    closed = FragmentCache()
+    print(f"\n주문 관리 목록 ({args.orders}건, 전부 완료 주문, 행 만들기 포함)")
+    measure("json", lambda: json.dumps(
+        {"orders": [order_row(o) for o in orders], "next_cursor": "abc"}, ensure_ascii=False
+    ).encode('utf-8'), args.rounds)
+    for label, provider in providers:
+        measure(label, lambda: provider.dumps(
+            {"orders": [order_row(o) for o in orders], "next_cursor": "abc"}
+        ).encode('utf-8'), args.rounds)
+    measure("fragments", lambda: b'{"orders":%s,"next_cursor":%s}' % (
+        join_array([
+            closed.get((o.order_id, o.order_status, o.updated_at, o.total_amount), lambda: order_row(o))
+            for o in orders
+        ]),
+        dumps_bytes("abc")
+    ), args.rounds)
+
+    items = menu_items(args.menus)
+    categories = [
+        {"category_id": c, "category_name": f"분류{c}", "menus": items[c::6]} for c in range(6)
+    ]
+    print(f"\n메뉴 카탈로그 ({args.menus}개 메뉴, 재고가 바뀐 직후 다시 인코딩)")
+    measure("json", lambda: json.dumps(categories, ensure_ascii=False).encode('utf-8'), args.rounds)
+    for label, provider in providers:
+        measure(label, lambda: provider.dumps(categories).encode('utf-8'), args.rounds)
+
+    orders = queue_orders(args.queue)
+    fragments = [dumps_bytes(o) for o in orders]
+    print(f"\n주방/서빙 스냅샷 ({args.queue}건 x SSE {args.streams}개)")
+    rounds = max(1, args.rounds // 10)
+    measure("json", lambda: [
+        json.dumps({"orders": orders}, ensure_ascii=False) for _ in range(args.streams)
+    ], rounds)
+    if orjson is not None:
+        measure("orjson", lambda: [dumps_bytes({"orders": orders}) for _ in range(args.streams)], rounds)
+    measure("fragments", lambda: [
+        b'{"orders":%s}' % join_array(fragments) for _ in range(args.streams)
+    ], rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# bench/service_night.py - 축제 하루 저녁 트래픽을 흉내 내는 부하 테스트
+# 실행: python bench/service_night.py [--uri mysql+pymysql://...] [--tables 30] [--sse 20] [--duration 30]
+# --uri 를 생략하면 임시 SQLite 파일을 쓴다. (지정한 DB 의 테이블은 지우고 다시 만든다)
+#
+# create_app() 을 그대로 띄우고 테스트 클라이언트로 여러 스레드에서 동시에 요청한다.
+#   손님: QR 메뉴 조회 -> 주문 제출 (가끔 결제 정보 조회)
+#   캐셔: 테이블 현황/주문 관리 조회, 결제 확인
+#   서빙/주방: 목록 조회, 항목 서빙 완료
+#   SSE: 주방/서빙/테이블 메뉴 스트림을 N 개 열어 두고 받은 이벤트 수를 센다
+# 엔드포인트별 p50/p95/p99 지연, 처리량, 요청당 DB 쿼리 수를 출력한다.
+import argparse
+import os
+import queue
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.models import db, Category, Menu, StoreTable  # noqa: E402
+from config import Config  # noqa: E402
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.sse_events = defaultdict(int)
+        self.local = threading.local()
+
+    def on_query(self, *args):
+        label = getattr(self.local, 'label', None)
+        if label:
+            with self.lock:
+                self.queries[label] += 1
+
+    def call(self, label, fn):
+        self.local.label = label
+        t0 = time.perf_counter()
+        try:
+            response = fn()
+        finally:
+            elapsed = (time.perf_counter() - t0) * 1000
+            self.local.label = None
+        with self.lock:
+            self.latency[label].append(elapsed)
+            if response.status_code >= 500 or response.status_code in (404, 405):
+                self.errors[label] += 1
+        return response
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def seed(app, tables, menus):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Category(category_id=1, category_name='메인', display_order=1))
+        db.session.add(Category(category_id=2, category_name='음료', display_order=2))
+        for i in range(1, menus + 1):
+            db.session.add(Menu(
+                menu_id=i, category_id=1 if i % 3 else 2, menu_name=f'메뉴{i}',
+                description='벤치마크', price=3000 + i * 500, stock_quantity=100000, is_available=True
+            ))
+        for t in range(1, tables + 1):
+            db.session.add(StoreTable(table_id=t, is_occupied=False))
+        db.session.commit()
+
+
+def customer(app, rec, stop, args, pending):
+    client = app.test_client()
+    while not stop.is_set():
+        table_id = random.randint(1, args.tables)
+        rec.call('GET /menu/<table_id>', lambda: client.get(f'/menu/{table_id}'))
+        items = [
+            {"menu_id": random.randint(1, args.menus), "quantity": random.randint(1, 3)}
+            for _ in range(random.randint(1, 4))
+        ]
+        r = rec.call('POST /order/submit', lambda: client.post('/order/submit', json={
+            "table_id": table_id, "depositor": f"손님{table_id}", "items": items
+        }))
+        if r.status_code == 201:
+            order_id = r.get_json()['order_id']
+            pending.put(order_id)
+            if random.random() < 0.3:
+                rec.call('GET /order/payment_info/<id>', lambda: client.get(f'/order/payment_info/{order_id}'))
+        time.sleep(random.uniform(0, args.think))
+
+
+def cashier(app, rec, stop, args, pending):
+    client = app.test_client()
+    while not stop.is_set():
+        rec.call('GET /cashier/tables', lambda: client.get('/cashier/tables'))
+        if random.random() < 0.2:
+            rec.call('GET /cashier/ordermanagement', lambda: client.get('/cashier/ordermanagement'))
+        try:
+            order_id = pending.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        rec.call('POST /cashier/confirm_order', lambda: client.post('/cashier/confirm_order', json={"order_id": order_id}))
+
+
+def server(app, rec, stop, args):
+    client = app.test_client()
+    while not stop.is_set():
+        rec.call('GET /kitchen', lambda: client.get('/kitchen'))
+        r = rec.call('GET /serving', lambda: client.get('/serving'))
+        orders = r.get_json() or []
+        for order in orders[:3]:
+            for item in order['items'][:2]:
+                rec.call('POST /serving/complete', lambda: client.post('/serving/complete', json={
+                    "order_detail_id": item['order_detail_id']
+                }))
+        time.sleep(random.uniform(0, args.think))
+
+
+def listener(app, rec, stop, url, label):
+    client = app.test_client()
+    # 스트림 제너레이터는 이 스레드에서 돌기 때문에 여기서 실행된 쿼리는 SSE 몫이다
+    rec.local.label = label
+    response = client.get(url, buffered=False)
+    try:
+        for chunk in response.response:
+            if not chunk.startswith(b':'):
+                with rec.lock:
+                    rec.sse_events[label] += 1
+            if stop.is_set():
+                break
+    finally:
+        response.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri")
+    parser.add_argument("--tables", type=int, default=30)
+    parser.add_argument("--menus", type=int, default=20)
+    parser.add_argument("--customers", type=int, default=8, help="동시에 주문하는 손님 스레드 수")
+    parser.add_argument("--cashiers", type=int, default=1)
+    parser.add_argument("--servers", type=int, default=2)
+    parser.add_argument("--sse", type=int, default=20, help="열어 둘 SSE 연결 수")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--think", type=float, default=0.2, help="요청 사이 최대 대기(초)")
+    args = parser.parse_args()
+
+    uri = args.uri or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.sqlite')}"
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}} if uri.startswith("sqlite") else {}
+        SSE_HEARTBEAT_SECONDS = 1
+
+    app = create_app(BenchConfig)
+    seed(app, args.tables, args.menus)
+
+    rec = Recorder()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', rec.on_query)
+
+    stop = threading.Event()
+    pending = queue.Queue()
+    threads = []
+    for i in range(args.sse):
+        kind = i % 3
+        if kind == 0:
+            url, label = f'/menu/sse/{i % args.tables + 1}', 'SSE /menu/sse/<table_id>'
+        elif kind == 1:
+            url, label = '/kitchen/sse', 'SSE /kitchen/sse'
+        else:
+            url, label = '/serving/sse', 'SSE /serving/sse'
+        threads.append(threading.Thread(target=listener, args=(app, rec, stop, url, label)))
+    threads += [threading.Thread(target=customer, args=(app, rec, stop, args, pending)) for _ in range(args.customers)]
+    threads += [threading.Thread(target=cashier, args=(app, rec, stop, args, pending)) for _ in range(args.cashiers)]
+    threads += [threading.Thread(target=server, args=(app, rec, stop, args)) for _ in range(args.servers)]
+
+    print(f"running {args.duration}s: {args.customers} customers, {args.cashiers} cashiers, "
+          f"{args.servers} servers, {args.sse} SSE listeners, {args.tables} tables")
+    started = time.perf_counter()
+    for t in threads:
+        t.daemon = True
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join(timeout=5)
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(v) for v in rec.latency.values())
+    print(f"\n{'endpoint':32} {'count':>7} {'err':>5} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'q/req':>7}")
+    for label in sorted(rec.latency):
+        samples = rec.latency[label]
+        print(f"{label:32} {len(samples):7d} {rec.errors[label]:5d} "
+              f"{statistics.median(samples):9.2f} {percentile(samples, 95):9.2f} {percentile(samples, 99):9.2f} "
+              f"{rec.queries[label] / len(samples):7.1f}")
+    print(f"\nthroughput: {total / elapsed:.1f} req/s ({total} requests in {elapsed:.1f}s)")
+    for label in sorted(rec.sse_events):
+        print(f"{label:32} {rec.sse_events[label]:7d} events {rec.queries[label]:7d} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Config:
     FLASK_ENV = os.getenv("FLASK_ENV")
     SECRET_KEY = os.getenv("SECRET_KEY", "default-secret")
@@ -11,4 +13,75 @@ class Config:
         f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASS')}"
         f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
     )
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # 커넥션 풀 (SSE 연결이 많아도 풀이 바닥나지 않도록, 끊긴 커넥션은 미리 걸러낸다)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 280)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+    # 읽기 복제본 (DB_REPLICA_HOST 가 있을 때만, 조회 전용 엔드포인트가 사용)
+    SQLALCHEMY_BINDS = {
+        "replica": (
+            f"mysql+pymysql://{os.getenv('DB_REPLICA_USER', os.getenv('DB_USER'))}"
+            f":{os.getenv('DB_REPLICA_PASS', os.getenv('DB_PASS'))}"
+            f"@{os.getenv('DB_REPLICA_HOST')}:{os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT'))}"
+            f"/{os.getenv('DB_REPLICA_NAME', os.getenv('DB_NAME'))}"
+        )
+    } if os.getenv("DB_REPLICA_HOST") else {}
+
+    # asgi 로 띄울 때 Flask 요청/SSE 조회를 동시에 처리하는 스레드 수 (워커 프로세스마다, DB 풀 크기 이하 권장)
+    WSGI_THREADS = int(os.getenv("WSGI_THREADS", 20))
+
+    # SSE 연결 유지용 하트비트 간격(초)
+    SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+
+    # 먼저 받은 change_events id 가 늦게 커밋될 수 있어서, 빈 id 를 다시 찾아보는 시간(초)
+    EVENT_GAP_GRACE_SECONDS = int(os.getenv("EVENT_GAP_GRACE_SECONDS", 30))
+
+    # 캐셔 테이블 현황을 변경된 테이블만 다시 집계 (여러 워커면 FANOUT_URL 필요)
+    TABLE_SUMMARY_CACHE = os.getenv("TABLE_SUMMARY_CACHE", "false").lower() == "true"
+
+    # 요청별 쿼리 수/시간 측정 + /metrics (기본 꺼짐), 이 시간(ms) 이상 걸린 요청은 SQL 과 함께 로그
+    # 로그에는 가장 느린 SLOW_REQUEST_MAX_STATEMENTS 개 문장만 남긴다
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 500))
+    SLOW_REQUEST_MAX_STATEMENTS = int(os.getenv("SLOW_REQUEST_MAX_STATEMENTS", 10))
+
+    # 주문 제출 멱등 키를 기억하는 시간(초)과 최대 개수 (프로세스별)
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 600))
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 10000))
+
+    # jsonify 직렬화기: orjson (설치돼 있을 때만) 또는 default (표준 json)
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+
+    # 워커 간 변경 알림 채널: unix:///tmp/order-fanout (같은 머신) 또는 redis://host:6379/0
+    FANOUT_URL = os.getenv("FANOUT_URL", "")
+
+    # 테이블 QR: 담을 주소({table_id} 자리), 이미지 보관 위치, 그리는 프로세스 수
+    QR_TABLE_URL = os.getenv("QR_TABLE_URL", "http://localhost:3000/table/{table_id}")
+    QR_DIR = os.getenv("QR_DIR", os.path.join(BASE_DIR, "static", "qrcodes"))
+    QR_WORKERS = int(os.getenv("QR_WORKERS", 2))
+
+    # 마감(완료/취소) 후 이 시간이 지난 주문을 보관 테이블로 옮긴다
+    ARCHIVE_AFTER_HOURS = float(os.getenv("ARCHIVE_AFTER_HOURS", 12))
+    # 보관 작업 자동 실행 간격(분), 0 이면 flask archive-orders 로만 실행 (여러 워커면 MySQL 잠금을 잡은 한 곳만 돈다)
+    ARCHIVE_INTERVAL_MINUTES = int(os.getenv("ARCHIVE_INTERVAL_MINUTES", 0))
+
+    # 이 시간보다 오래된 change_events 를 EVENT_PRUNE_INTERVAL_MINUTES 마다 지운다 (0 이면 flask prune-events 로만)
+    EVENT_RETENTION_HOURS = float(os.getenv("EVENT_RETENTION_HOURS", 12))
+    EVENT_PRUNE_INTERVAL_MINUTES = int(os.getenv("EVENT_PRUNE_INTERVAL_MINUTES", 10))
+
+    # 은행 입금 내역 CSV 인코딩 (은행에 따라 cp949), 요청에서 encoding 으로 바꿀 수 있다
+    STATEMENT_ENCODING = os.getenv("STATEMENT_ENCODING", "utf-8-sig")
+
+    # 메뉴 이미지 원본/변형 보관 위치, 만들 폭(px, 작은 것부터), 그리는 프로세스 수
+    IMAGE_DIR = os.getenv("IMAGE_DIR", os.path.join(BASE_DIR, "static", "images"))
+    IMAGE_WIDTHS = sorted(int(w) for w in os.getenv("IMAGE_WIDTHS", "160,320,640").split(","))
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+    # 이미지 업로드 요청 본문 최대 크기 (바이트)
+    IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", 10 * 1024 * 1024))
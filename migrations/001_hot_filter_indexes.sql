@@ -0,0 +1,8 @@
+-- 주방/서빙/테이블 조회에서 자주 쓰는 필터 컬럼 복합 인덱스
+-- app/models/__init__.py 의 __table_args__ 와 이름을 맞춰 둔다
+
+CREATE INDEX ix_orders_table_created ON orders (table_id, created_at);
+CREATE INDEX ix_orders_status_order ON orders (order_status, order_id);
+CREATE INDEX ix_orders_status_created ON orders (order_status, created_at);
+
+CREATE INDEX ix_order_details_order_served ON order_details (order_id, is_served);
@@ -0,0 +1,3 @@
+-- 주문 관리 화면 커서 페이지네이션 ((created_at, order_id) 내림차순)
+
+CREATE INDEX ix_orders_created_order ON orders (created_at, order_id);
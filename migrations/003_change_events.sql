@@ -0,0 +1,11 @@
+-- SSE 증분 이벤트 로그 (event_id 가 SSE 의 id / Last-Event-ID 로 쓰인다)
+
+CREATE TABLE change_events (
+    event_id BIGINT NOT NULL AUTO_INCREMENT,
+    event_type VARCHAR(30) NOT NULL,
+    table_id INT NULL,
+    payload TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (event_id),
+    INDEX ix_change_events_table_event (table_id, event_id)
+);
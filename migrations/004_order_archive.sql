@@ -0,0 +1,45 @@
+-- 마감(완료/취소)된 오래된 주문 보관 테이블 (app/archive.py, flask archive-orders)
+-- 컬럼은 원본과 같고 archived_at 만 더 있다, 이름은 app/models/__init__.py 와 맞춘다
+
+CREATE TABLE orders_archive (
+    order_id INT NOT NULL,
+    table_id INT NULL,
+    depositor_name VARCHAR(50) NOT NULL,
+    total_amount DECIMAL(10, 2) NOT NULL DEFAULT 0,
+    order_status ENUM('결제대기', '결제확인', '완료', '취소') NULL,
+    order_time DATETIME NULL,
+    order_number VARCHAR(10) NULL,
+    created_at DATETIME NULL,
+    updated_at DATETIME NULL,
+    archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (order_id),
+    INDEX ix_orders_archive_created_order (created_at, order_id),
+    INDEX ix_orders_archive_table_created (table_id, created_at)
+);
+
+CREATE TABLE order_details_archive (
+    order_detail_id INT NOT NULL,
+    order_id INT NOT NULL,
+    menu_id INT NOT NULL,
+    quantity INT NULL DEFAULT 1,
+    unit_price DECIMAL(10, 2) NOT NULL,
+    subtotal DECIMAL(10, 2) NOT NULL,
+    is_served TINYINT(1) NULL DEFAULT 0,
+    created_at DATETIME NULL,
+    PRIMARY KEY (order_detail_id),
+    INDEX ix_order_details_archive_order (order_id)
+);
+
+CREATE TABLE payments_archive (
+    payment_id INT NOT NULL,
+    order_id INT NOT NULL,
+    amount DECIMAL(10, 2) NOT NULL,
+    payment_status ENUM('대기중', '완료', '환불', '취소') NULL,
+    is_verified TINYINT(1) NULL DEFAULT 0,
+    payment_method ENUM('계좌이체', '기타') NULL,
+    check_time DATETIME NULL,
+    created_at DATETIME NULL,
+    updated_at DATETIME NULL,
+    PRIMARY KEY (payment_id),
+    INDEX ix_payments_archive_order (order_id)
+);
@@ -0,0 +1,26 @@
+-- 매출 집계 테이블 (app/rollups.py), 주문을 쓰는 트랜잭션 안에서 같이 더한다
+-- 처음 만든 뒤나 어긋났을 때는 flask rebuild-rollups 로 다시 채운다
+
+CREATE TABLE menu_sales_hourly (
+    menu_id INT NOT NULL,
+    hour DATETIME NOT NULL,
+    quantity INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (menu_id, hour)
+);
+
+CREATE TABLE table_session_sales (
+    table_id INT NOT NULL,
+    session_start DATETIME NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_id, session_start)
+);
+
+CREATE TABLE order_status_daily (
+    day DATE NOT NULL,
+    order_status ENUM('결제대기', '결제확인', '완료', '취소') NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, order_status)
+);
@@ -0,0 +1,66 @@
+-- 테이블 세션: 첫 주문에 열고 테이블 정리(reset)에서 닫는다 (app/models/orders.py open_session/close_session)
+-- 현재 주문 조회가 created_at >= store_tables.updated_at 범위 비교 대신 orders.session_id 같음 조회가 된다
+
+CREATE TABLE table_sessions (
+    session_id INT NOT NULL AUTO_INCREMENT,
+    table_id INT NOT NULL,
+    opened_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    closed_at DATETIME NULL,
+    PRIMARY KEY (session_id),
+    INDEX ix_table_sessions_table_opened (table_id, opened_at),
+    CONSTRAINT fk_table_sessions_table FOREIGN KEY (table_id) REFERENCES store_tables (table_id)
+);
+
+ALTER TABLE store_tables
+    ADD COLUMN current_session_id INT NULL AFTER is_occupied,
+    ADD CONSTRAINT fk_store_tables_current_session FOREIGN KEY (current_session_id) REFERENCES table_sessions (session_id);
+
+ALTER TABLE orders
+    ADD COLUMN session_id INT NULL AFTER table_id,
+    ADD INDEX ix_orders_session_created (session_id, created_at),
+    ADD CONSTRAINT fk_orders_session FOREIGN KEY (session_id) REFERENCES table_sessions (session_id);
+
+ALTER TABLE orders_archive ADD COLUMN session_id INT NULL AFTER table_id;
+
+-- 지금 점유 중인 테이블: 마지막 점유 시각부터 세션을 연다 (지금까지의 updated_at 범위와 같다)
+INSERT INTO table_sessions (table_id, opened_at)
+SELECT table_id, updated_at FROM store_tables WHERE is_occupied = 1;
+
+UPDATE orders o
+JOIN table_sessions s ON s.table_id = o.table_id AND s.closed_at IS NULL
+SET o.session_id = s.session_id
+WHERE o.created_at >= s.opened_at;
+
+UPDATE store_tables t
+JOIN table_sessions s ON s.table_id = t.table_id AND s.closed_at IS NULL
+SET t.current_session_id = s.session_id, t.updated_at = t.updated_at;
+
+-- 지난 주문: 정확한 점유 구간은 남아 있지 않으므로 테이블/날짜별로 닫힌 세션 하나씩 만든다
+INSERT INTO table_sessions (table_id, opened_at, closed_at)
+SELECT table_id, MIN(created_at), MAX(created_at) FROM (
+    SELECT table_id, created_at FROM orders WHERE session_id IS NULL AND table_id IS NOT NULL
+    UNION ALL
+    SELECT table_id, created_at FROM orders_archive WHERE table_id IS NOT NULL
+) legacy
+GROUP BY table_id, DATE(created_at);
+
+UPDATE orders o
+JOIN table_sessions s ON s.table_id = o.table_id AND s.closed_at IS NOT NULL AND DATE(s.opened_at) = DATE(o.created_at)
+SET o.session_id = s.session_id
+WHERE o.session_id IS NULL;
+
+UPDATE orders_archive o
+JOIN table_sessions s ON s.table_id = o.table_id AND s.closed_at IS NOT NULL AND DATE(s.opened_at) = DATE(o.created_at)
+SET o.session_id = s.session_id
+WHERE o.session_id IS NULL;
+
+-- 테이블 세션 매출 집계를 세션 기준으로 바꾼다 (적용 후 flask rebuild-rollups)
+DROP TABLE table_session_sales;
+
+CREATE TABLE table_session_sales (
+    session_id INT NOT NULL,
+    table_id INT NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id)
+);
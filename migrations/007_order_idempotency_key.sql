@@ -0,0 +1,9 @@
+-- 주문 제출 멱등 키: 워커 프로세스가 여러 개여도 같은 (테이블, 요청 키) 주문은 하나만 들어간다
+-- 나중에 들어온 쪽은 유일 제약 위반으로 롤백하고 먼저 들어간 주문을 돌려준다 (app/routes/order.py)
+-- NULL 은 서로 겹치지 않으므로 키 없이 들어온 주문에는 영향이 없다
+
+ALTER TABLE orders
+    ADD COLUMN idempotency_key VARCHAR(128) NULL AFTER updated_at,
+    ADD CONSTRAINT uq_orders_table_idempotency UNIQUE (table_id, idempotency_key);
+
+ALTER TABLE orders_archive ADD COLUMN idempotency_key VARCHAR(128) NULL AFTER updated_at;
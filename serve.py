@@ -0,0 +1,29 @@
+# serve.py - 운영용 실행: 여러 워커 프로세스로 asgi 앱을 띄운다
+# 실행: python serve.py [--workers 4] [--host 0.0.0.0] [--port 3000]
+#
+# 워커마다 메모리 캐시/SSE 버스가 따로 있으므로 FANOUT_URL 로 변경 알림을 나눈다.
+# FANOUT_URL 이 없으면 같은 머신용 유닉스 소켓 디렉터리를 만들어 쓴다.
+# 여러 머신이면 FANOUT_URL=redis://host:6379/0 (redis 패키지 필요)
+import argparse
+import os
+import tempfile
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 3000)))
+    args = parser.parse_args()
+
+    # 워커 프로세스는 이 환경 변수를 물려받아 같은 채널에 붙는다
+    if args.workers > 1 and not os.getenv("FANOUT_URL"):
+        os.environ["FANOUT_URL"] = "unix://" + tempfile.mkdtemp(prefix="order-fanout-")
+
+    uvicorn.run("asgi:asgi_app", host=args.host, port=args.port, workers=args.workers, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
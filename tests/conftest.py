@@ -0,0 +1,51 @@
+import pytest
+
+from app import create_app
+from app.catalog import catalog
+from app.idempotency import order_submissions
+from app.models import db, Category, Menu, StoreTable
+from app.serving_queue import serving_queue
+from app.table_summary import table_summary_cache
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path):
+    # 파일 SQLite 를 쓴다 (동시성 테스트에서 여러 스레드가 같은 DB 를 본다)
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.sqlite'}"
+        SQLALCHEMY_BINDS = {}
+        FANOUT_URL = ''
+        ARCHIVE_INTERVAL_MINUTES = 0
+        EVENT_PRUNE_INTERVAL_MINUTES = 0
+        TABLE_SUMMARY_CACHE = False
+        METRICS_ENABLED = True
+
+    # 프로세스 전역 캐시/프로젝션은 테스트마다 새 DB 를 보므로 비운다
+    for cache in (catalog, order_submissions, serving_queue, table_summary_cache):
+        cache.__init__()
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app):
+    # 메뉴 하나(재고 stock)와 테이블 tables 개
+    def seed(stock=None, tables=1, price=5000):
+        db.session.add(Category(category_id=1, category_name="분식"))
+        db.session.add(Menu(menu_id=1, category_id=1, menu_name="떡볶이", price=price, stock_quantity=stock))
+        for table_id in range(1, tables + 1):
+            db.session.add(StoreTable(table_id=table_id))
+        db.session.commit()
+    return seed
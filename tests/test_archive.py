@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from app import archive
+from app.models import db, ArchivedOrder, ChangeEvent, Order
+
+
+def closed_order(client):
+    order_id = client.post('/order/submit', json={
+        "table_id": 1, "depositor": "손님", "items": [{"menu_id": 1, "quantity": 1}]
+    }).get_json()["order_id"]
+    client.delete('/cashier/order/delete', json={"order_id": order_id})
+    Order.query.filter_by(order_id=order_id).update(
+        {Order.updated_at: datetime.now() - timedelta(days=2)}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+def test_archive_moves_old_closed_orders(client, seed):
+    seed()
+    closed_order(client)
+
+    assert archive.archive_closed_orders(timedelta(hours=12)) == 1
+    assert (Order.query.count(), ArchivedOrder.query.count()) == (0, 1)
+
+
+def test_archive_skips_when_another_worker_holds_the_lock(client, seed, monkeypatch):
+    seed()
+    closed_order(client)
+
+    @contextmanager
+    def busy():
+        yield False
+
+    monkeypatch.setattr(archive, 'archive_lock', busy)
+    assert archive.archive_closed_orders(timedelta(hours=12)) is None
+    assert Order.query.count() == 1
+
+
+def add_event(hours_ago):
+    db.session.add(ChangeEvent(
+        event_type='stock_changed', payload='{}', created_at=datetime.now() - timedelta(hours=hours_ago)
+    ))
+
+
+def test_prune_removes_only_old_events_in_batches(app):
+    for hours_ago in (30, 20, 14, 1, 0):
+        add_event(hours_ago)
+    db.session.commit()
+
+    assert archive.prune_change_events(timedelta(hours=12), batch_size=2) == 3
+    assert [e.created_at > datetime.now() - timedelta(hours=2) for e in ChangeEvent.query] == [True, True]
+    assert archive.prune_change_events(timedelta(hours=12)) == 0
+
+
+def test_prune_runs_without_archiving(app, client, seed):
+    # 보관을 꺼 둬도 (ARCHIVE_INTERVAL_MINUTES=0) 이벤트 정리는 CLI/주기 작업으로 돈다
+    seed()
+    closed_order(client)
+    ChangeEvent.query.update({ChangeEvent.created_at: datetime.now() - timedelta(days=1)})
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['prune-events'])
+    assert result.exit_code == 0
+    assert ChangeEvent.query.count() == 0
+    assert Order.query.count() == 1
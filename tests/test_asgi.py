@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+from flask import Flask, Response, request
+
+from app.asgi import create_asgi_app
+
+
+async def call(app, method, path, body=b'', headers=()):
+    # (응답 시작 메시지, 본문 바이트)
+    messages = []
+    chunks = [body[:3], body[3:]]
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {'type': 'http.request', 'body': chunk, 'more_body': bool(chunks)}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'headers': list(headers),
+        'http_version': '1.1', 'root_path': ''
+    }
+    await app(scope, receive, send)
+    return messages[0], b''.join(m.get('body', b'') for m in messages[1:])
+
+
+async def get(app, path):
+    _, body = await call(app, 'GET', path)
+    return body.decode('utf-8')
+
+
+def test_flask_requests_run_concurrently():
+    flask_app = Flask(__name__)
+
+    @flask_app.route('/slow')
+    def slow():
+        time.sleep(0.3)
+        return threading.current_thread().name
+
+    app = create_asgi_app(flask_app)
+
+    async def main():
+        return await asyncio.gather(*[get(app, '/slow') for _ in range(4)])
+
+    started = time.monotonic()
+    threads = asyncio.run(main())
+    # 스레드 하나에서 차례로 돌면 1.2초 이상 걸린다
+    assert time.monotonic() - started < 1.0
+    assert len(set(threads)) == 4
+
+
+def test_request_and_streamed_response_pass_through():
+    flask_app = Flask(__name__)
+    closed = []
+
+    @flask_app.route('/echo', methods=['POST'])
+    def echo():
+        prefix, data = request.headers['X-Prefix'].encode('utf-8'), request.get_data()
+
+        def generate():
+            try:
+                yield prefix
+                yield data
+            finally:
+                closed.append(True)
+        return Response(generate(), status=201, headers={'X-Handled': 'yes'})
+
+    app = create_asgi_app(flask_app)
+    start, body = asyncio.run(call(
+        app, 'POST', '/echo', body=b'hello world', headers=[(b'x-prefix', b'> '), (b'content-length', b'11')]
+    ))
+
+    assert start['status'] == 201
+    assert (b'x-handled', b'yes') in start['headers']
+    assert body == b'> hello world'
+    assert closed == [True]
+
+
+def test_too_many_duplicate_headers_is_400():
+    app = create_asgi_app(Flask(__name__))
+    start, body = asyncio.run(call(app, 'GET', '/', headers=[(b'x-dup', b'1')] * 101))
+    assert start['status'] == 400
@@ -0,0 +1,51 @@
+import pytest
+
+from app.models import db, Menu, Order
+
+
+def stock():
+    db.session.expire_all()
+    return db.session.get(Menu, 1).stock_quantity
+
+
+def test_batch_is_all_or_nothing_when_one_entry_is_out_of_stock(client, seed):
+    seed(stock=3, tables=2)
+    response = client.post('/cashier/orders/batch', json={"orders": [
+        {"table_id": 1, "depositor_name": "가", "items": [{"menu_id": 1, "quantity": 2}]},
+        {"table_id": 2, "depositor_name": "나", "items": [{"menu_id": 1, "quantity": 2}]},
+    ]})
+    assert response.status_code == 409
+    assert Order.query.count() == 0
+    assert stock() == 3
+
+    response = client.post('/cashier/orders/batch', json={"orders": [
+        {"table_id": 1, "depositor_name": "가", "items": [{"menu_id": 1, "quantity": 2}]},
+        {"table_id": 2, "depositor_name": "나", "items": [{"menu_id": 1, "quantity": 1}]},
+    ]})
+    assert response.status_code == 201
+    assert len(response.get_json()["order_ids"]) == 2
+    assert stock() == 0
+
+
+@pytest.mark.parametrize('body', [
+    {"orders": [1]},
+    {"orders": ["a", {"table_id": 1}]},
+    {"orders": {"table_id": 1}},
+    {"orders": []},
+    [1, 2],
+])
+def test_batch_rejects_malformed_orders(client, seed, body):
+    seed(stock=3)
+    response = client.post('/cashier/orders/batch', json=body)
+    assert response.status_code == 400
+    assert Order.query.count() == 0
+
+
+def test_batch_reports_index_of_bad_entry(client, seed):
+    seed(stock=3)
+    response = client.post('/cashier/orders/batch', json={"orders": [
+        {"table_id": 1, "depositor_name": "가", "items": [{"menu_id": 1, "quantity": 1}]},
+        {"table_id": 1, "depositor_name": "나", "items": "떡볶이"},
+    ]})
+    assert response.status_code == 400
+    assert response.get_json()["index"] == 1
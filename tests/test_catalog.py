@@ -0,0 +1,48 @@
+from app.events import TOPIC_MENU, TOPIC_STOCK, bus
+
+
+def submit(client, quantity=1):
+    return client.post('/order/submit', json={
+        "table_id": 1, "depositor": "손님", "items": [{"menu_id": 1, "quantity": quantity}]
+    })
+
+
+def conditional(client, etag):
+    return client.get('/menu/catalog', headers={'If-None-Match': etag})
+
+
+def test_orders_do_not_change_the_catalog_etag(client, seed):
+    seed(stock=3)
+    first = client.get('/menu/catalog')
+    etag = first.headers['ETag'].strip('"')
+    assert 'stock_quantity' not in first.get_json()[0]["menus"][0]
+
+    menu_version = bus.version((TOPIC_MENU,))
+    stock_version = bus.version((TOPIC_STOCK,))
+    assert submit(client).status_code == 201
+    assert bus.version((TOPIC_MENU,)) == menu_version
+    assert bus.version((TOPIC_STOCK,)) != stock_version
+
+    assert conditional(client, etag).status_code == 304
+    # 재고는 테이블 메뉴 화면에는 그대로 실린다
+    assert client.get('/menu/1').get_json()["categories"][0]["menus"][0]["stock_quantity"] == 2
+
+
+def test_sold_out_and_restock_change_the_etag(client, seed):
+    seed(stock=1)
+    etag = client.get('/menu/catalog').headers['ETag'].strip('"')
+
+    # 마지막 재고가 팔려서 내려간다
+    order_id = submit(client).get_json()["order_id"]
+    response = conditional(client, etag)
+    assert response.status_code == 200
+    assert response.get_json()[0]["menus"][0]["is_available"] is False
+    assert client.get('/menu/catalog?available=1').get_json()[0]["menus"] == []
+    sold_out = response.headers['ETag'].strip('"')
+
+    # 취소로 재고가 돌아오면 다시 올라간다
+    assert client.delete('/cashier/order/delete', json={"order_id": order_id}).status_code == 200
+    response = conditional(client, sold_out)
+    assert response.status_code == 200
+    assert response.get_json()[0]["menus"][0]["is_available"] is True
+    assert response.headers['ETag'].strip('"') == etag
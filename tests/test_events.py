@@ -0,0 +1,126 @@
+import json
+
+from app.events import TOPIC_ORDERS, EventCursor, notify
+from app.models import db, ChangeEvent, StoreTable
+from app.routes.menu import MenuOrderStream
+from app.serving_queue import QueueStream, ServingQueue
+
+
+def confirmed_order(order_id):
+    return {
+        "order_id": order_id,
+        "table_id": 1,
+        "depositor_name": f"손님{order_id}",
+        "status": "결제확인",
+        "total_amount": 5000,
+        "order_time": "2026-10-18 12:00:00",
+        "details": [{
+            "order_detail_id": order_id * 10,
+            "menu_id": 1,
+            "menu_name": "떡볶이",
+            "quantity": 1,
+            "unit_price": 5000,
+            "subtotal": 5000,
+            "is_served": False
+        }]
+    }
+
+
+def commit_event(event_id, order_id):
+    # id 를 먼저 받은 트랜잭션이 늦게 커밋되는 상황을 id 를 직접 정해서 흉내 낸다
+    db.session.add(ChangeEvent(
+        event_id=event_id,
+        event_type='order_status',
+        table_id=1,
+        payload=json.dumps({"order_id": order_id, "table_id": 1, "status": "결제확인",
+                            "order": confirmed_order(order_id)}, ensure_ascii=False)
+    ))
+    notify(TOPIC_ORDERS)
+    db.session.commit()
+
+
+def pending_order_ids(queue):
+    return [order["order_id"] for order in queue.pending_items()]
+
+
+def test_projection_applies_event_committed_out_of_order(app):
+    queue = ServingQueue()
+    assert pending_order_ids(queue) == []
+
+    commit_event(2, order_id=200)
+    assert pending_order_ids(queue) == [200]
+
+    # id 1 은 id 2 보다 늦게 커밋됐다
+    commit_event(1, order_id=100)
+    assert pending_order_ids(queue) == [100, 200]
+
+
+def test_cursor_tracks_gaps_until_filled(app):
+    cursor = EventCursor(0)
+    commit_event(3, order_id=300)
+    assert [event.event_id for event, _ in cursor.read()] == [3]
+    assert cursor.token() == "3:1,2"
+
+    commit_event(1, order_id=100)
+    assert [(event.event_id, token) for event, token in cursor.read()] == [(1, "3:2")]
+    assert cursor.read() == []
+
+
+def test_cursor_drops_gaps_after_grace(app):
+    app.config['EVENT_GAP_GRACE_SECONDS'] = 0
+    cursor = EventCursor(0)
+    commit_event(2, order_id=200)
+    cursor.read()
+    # 유예 시간이 지난 빈 id 는 롤백된 것으로 보고 더 찾지 않는다
+    cursor.read()
+    assert cursor.token() == "2"
+
+
+def test_cursor_token_round_trip(app):
+    cursor = EventCursor.parse("7:3,5")
+    assert (cursor.last_id, sorted(cursor.gaps)) == (7, [3, 5])
+    assert EventCursor.parse("12").token() == "12"
+    assert EventCursor.parse(None) is None
+    assert EventCursor.parse("abc") is None
+
+
+def event_ids(chunks):
+    return [chunk.split("\n", 1)[0] for chunk in chunks]
+
+
+def test_menu_stream_sends_late_event_and_resumes_with_gaps(app):
+    db.session.add(StoreTable(table_id=1))
+    db.session.commit()
+
+    stream = MenuOrderStream(1)
+    assert event_ids(stream.poll()) == ["id: 0"]
+
+    commit_event(3, order_id=300)
+    assert event_ids(stream.poll()) == ["id: 3:1,2"]
+
+    commit_event(1, order_id=100)
+    assert event_ids(stream.poll()) == ["id: 3:2"]
+
+    # 재접속해도 Last-Event-ID 에 실린 빈 id 를 계속 찾는다
+    resumed = MenuOrderStream(1, "3:2")
+    commit_event(2, order_id=200)
+    assert event_ids(resumed.poll()) == ["id: 3"]
+
+
+def test_queue_stream_sends_late_event_after_earlier_ids(app):
+    stream = QueueStream()
+    snapshot = stream.poll()
+    assert '"orders":[]' in snapshot[0]
+
+    commit_event(2, order_id=200)
+    commit_event(1, order_id=100)
+    chunks = stream.poll()
+    assert [chunk.split("\n")[1] for chunk in chunks] == ["event: order_confirmed"] * 2
+
+    # 늦게 커밋된 id 1 도 앞선 SSE id 뒤에 붙으므로 재접속하면 그 다음부터 이어진다
+    first_id = event_ids(chunks)[0][len("id: "):]
+    resumed = QueueStream(first_id)
+    assert resumed.poll() == chunks[1:]
+
+    # 다른 프로세스(세대)의 id 면 스냅샷부터 다시
+    assert '"orders":[{' in QueueStream("other.1").poll()[0]
@@ -0,0 +1,38 @@
+import threading
+
+from app import fanout as fanout_module
+from app.events import bus
+
+
+class FlakyFanout:
+    # 첫 연결은 메시지 하나를 주고 끊긴다, 다시 연결하면 메시지 하나를 주고 기다린다
+    def __init__(self):
+        self.reconnects = 0
+        self.delivered = threading.Event()
+
+    def listen(self):
+        if self.reconnects == 0:
+            yield ['fanout-test']
+            raise ConnectionError("끊김")
+        yield ['fanout-test']
+        self.delivered.set()
+        threading.Event().wait()
+
+    def reconnect(self):
+        self.reconnects += 1
+
+
+def test_receive_reconnects_and_wakes_everyone(monkeypatch):
+    monkeypatch.setattr(fanout_module, 'RECONNECT_MIN_SECONDS', 0.01)
+    fanout = FlakyFanout()
+    before = bus.version(('fanout-test', 'other'))
+
+    threading.Thread(target=fanout_module.receive, args=(fanout,), daemon=True).start()
+    assert fanout.delivered.wait(5)
+
+    after = bus.version(('fanout-test', 'other'))
+    assert fanout.reconnects == 1
+    assert after[1] == before[1] + 2
+    # 다시 붙으면 놓친 알림이 있을 수 있어 모든 토픽이 바뀐 것으로 보인다
+    assert after[0] == before[0] + 1
+    assert after[2] == before[2]
@@ -0,0 +1,42 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.events import TOPIC_MENU, bus
+from app.fastjson import dumps_bytes
+from app.models import db, Menu, Order
+
+
+def test_dumps_bytes_matches_jsonify(app):
+    value = {"at": datetime(2026, 10, 18, 12, 30), "day": date(2026, 10, 18), "price": Decimal("5000.00"),
+             "name": "떡볶이"}
+    with app.app_context():
+        assert json.loads(dumps_bytes(value)) == json.loads(app.json.dumps(value))
+        assert b'"Sun, 18 Oct 2026 12:30:00 GMT"' in dumps_bytes(value)
+
+
+def summaries(client):
+    return {row["order_id"]: row["menu_summary"] for row in client.get('/cashier/ordermanagement').get_json()["orders"]}
+
+
+def test_closed_order_rows_follow_amendments_and_menu_changes(client, seed):
+    seed()
+    db.session.add(Menu(menu_id=2, category_id=1, menu_name="순대", price=5000))
+    db.session.commit()
+    order_id = client.post('/order/submit', json={
+        "table_id": 1, "depositor": "손님", "items": [{"menu_id": 1, "quantity": 1}]
+    }).get_json()["order_id"]
+    assert client.delete('/cashier/order/delete', json={"order_id": order_id}).status_code == 200
+    assert summaries(client) == {order_id: "떡볶이(1개)"}
+
+    # 금액/상태가 그대로인 수정
+    response = client.put('/cashier/order/update', json={"order_id": order_id, "items": [{"menu_id": 2, "quantity": 1}]})
+    assert response.status_code == 200
+    assert Order.query.get(order_id).order_status == "취소"
+    assert summaries(client) == {order_id: "순대(1개)"}
+
+    # 메뉴 이름 변경 (메뉴 토픽 알림과 함께)
+    Menu.query.get(2).menu_name = "찹쌀순대"
+    db.session.commit()
+    bus.publish(TOPIC_MENU)
+    assert summaries(client) == {order_id: "찹쌀순대(1개)"}
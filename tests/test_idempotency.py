@@ -0,0 +1,78 @@
+import pytest
+
+from app.idempotency import order_submissions
+from app.models import Menu, Order
+from app.routes import order as order_routes
+
+
+def submit(client, **extra):
+    return client.post('/order/submit', json=dict({
+        "table_id": 1, "depositor": "손님", "items": [{"menu_id": 1, "quantity": 1}]
+    }, **extra))
+
+
+def test_repeated_key_replays_first_response(client, seed):
+    seed()
+    first = submit(client, idempotency_key="abc")
+    second = submit(client, idempotency_key="abc")
+
+    assert first.status_code == second.status_code == 201
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert second.get_json() == first.get_json()
+    assert Order.query.count() == 1
+
+
+@pytest.mark.parametrize('key', [123, ["a"], {"k": "v"}])
+def test_non_string_key_is_rejected(client, seed, key):
+    seed()
+    response = submit(client, idempotency_key=key)
+    assert response.status_code == 400
+    assert Order.query.count() == 0
+
+
+def test_retry_on_another_worker_replays_from_database(client, seed):
+    seed(stock=10)
+    first = submit(client, idempotency_key="abc")
+    # 다른 워커 프로세스: 메모리 저장소가 비어 있다
+    order_submissions.__init__()
+    second = submit(client, table_id="1", idempotency_key="abc")
+
+    assert second.status_code == 201
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert second.get_json() == first.get_json()
+    assert Order.query.count() == 1
+    assert Menu.query.get(1).stock_quantity == 9
+
+
+def test_different_order_with_same_key_on_another_worker(client, seed):
+    seed()
+    submit(client, idempotency_key="abc")
+    order_submissions.__init__()
+    response = submit(client, depositor="다른 손님", idempotency_key="abc")
+
+    assert response.status_code == 422
+    assert Order.query.count() == 1
+
+
+def test_concurrent_insert_loses_to_unique_key(client, seed, monkeypatch):
+    seed(stock=10)
+    first = submit(client, idempotency_key="abc").get_json()
+    order_submissions.__init__()
+
+    # 다른 워커가 조회와 삽입 사이에 먼저 넣은 경우: 처음 조회는 비어 있다
+    lookups = iter([None])
+    real = order_routes.submitted_order
+    monkeypatch.setattr(order_routes, 'submitted_order', lambda *args: next(lookups, None) or real(*args))
+    response = submit(client, idempotency_key="abc")
+
+    assert response.status_code == 201
+    assert response.headers['Idempotent-Replayed'] == 'true'
+    assert response.get_json() == first
+    assert Order.query.count() == 1
+    assert Menu.query.get(1).stock_quantity == 9
+
+
+def test_bad_table_id_is_rejected(client, seed):
+    seed()
+    assert submit(client, table_id="일").status_code == 400
+    assert submit(client, table_id=[1]).status_code == 400
@@ -0,0 +1,65 @@
+import io
+import json
+
+import pytest
+from PIL import Image
+
+from app.models import ChangeEvent, Menu
+
+
+@pytest.fixture
+def image_dir(app, tmp_path):
+    app.config.update(IMAGE_DIR=str(tmp_path / 'images'), IMAGE_WIDTHS=[160])
+    return tmp_path / 'images'
+
+
+def png(width=400, height=300):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 40, 40)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def upload(client, data, menu_id=1):
+    return client.post(f'/images/menu/{menu_id}', data={"file": (io.BytesIO(data), 'menu.png')})
+
+
+def test_upload_records_variants_and_serves_them(client, seed, image_dir):
+    seed()
+    response = upload(client, png())
+    assert response.status_code == 200
+    body = response.get_json()
+    assert Menu.query.get(1).image_url == body["image_url"]
+    [variant] = body["image_variants"]
+    assert variant["width"] == 160
+
+    event = ChangeEvent.query.filter_by(event_type='menu_image_changed').one()
+    assert json.loads(event.payload)["image_variants"] == body["image_variants"]
+
+    image = client.get(variant["webp"])
+    assert image.status_code == 200
+    assert Image.open(io.BytesIO(image.data)).size == (160, 120)
+    image.close()
+
+
+def test_rejected_uploads_leave_the_menu_alone(client, seed, image_dir, app):
+    seed()
+    assert upload(client, b"not an image").status_code == 400
+    # 헤더만 멀쩡하고 잘린 파일
+    assert upload(client, png()[:200]).status_code == 400
+    assert upload(client, png(), menu_id=9).status_code == 404
+    assert client.post('/images/menu/1').status_code == 400
+
+    app.config['IMAGE_MAX_BYTES'] = 1024
+    response = upload(client, png(2000, 2000))
+    assert response.status_code == 413
+    assert response.is_json
+    assert Menu.query.get(1).image_url is None
+
+
+def test_variant_of_undecodable_original_is_400(client, image_dir):
+    image_dir.mkdir()
+    digest = "0123456789abcdef0123"
+    (image_dir / f"{digest}.png").write_bytes(b"\x89PNG\r\n\x1a\n broken")
+    response = client.get(f'/images/{digest}-160-v1.webp')
+    assert response.status_code == 400
+    assert response.is_json
@@ -0,0 +1,55 @@
+import logging
+import time
+
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.metrics import DB_QUERIES, SERIALIZE_TIME
+from app.models import db
+
+
+def serialize_total(endpoint):
+    series = SERIALIZE_TIME._series.get(endpoint)
+    return series[-2] if series else 0.0
+
+
+def test_dumps_bytes_counts_as_serialization_time(client, seed):
+    seed()
+    # /menu/<table_id> 는 jsonify 없이 dumps_bytes 조각만으로 응답을 만든다
+    before = serialize_total('menu.get_menu_and_orders')
+    assert client.get('/menu/1').status_code == 200
+    assert serialize_total('menu.get_menu_and_orders') > before
+
+
+def test_failed_statement_does_not_skew_the_next_timing(app):
+    # 실패한 문장의 시작 시각이 남아 있으면 다음 쿼리 시간에 그 사이 시간이 더해진다
+    for _ in range(3):
+        with pytest.raises(OperationalError):
+            db.session.execute(text("SELECT * FROM no_such_table"))
+        db.session.rollback()
+    time.sleep(0.2)
+
+    with app.test_request_context():
+        g.request_stats = {
+            'queries': 0, 'db_time': 0.0, 'serialize_time': 0.0, 'statements': [], 'max_statements': 10
+        }
+        db.session.execute(text("SELECT 1"))
+        assert g.request_stats['queries'] == 1
+        assert g.request_stats['db_time'] < 0.1
+
+
+def test_slow_request_log_keeps_only_the_slowest_statements(app, client, seed, caplog):
+    seed()
+    app.config.update(SLOW_REQUEST_MS=0, SLOW_REQUEST_MAX_STATEMENTS=2)
+    before = DB_QUERIES._series.get('menu.get_menu_and_orders', [0])[-1]
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        assert client.get('/menu/1').status_code == 200
+
+    assert DB_QUERIES._series['menu.get_menu_and_orders'][-1] == before + 1
+    queries = DB_QUERIES._series['menu.get_menu_and_orders'][-2]
+    assert queries > 2
+    message = next(r.getMessage() for r in caplog.records if '느린 요청' in r.getMessage())
+    assert message.count('\n  [') == 2
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import archive
+from app.models import db, Order
+
+# 같은 created_at 이 여러 건씩 (초 단위 시각이라 실제로도 흔하다)
+CREATED = [datetime(2026, 10, 18, 12, 0, 0)] * 4 + [datetime(2026, 10, 18, 11, 0, 0)] * 3 \
+    + [datetime(2026, 10, 18, 13, 0, 0)] * 2
+
+
+@pytest.fixture
+def orders(client, seed):
+    seed()
+    order_ids = []
+    for created_at in CREATED:
+        order_id = client.post('/order/submit', json={
+            "table_id": 1, "depositor": "손님", "items": [{"menu_id": 1, "quantity": 1}]
+        }).get_json()["order_id"]
+        Order.query.filter_by(order_id=order_id).update({Order.created_at: created_at}, synchronize_session=False)
+        order_ids.append(order_id)
+    db.session.commit()
+    # (created_at, order_id) 내림차순이 기대 순서
+    return [order_id for _, order_id in sorted(zip(CREATED, order_ids), reverse=True)]
+
+
+def walk(client, path, limit):
+    seen, cursor = [], None
+    for _ in range(len(CREATED) + 2):
+        query = f'{path}?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(query).get_json()
+        assert len(body["orders"]) <= limit
+        seen.extend(row["order_id"] for row in body["orders"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return seen
+    pytest.fail(f"커서가 끝나지 않습니다: {seen}")
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 4, 9, 10])
+def test_order_management_pages_across_equal_created_at(client, orders, limit):
+    assert walk(client, '/cashier/ordermanagement', limit) == orders
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 4, 9, 10])
+def test_history_pages_across_equal_created_at_and_archive(client, orders, limit):
+    # 같은 시각 묶음의 일부를 보관 테이블로 옮겨서 두 테이블이 섞인 페이지를 만든다
+    archived = orders[1::2]
+    for order_id in archived:
+        client.delete('/cashier/order/delete', json={"order_id": order_id})
+    Order.query.filter(Order.order_id.in_(archived)).update(
+        {Order.updated_at: datetime.now() - timedelta(days=2)}, synchronize_session=False
+    )
+    db.session.commit()
+    assert archive.archive_closed_orders(timedelta(hours=12)) == len(archived)
+
+    assert walk(client, '/cashier/orders/history', limit) == orders
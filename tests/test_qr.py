@@ -0,0 +1,54 @@
+import pytest
+
+from app.models import QRCode
+
+
+@pytest.fixture
+def qr_dir(app, tmp_path):
+    app.config['QR_DIR'] = str(tmp_path / 'qrcodes')
+    return tmp_path / 'qrcodes'
+
+
+def test_reads_do_not_create_qr_codes(client, seed, qr_dir):
+    seed(tables=2)
+    assert client.get('/qr/table/1').status_code == 404
+    assert client.get('/qr/table/9').status_code == 404
+    assert client.get('/qr/sheet').status_code == 404
+    assert QRCode.query.count() == 0
+    assert not qr_dir.exists()
+
+
+def test_generate_then_table_image_and_sheet(client, seed, qr_dir):
+    seed(tables=2)
+    response = client.post('/qr/generate', json={"table_ids": [1]})
+    assert response.status_code == 200
+    [entry] = response.get_json()
+    assert entry["table_id"] == 1
+    assert entry["redirect_url"] == "http://localhost:3000/table/1"
+
+    redirect = client.get('/qr/table/1')
+    assert redirect.status_code == 302
+    assert redirect.headers['Location'].endswith(entry["qr_code_url"])
+
+    image = client.get(entry["qr_code_url"])
+    assert image.status_code == 200
+    assert image.mimetype == 'image/png'
+    assert 'immutable' in image.headers['Cache-Control']
+    assert image.data.startswith(b'\x89PNG')
+    image.close()
+
+    # 시트에는 생성된 테이블만 실린다
+    sheet = client.get('/qr/sheet').get_data(as_text=True)
+    assert entry["qr_code_url"] in sheet
+    assert '테이블 1' in sheet and '테이블 2' not in sheet
+
+    # 다시 생성해도 줄이 늘거나 이미지가 바뀌지 않는다
+    assert client.post('/qr/generate').status_code == 200
+    assert QRCode.query.count() == 2
+    assert client.get('/qr/table/1').headers['Location'] == redirect.headers['Location']
+
+
+def test_bad_or_missing_image_digest(client, qr_dir):
+    assert client.get('/qr/../config.png').status_code == 404
+    assert client.get('/qr/abc.png').status_code == 404
+    assert client.get('/qr/0123456789abcdef0123.png').status_code == 404
@@ -0,0 +1,39 @@
+import pytest
+
+from app.models import db, Menu, Order
+from app.models.queries import load_order, load_orders
+from tests.test_query_counts import count_queries
+
+
+@pytest.fixture
+def orders(client, seed):
+    seed()
+    db.session.add(Menu(menu_id=2, category_id=1, menu_name="순대", price=4000))
+    db.session.commit()
+    order_ids = []
+    for _ in range(5):
+        # 상세 순서를 메뉴 번호와 반대로 넣는다
+        order_ids.append(client.post('/order/submit', json={
+            "table_id": 1, "depositor": "손님",
+            "items": [{"menu_id": 2, "quantity": 1}, {"menu_id": 1, "quantity": 2}]
+        }).get_json()["order_id"])
+    db.session.expire_all()
+    return order_ids
+
+
+def test_load_orders_reads_details_and_menus_in_two_queries(orders):
+    with count_queries() as statements:
+        loaded = load_orders(Order.order_id.in_(orders), order_by=Order.order_id)
+        names = [[(d.menu.menu_name, d.quantity) for d in order.order_details] for order in loaded]
+    assert len(statements) == 2
+    assert [order.order_id for order in loaded] == orders
+    # 상세는 넣은 순서(order_detail_id) 그대로
+    assert names == [[("순대", 1), ("떡볶이", 2)]] * 5
+
+
+def test_load_order(orders):
+    with count_queries() as statements:
+        order = load_order(orders[0])
+        assert [d.menu.menu_name for d in order.order_details] == ["순대", "떡볶이"]
+    assert len(statements) == 2
+    assert load_order(999) is None
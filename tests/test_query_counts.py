@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db, Menu
+
+ENDPOINTS = [
+    '/kitchen',
+    '/serving',
+    '/menu/1',
+    '/cashier/tables',
+    '/cashier/table/1',
+    '/cashier/ordermanagement',
+    '/cashier/orders/history',
+    '/order/payment_info/1',
+]
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def place_orders(client, count):
+    # 메뉴 세 개짜리 주문을 count 개 넣고 결제확인까지 (주방/서빙 대기열에도 올라간다)
+    for _ in range(count):
+        response = client.post('/order/submit', json={
+            "table_id": 1, "depositor": "손님",
+            "items": [{"menu_id": menu_id, "quantity": 1} for menu_id in (1, 2, 3)]
+        })
+        order_id = response.get_json()["order_id"]
+        client.post('/cashier/confirm_order', json={"order_id": order_id})
+
+
+def queries_for(client, path):
+    with count_queries() as statements:
+        assert client.get(path).status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize('path', ENDPOINTS)
+def test_query_count_does_not_grow_with_orders(client, seed, path):
+    seed()
+    db.session.add_all([
+        Menu(menu_id=2, category_id=1, menu_name="순대", price=4000),
+        Menu(menu_id=3, category_id=1, menu_name="튀김", price=3000),
+    ])
+    db.session.commit()
+
+    # 캐시/프로젝션을 먼저 만들어 두고, 두 번 모두 주문이 들어온 직후에 센다
+    place_orders(client, 1)
+    queries_for(client, path)
+
+    place_orders(client, 2)
+    few = queries_for(client, path)
+
+    place_orders(client, 10)
+    many = queries_for(client, path)
+
+    assert many == few
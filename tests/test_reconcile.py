@@ -0,0 +1,111 @@
+import io
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models import db, Order, Payment
+from app.models.orders import OrderError
+from app.reconcile import StatementError, read_deposits, reconcile
+
+
+def deposits(text):
+    return list(read_deposits(io.StringIO(text)))
+
+
+def test_header_found_after_preamble_in_any_column_order():
+    statement = (
+        "국민은행 거래내역\n"
+        "계좌번호,123-45\n"
+        "\n"
+        "거래일시,적요,출금,입금액\n"
+        "2026.10.18 12:00:00,홍 길동,0,\"5,000\"\n"
+        "2026/10/18 12:05:00,출금,3000,0\n"
+        "2026-10-18 12:10:00,김철수,,12000원\n"
+    )
+    rows = deposits(statement)
+    assert [(name, amount) for _, name, amount, _ in rows] == [("홍 길동", 5000), ("김철수", 12000)]
+    assert [line for line, _, _, _ in rows] == [5, 7]
+    assert rows[0][3].hour == 12
+
+
+def test_missing_header_and_bad_amount():
+    with pytest.raises(StatementError):
+        deposits("이름,금액\n홍길동,5000\n")
+    with pytest.raises(StatementError):
+        deposits("입금자명,입금액\n홍길동,오천원\n")
+
+
+def submit(client, depositor, quantity=1):
+    return client.post('/order/submit', json={
+        "table_id": 1, "depositor": depositor, "items": [{"menu_id": 1, "quantity": quantity}]
+    }).get_json()["order_id"]
+
+
+def upload(client, text, query=''):
+    return client.post(f'/cashier/payments/reconcile{query}', data={
+        "file": (io.BytesIO(text.encode('utf-8')), 'statement.csv')
+    })
+
+
+def statuses():
+    db.session.expire_all()
+    return {order.order_id: order.order_status for order in Order.query}
+
+
+def test_identical_orders_are_matched_oldest_first(client, seed):
+    seed()
+    first, second = submit(client, "홍길동"), submit(client, "홍길동")
+    other = submit(client, "김철수", quantity=2)
+
+    response = upload(client, "입금자명,입금액\n홍길동,5000\n김철수,5000\n")
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [row["order_id"] for row in body["matched"]] == [first]
+    # 김철수 주문은 10000원이라 금액이 다르다
+    assert body["unmatched"] == [{"line": 3, "depositor_name": "김철수", "amount": 5000}]
+    assert statuses() == {first: "결제확인", second: "결제대기", other: "결제대기"}
+    assert [p.order_id for p in Payment.query] == [first]
+
+    body = upload(client, "입금자명,입금액\n홍 길동,5000\n").get_json()
+    assert [row["order_id"] for row in body["matched"]] == [second]
+
+
+def test_dry_run_changes_nothing(client, seed):
+    seed()
+    order_id = submit(client, "홍길동")
+
+    body = upload(client, "입금자명,입금액\n홍길동,5000\n", '?dry_run=1').get_json()
+    assert body["dry_run"] is True
+    assert [row["order_id"] for row in body["matched"]] == [order_id]
+    assert statuses() == {order_id: "결제대기"}
+    assert Payment.query.count() == 0
+
+
+def test_bad_statement_and_encoding_return_400(client, seed):
+    seed()
+    assert upload(client, "이름,금액\n").status_code == 400
+    response = client.post('/cashier/payments/reconcile', data={
+        "file": (io.BytesIO("입금자명,입금액\n".encode('cp949')), 'statement.csv')
+    })
+    assert response.status_code == 400
+    assert client.post('/cashier/payments/reconcile').status_code == 400
+
+
+def test_order_changed_meanwhile_is_a_conflict(client, seed):
+    seed()
+    order_id = submit(client, "홍길동")
+
+    def racing_deposits():
+        # 결제대기 주문을 읽은 뒤에 다른 요청이 같은 주문을 취소했다
+        with Session(db.engine) as other:
+            other.execute(update(Order).where(Order.order_id == order_id).values(order_status='취소'))
+            other.commit()
+        yield 2, "홍길동", 5000, None
+
+    with pytest.raises(OrderError) as error:
+        reconcile(racing_deposits())
+    assert error.value.status_code == 409
+    db.session.rollback()
+    assert statuses() == {order_id: "취소"}
+    assert Payment.query.count() == 0
@@ -0,0 +1,10 @@
+def test_menu_report_hides_fully_cancelled_menus(client, seed):
+    seed()
+    order_id = client.post('/order/submit', json={
+        "table_id": 1, "depositor": "손님", "items": [{"menu_id": 1, "quantity": 2}]
+    }).get_json()["order_id"]
+    assert [row["quantity"] for row in client.get('/report/menus').get_json()] == [2]
+
+    client.delete('/cashier/order/delete', json={"order_id": order_id})
+    assert client.get('/report/menus').get_json() == []
+    assert client.get('/report/menus?hourly=1').get_json() == []
@@ -0,0 +1,73 @@
+from app.models import db, Menu, Order, OrderDetail
+
+
+def place(client, seed):
+    # 메뉴 두 개짜리 결제확인 주문, 상세 id 두 개를 반환
+    seed()
+    db.session.add(Menu(menu_id=2, category_id=1, menu_name="순대", price=4000))
+    db.session.commit()
+    order_id = client.post('/order/submit', json={
+        "table_id": 1, "depositor": "손님", "items": [{"menu_id": 1, "quantity": 1}, {"menu_id": 2, "quantity": 2}]
+    }).get_json()["order_id"]
+    client.post('/cashier/confirm_order', json={"order_id": order_id})
+    detail_ids = [d.order_detail_id for d in OrderDetail.query.filter_by(order_id=order_id).order_by(
+        OrderDetail.order_detail_id
+    )]
+    return order_id, detail_ids
+
+
+def status_of(order_id):
+    db.session.expire_all()
+    return db.session.get(Order, order_id).order_status
+
+
+def test_partly_served_order_stays_open(client, seed):
+    order_id, (first, second) = place(client, seed)
+
+    body = client.post('/serving/complete', json={"order_detail_id": first}).get_json()
+    assert body["fully_served"] is False
+    assert status_of(order_id) == "결제확인"
+    assert db.session.get(OrderDetail, first).is_served is True
+    assert [item["order_detail_id"] for order in client.get('/serving').get_json() for item in order["items"]] == [second]
+
+
+def test_last_item_completes_order(client, seed):
+    order_id, (first, second) = place(client, seed)
+    client.post('/serving/complete', json={"order_detail_id": first})
+
+    body = client.post('/serving/complete', json={"order_detail_id": second}).get_json()
+    assert body == {"message": "항목 서빙 완료", "order_id": order_id, "fully_served": True}
+    assert status_of(order_id) == "완료"
+    assert client.get('/serving').get_json() == []
+
+
+def test_batch_completes_order_and_reports_missing_ids(client, seed):
+    order_id, detail_ids = place(client, seed)
+
+    body = client.post('/serving/complete/batch', json={"order_detail_ids": detail_ids + [9999]}).get_json()
+    assert body["order_detail_ids"] == detail_ids
+    assert body["missing"] == [9999]
+    assert body["completed_order_ids"] == [order_id]
+    assert status_of(order_id) == "완료"
+
+    # 이미 서빙된 항목을 다시 보내도 바뀌는 것이 없다
+    body = client.post('/serving/complete/batch', json={"order_detail_ids": detail_ids}).get_json()
+    assert body["completed_order_ids"] == []
+
+
+def test_cancelled_order_is_not_completed(client, seed):
+    order_id, detail_ids = place(client, seed)
+    client.delete('/cashier/order/delete', json={"order_id": order_id})
+
+    body = client.post('/serving/complete/batch', json={"order_detail_ids": detail_ids}).get_json()
+    assert body["completed_order_ids"] == []
+    assert status_of(order_id) == "취소"
+
+
+def test_missing_ids(client, seed):
+    place(client, seed)
+    assert client.post('/serving/complete', json={"order_detail_id": 9999}).status_code == 404
+    body = client.post('/serving/complete/batch', json={"order_detail_ids": [9999]}).get_json()
+    assert (body["order_detail_ids"], body["missing"], body["completed_order_ids"]) == ([], [9999], [])
+    assert client.post('/serving/complete/batch', json={"order_detail_ids": []}).status_code == 400
+    assert client.post('/serving/complete/batch', json={"order_detail_ids": ["x"]}).status_code == 400
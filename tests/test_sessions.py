@@ -0,0 +1,34 @@
+from sqlalchemy.orm import Session
+
+from app.models import db, StoreTable, TableSession
+from app.models.orders import open_session
+
+
+def test_first_orders_racing_share_one_session(app, seed):
+    seed(tables=1)
+    table = db.session.get(StoreTable, 1)
+    assert table.current_session_id is None
+
+    # 이 테이블을 읽은 뒤, 다른 요청이 먼저 첫 주문으로 세션을 열고 커밋했다
+    with Session(db.engine) as other:
+        session = TableSession(table_id=1)
+        other.add(session)
+        other.flush()
+        other.get(StoreTable, 1).current_session_id = session.session_id
+        other.commit()
+        winner = session.session_id
+
+    assert open_session(table) == winner
+    db.session.commit()
+    assert TableSession.query.count() == 1
+    assert db.session.get(StoreTable, 1).is_occupied is True
+
+
+def test_first_order_opens_session(client, seed):
+    seed(tables=1)
+    client.post('/order/submit', json={"table_id": 1, "depositor": "손님", "items": [{"menu_id": 1, "quantity": 1}]})
+    client.post('/order/submit', json={"table_id": 1, "depositor": "손님", "items": [{"menu_id": 1, "quantity": 1}]})
+
+    table = db.session.get(StoreTable, 1)
+    assert TableSession.query.count() == 1
+    assert table.current_session_id == TableSession.query.one().session_id
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.models import db, Menu, Order
+
+
+def menu():
+    db.session.expire_all()
+    return db.session.get(Menu, 1)
+
+
+def submit(client, table_id, quantity=1):
+    return client.post('/order/submit', json={
+        "table_id": table_id, "depositor": f"손님{table_id}", "items": [{"menu_id": 1, "quantity": quantity}]
+    })
+
+
+def test_concurrent_submits_never_oversell(app, seed):
+    seed(stock=5, tables=12)
+
+    def attempt(table_id):
+        # 스레드마다 클라이언트/앱 컨텍스트가 따로라 DB 세션도 따로다
+        return submit(app.test_client(), table_id).status_code
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        statuses = list(pool.map(attempt, range(1, 13)))
+
+    assert statuses.count(201) == 5
+    assert statuses.count(409) == 7
+    assert Order.query.count() == 5
+    assert (menu().stock_quantity, menu().is_available) == (0, False)
+
+
+def test_cancel_restores_menu_sold_out_by_stock(client, seed):
+    seed(stock=1)
+    order_id = submit(client, 1).get_json()["order_id"]
+    assert (menu().stock_quantity, menu().is_available) == (0, False)
+
+    response = client.delete('/cashier/order/delete', json={"order_id": order_id})
+    assert response.status_code == 200
+    assert (menu().stock_quantity, menu().is_available) == (1, True)
+
+
+def test_restock_restores_menu_sold_out_by_stock(client, seed):
+    seed(stock=1)
+    submit(client, 1)
+    assert menu().is_available is False
+
+    client.post('/menu/stock/update', json={"menu_id": 1, "stock_quantity": 3})
+    assert (menu().stock_quantity, menu().is_available) == (3, True)
+
+    client.post('/menu/stock/update', json={"menu_id": 1, "stock_quantity": 0})
+    assert menu().is_available is False
+
+
+def test_restock_keeps_manual_sold_out(client, seed):
+    seed(stock=2)
+    client.post('/menu/disable', json={"menu_id": 1})
+
+    client.post('/menu/stock/update', json={"menu_id": 1, "stock_quantity": 5})
+    assert (menu().stock_quantity, menu().is_available) == (5, False)
+
+
+def test_status_patch_cancel_releases_and_uncancel_reserves(client, seed):
+    seed(stock=3)
+    order_id = submit(client, 1, quantity=2).get_json()["order_id"]
+    assert menu().stock_quantity == 1
+
+    response = client.patch(f'/cashier/orders/{order_id}/status', json={"order_status": "취소"})
+    assert response.status_code == 200
+    assert menu().stock_quantity == 3
+
+    response = client.patch(f'/cashier/orders/{order_id}/status', json={"order_status": "결제대기"})
+    assert response.status_code == 200
+    assert menu().stock_quantity == 1
+
+    # 다른 상태끼리는 재고가 그대로다
+    client.patch(f'/cashier/orders/{order_id}/status', json={"order_status": "결제확인"})
+    assert menu().stock_quantity == 1
+
+
+def test_status_patch_uncancel_without_stock_is_rejected(client, seed):
+    seed(stock=2)
+    order_id = submit(client, 1, quantity=2).get_json()["order_id"]
+    client.patch(f'/cashier/orders/{order_id}/status', json={"order_status": "취소"})
+    submit(client, 1, quantity=2)
+    assert menu().stock_quantity == 0
+
+    response = client.patch(f'/cashier/orders/{order_id}/status', json={"order_status": "결제확인"})
+    assert response.status_code == 409
+    assert menu().stock_quantity == 0
+    assert db.session.get(Order, order_id).order_status == "취소"